@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+调试快照存储模块
+章节页面HTML和课程出错时的页面转储交给后台线程gzip压缩后写入，按内容哈希命名、相同内容只存一份，
+只保留最近的N个快照（或不超过指定的MB数），索引文件记录每个快照对应的运行、课程和阶段
+"""
+
+import os
+import gzip
+import json
+import time
+import queue
+import atexit
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import Counter
+from log_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# 快照目录和索引文件
+ARTIFACT_DIR = "output/artifacts"
+ARTIFACT_INDEX_NAME = "index.json"
+
+# 最多保留的快照条数和压缩后的总大小（MB）
+MAX_ARTIFACTS = 200
+MAX_ARTIFACT_MB = 50
+
+# 等待写入的快照队列长度，写满时调用方等待（不丢弃快照）
+QUEUE_SIZE = 64
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+class ArtifactStore:
+    """
+    有上限、压缩、按内容寻址的调试快照存储
+
+    save()只把快照放入队列立即返回，哈希、压缩、写文件、淘汰旧快照和更新索引都在后台线程中完成
+    """
+
+    def __init__(self, directory=ARTIFACT_DIR, max_items=MAX_ARTIFACTS, max_mb=MAX_ARTIFACT_MB):
+        """
+        Args:
+            directory: 快照目录（索引文件也在这里），转为绝对路径，之后切换工作目录不影响后台写入
+            max_items: 最多保留的快照条数
+            max_mb: 快照文件压缩后的总大小上限（MB）
+        """
+        self.directory = os.path.abspath(directory)
+        self.index_file = os.path.join(self.directory, ARTIFACT_INDEX_NAME)
+        self.max_items = max(1, max_items)
+        self.max_bytes = max_mb * 1024 * 1024
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # 索引条目，按时间从旧到新
+        self.entries = self._load_index()
+        self._refs = Counter(entry["hash"] for entry in self.entries)
+        self._blob_bytes = {entry["hash"]: entry["compressed_size"] for entry in self.entries}
+        self._total_bytes = sum(self._blob_bytes.values())
+        self.stats = {"saved": 0, "deduplicated": 0, "evicted": 0, "bytes_in": 0, "bytes_written": 0}
+
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._worker, name="artifact-store", daemon=True)
+        self._thread.start()
+
+    def _load_index(self):
+        """读取已有的索引，跳过快照文件已经不存在的条目"""
+        if not os.path.exists(self.index_file):
+            return []
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠ 无法读取快照索引，重新开始: {e}")
+            return []
+        return [entry for entry in entries if os.path.exists(os.path.join(self.directory, entry["file"]))]
+
+    def save(self, content, phase, run=None, course=None, **tags):
+        """
+        提交一个快照，立即返回
+
+        Args:
+            content: 页面HTML（str或bytes）
+            phase: 阶段，例如"chapter_page"、"course_error"
+            run: 运行ID（RunStore.run_id）
+            course: 课程名称或章节名称
+            **tags: 其他写入索引的信息（如course_index）
+        """
+        meta = {"time": time.time(), "run": run, "course": course, "phase": phase}
+        meta.update(tags)
+        self._queue.put((meta, content))
+
+    def _worker(self):
+        while True:
+            batch = [self._queue.get()]
+            # 一次取出队列中所有等待的快照，处理完后只重写一次索引
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = False
+            try:
+                for item in batch:
+                    if item is None:
+                        stop = True
+                        continue
+                    try:
+                        self._store(*item)
+                    except Exception as e:
+                        logger.warning(f"⚠ 保存调试快照失败: {e}")
+                self._write_index()
+            except Exception as e:
+                logger.warning(f"⚠ 写入快照索引失败: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _store(self, meta, content):
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        digest = hashlib.sha256(data).hexdigest()
+        filename = f"{digest}.html.gz"
+        with self._lock:
+            if digest in self._blob_bytes:
+                self.stats["deduplicated"] += 1
+            else:
+                # mtime=0使相同内容压缩后的文件完全相同
+                compressed = gzip.compress(data, compresslevel=6, mtime=0)
+                _write_atomic(os.path.join(self.directory, filename), compressed)
+                self._blob_bytes[digest] = len(compressed)
+                self._total_bytes += len(compressed)
+                self.stats["bytes_written"] += len(compressed)
+            entry = dict(meta, hash=digest, file=filename, size=len(data),
+                         compressed_size=self._blob_bytes[digest])
+            self.entries.append(entry)
+            self._refs[digest] += 1
+            self.stats["saved"] += 1
+            self.stats["bytes_in"] += len(data)
+            self._evict()
+
+    def _evict(self):
+        """按时间从旧到新淘汰快照，直到条数和总大小都不超过上限（至少保留最新的一条，调用方持有锁）"""
+        while len(self.entries) > 1 and (len(self.entries) > self.max_items or self._total_bytes > self.max_bytes):
+            entry = self.entries.pop(0)
+            digest = entry["hash"]
+            self._refs[digest] -= 1
+            self.stats["evicted"] += 1
+            if self._refs[digest] <= 0:
+                del self._refs[digest]
+                self._total_bytes -= self._blob_bytes.pop(digest)
+                try:
+                    os.remove(os.path.join(self.directory, entry["file"]))
+                except OSError as e:
+                    logger.debug("删除快照文件失败: %s", e)
+
+    def _write_index(self):
+        with self._lock:
+            data = json.dumps(self.entries, ensure_ascii=False, indent=2).encode("utf-8")
+        _write_atomic(self.index_file, data)
+
+    @property
+    def total_bytes(self):
+        """磁盘上快照文件压缩后的总大小"""
+        with self._lock:
+            return self._total_bytes
+
+    def find(self, phase=None, run=None, course=None):
+        """
+        按阶段、运行和课程查找索引条目（先调用flush()确保已提交的快照都已写入）
+
+        Returns:
+            list: 匹配的条目，按时间从新到旧
+        """
+        with self._lock:
+            entries = list(self.entries)
+        return [entry for entry in reversed(entries)
+                if (phase is None or entry["phase"] == phase)
+                and (run is None or entry["run"] == run)
+                and (course is None or entry["course"] == course)]
+
+    def read(self, entry):
+        """读取并解压一个快照，返回HTML字符串"""
+        with gzip.open(os.path.join(self.directory, entry["file"]), "rb") as f:
+            return f.read().decode("utf-8")
+
+    def flush(self):
+        """等待已提交的快照全部写入"""
+        self._queue.join()
+
+    def close(self):
+        """写完队列中的快照后停止后台线程"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+
+def _write_atomic(path, data):
+    """先写临时文件再替换，避免中断时留下写到一半的文件"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def get_store():
+    """返回进程内共享的快照存储（第一次调用时创建），各阶段的快照都经同一个后台线程写入"""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = ArtifactStore()
+            atexit.register(close)
+        return _default_store
+
+
+def save_artifact(content, phase, run=None, course=None, **tags):
+    """把快照提交给共享的快照存储，参数同ArtifactStore.save"""
+    get_store().save(content, phase, run=run, course=course, **tags)
+
+
+def load_latest(phase, course=None):
+    """
+    读取共享快照存储中某个阶段最新的快照
+
+    Returns:
+        str: 页面HTML，没有匹配的快照时返回None
+    """
+    store = get_store()
+    store.flush()
+    entries = store.find(phase=phase, course=course)
+    return store.read(entries[0]) if entries else None
+
+
+def close():
+    """写完共享快照存储中等待的快照并停止后台线程"""
+    global _default_store
+    with _default_lock:
+        store, _default_store = _default_store, None
+    if store:
+        store.close()
+
+
+def benchmark_artifact_store(n_snapshots=300, distinct=30, items_per_page=300):
+    """
+    比较原有的同步写入未压缩HTML文件与快照存储在调用线程上的耗时和磁盘占用
+
+    模拟n_snapshots次保存，其中只有distinct种不同内容（重复访问同样的章节页面）
+
+    Args:
+        n_snapshots: 保存次数
+        distinct: 不同页面内容的数量
+        items_per_page: 每个页面的列表项数
+
+    Returns:
+        dict: 两种方式调用线程上的平均耗时（毫秒）、写入的字节数和最终的磁盘占用
+    """
+    from course_content_extractor import build_course_page_fixture
+    pages = [build_course_page_fixture(items_per_page).replace("</body>", f"<!-- {i} --></body>")
+             for i in range(distinct)]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # 原有方式：每次保存都在调用线程上写一个未压缩的文件
+        legacy_dir = os.path.join(tmp_dir, "legacy")
+        os.makedirs(legacy_dir)
+        written = 0
+        start = time.perf_counter()
+        for i in range(n_snapshots):
+            html = pages[i % distinct]
+            with open(os.path.join(legacy_dir, f"debug_course_{i}_{int(time.time())}.html"), "w",
+                      encoding="utf-8") as f:
+                f.write(html)
+            written += len(html.encode("utf-8"))
+        results["legacy"] = {"caller_ms": (time.perf_counter() - start) / n_snapshots * 1000,
+                             "bytes_written": written, "disk_bytes": _directory_size(legacy_dir)}
+
+        store = ArtifactStore(os.path.join(tmp_dir, "artifacts"), max_items=100)
+        start = time.perf_counter()
+        for i in range(n_snapshots):
+            store.save(pages[i % distinct], "chapter_page", run=1, course=f"章节{i % distinct}")
+        caller = time.perf_counter() - start
+        store.close()
+        results["store"] = {"caller_ms": caller / n_snapshots * 1000,
+                            "bytes_written": store.stats["bytes_written"],
+                            "disk_bytes": _directory_size(store.directory),
+                            "deduplicated": store.stats["deduplicated"],
+                            "evicted": store.stats["evicted"],
+                            "indexed": len(store.entries)}
+        shutil.rmtree(legacy_dir)
+
+    logger.info(f"=== 调试快照存储基准测试（{n_snapshots}次保存，{distinct}种内容） ===")
+    for name, result in results.items():
+        logger.info(f"{name}: 调用线程平均{result['caller_ms']:.2f}ms，写入{result['bytes_written'] / 1024 / 1024:.1f}MB，"
+                    f"磁盘占用{result['disk_bytes'] / 1024 / 1024:.2f}MB")
+    store_result = results["store"]
+    logger.info(f"去重{store_result['deduplicated']}次，淘汰{store_result['evicted']}条，索引保留{store_result['indexed']}条")
+    return results
+
+
+def _directory_size(directory):
+    return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+
+
+if __name__ == "__main__":
+    setup_logging()
+    benchmark_artifact_store()
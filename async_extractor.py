@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+课程内容提取的异步引擎
+基于playwright.async_api，每个练习章节使用独立的页面，以有上限的并发度同时处理多个章节；
+浏览器按PERFORMANCE_PROFILES启动，章节列表按LISTING_BACKEND获取，
+链接解析、运行存储和输出文件与同步引擎（course_content_extractor）共用同一套实现
+"""
+
+import asyncio
+import logging
+import concurrent.futures
+from playwright.async_api import async_playwright
+
+import course_content_extractor as extractor
+from main import Config
+from course_page_parser import chapter_from_url, site_url, content_fingerprint
+from link_patterns import total_steps
+from run_store import RunStore
+from listing_fetcher import ListingFetcher
+from browser_session import login_to_system_async, new_context_async, profile_settings, DEFAULT_LAUNCH_ARGS
+from page_readiness import goto_ready_async
+from page_snapshot import page_html_async
+from instrumentation import span, set_tags
+from log_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# 默认同时处理的章节数：保守取值，避免对站点造成明显压力或触发风控
+DEFAULT_CONCURRENCY = 2
+
+# 允许配置的最大并发章节数
+MAX_CONCURRENCY = 8
+
+# 支持的章节列表获取方式（LISTING_BACKEND）
+LISTING_BACKENDS = ("browser", "http")
+
+
+def clamp_concurrency(concurrency):
+    """把配置的并发度限制在1到MAX_CONCURRENCY之间，无效值使用DEFAULT_CONCURRENCY"""
+    try:
+        concurrency = int(concurrency)
+    except (TypeError, ValueError):
+        return DEFAULT_CONCURRENCY
+    return max(1, min(MAX_CONCURRENCY, concurrency))
+
+
+def check_supported(listing_backend):
+    """
+    检查异步引擎是否支持当前配置
+
+    Args:
+        listing_backend: 章节列表获取方式
+
+    Raises:
+        ValueError: 章节列表获取方式未知，或提取后端不是html（异步引擎只离线解析页面HTML）
+    """
+    if listing_backend not in LISTING_BACKENDS:
+        raise ValueError(f"未知的LISTING_BACKEND: {listing_backend}，可选: {', '.join(LISTING_BACKENDS)}")
+    if extractor.EXTRACT_BACKEND != "html":
+        raise ValueError(f"异步引擎只支持html提取后端，当前为{extractor.EXTRACT_BACKEND}，请改用同步引擎")
+
+
+async def visit_practice_page(page, url):
+    """
+    访问指定的练习页面
+
+    Returns:
+        bool: 页面访问是否成功
+    """
+    try:
+        logger.info(f"访问练习页面: {url}")
+        await goto_ready_async(page, url, "practice_list", timeout=20000)
+        logger.info(f"✓ 页面访问成功，当前URL: {page.url}")
+        return True
+    except Exception as e:
+        logger.error(f"✗ 访问练习页面失败: {e}")
+        return False
+
+
+async def fetch_page_validators(page, url):
+    """
+    通过一次轻量的HEAD请求获取页面的ETag和Last-Modified
+
+    Returns:
+        tuple: (etag, last_modified)，服务器未提供时为None
+    """
+    try:
+        response = await page.context.request.head(url, timeout=10000)
+        headers = response.headers
+        return headers.get("etag"), headers.get("last-modified")
+    except Exception as e:
+        logger.warning(f"! 获取页面缓存校验头失败: {e}")
+        return None, None
+
+
+async def fetch_practice_html(fetcher, url):
+    """
+    用HTTP直接获取练习页面HTML，httpx的同步请求放到线程中执行，不阻塞事件循环
+
+    Returns:
+        str: 页面HTML，获取失败时返回None，由调用方改用浏览器访问
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, extractor.fetch_practice_html, fetcher, url)
+
+
+def extract_course_links(html, url, run=None):
+    """
+    离线解析章节页面HTML中已完成和未完成的课程链接（只支持html后端）
+
+    Returns:
+        tuple: (已完成的链接列表, 未完成的链接列表)
+    """
+    try:
+        return extractor.extract_links_from_html(html, chapter_from_url(url), run)
+    except Exception as e:
+        logger.error(f"✗ 提取课程链接时发生错误: {e}")
+        return [], []
+
+
+async def process_practice_page(page):
+    """
+    处理练习页面：读取总关卡数，把隐藏的step字段改为总关卡数+1后提交
+
+    Returns:
+        bool: 处理是否成功
+    """
+    try:
+        red_text_element = page.locator("font[color='#FF5809']").first
+        if not await red_text_element.count():
+            logger.error("✗ 未找到特定颜色的文本")
+            return False
+        red_text = (await red_text_element.text_content()).strip()
+        steps = total_steps(red_text)
+        if steps is None:
+            logger.error("✗ 未能从红色文本中提取数字")
+            return False
+        step = steps + 1
+
+        if not await page.locator("input[type='hidden'][name='step']").count():
+            logger.error("✗ 未找到step隐藏字段")
+            return False
+        await page.evaluate(
+            "(step) => { document.querySelector(\"input[type='hidden'][name='step']\").value = String(step); }",
+            step
+        )
+        logger.info(f"✓ 已修改step值为: {step}")
+
+        submit_button = page.locator("input[type='submit'][name='button_prac_process']")
+        if not await submit_button.count():
+            logger.error("✗ 未找到提交按钮")
+            return False
+        async with page.expect_navigation(wait_until="domcontentloaded"):
+            await submit_button.click()
+        logger.info("✓ 已点击提交按钮")
+        return True
+    except Exception as e:
+        logger.error(f"✗ 处理练习页面时出错: {e}", exc_info=True)
+        return False
+
+
+async def process_incomplete_links(page, incomplete_links):
+    """依次进入章节内未完成的链接并处理练习页面"""
+    logger.info(f"=== 开始处理未完成的链接（共{len(incomplete_links)}个） ===")
+    for index, link_info in enumerate(incomplete_links):
+        try:
+            logger.info(f"🔍 处理第{index + 1}/{len(incomplete_links)}个未完成链接: {link_info.text}")
+            href = link_info.href
+            is_practice_link = "practice" in href or "prac" in href
+            await goto_ready_async(page, href, "practice" if is_practice_link else None, timeout=10000)
+            if "practice" in page.url or "prac" in page.url:
+                with span("practice_submit", item=link_info.index):
+                    await process_practice_page(page)
+            else:
+                logger.info("ℹ️ 访问的页面不是练习页面，跳过处理")
+            # 同一章节内的链接之间仍保留间隔，避免过快操作
+            await asyncio.sleep(extractor.LINK_INTERVAL_SECONDS)
+        except Exception as e:
+            logger.error(f"✗ 处理链接时出错: {e}")
+
+
+async def process_chapter(context, url, store, semaphore, incremental=False, fetcher=None):
+    """
+    在独立页面中处理一个练习章节：访问、提取、保存、处理未完成链接
+
+    提供fetcher（LISTING_BACKEND为http）时章节列表用HTTP获取，获取失败时改用浏览器访问
+
+    Returns:
+        dict: {"completed": 已完成数, "incomplete": 未完成数, "skipped": 是否被增量模式跳过}
+    """
+    async with semaphore:
+        set_tags(chapter=chapter_from_url(url))
+        result = {"completed": 0, "incomplete": 0, "skipped": False}
+        page = await context.new_page()
+        try:
+            previous = store.get_fingerprint(url) if incremental else None
+            unchanged_before = previous is not None and not previous["pending"]
+            etag = last_modified = None
+            if incremental:
+                etag, last_modified = await fetch_page_validators(page, url)
+                if unchanged_before and (etag or last_modified) and \
+                        (etag, last_modified) == (previous["etag"], previous["last_modified"]):
+                    logger.info(f"⏭ 章节未变化（ETag/Last-Modified），跳过: {url}")
+                    result["skipped"] = True
+                    return result
+
+            html = await fetch_practice_html(fetcher, url) if fetcher else None
+            if html is None:
+                if not await visit_practice_page(page, url):
+                    return result
+                html = await page_html_async(page)
+
+            if incremental:
+                # 与同步引擎一致：先比较内容指纹，未变化的章节不再解析和保存快照
+                fingerprint = content_fingerprint(html)
+                if unchanged_before and fingerprint == previous["fingerprint"]:
+                    logger.info(f"⏭ 章节内容指纹未变化，跳过: {url}")
+                    store.save_fingerprint(url, fingerprint, etag, last_modified, pending=0)
+                    result["skipped"] = True
+                    return result
+
+            with span("extraction", backend="html") as tags:
+                completed_links, incomplete_links = extract_course_links(html, url, store.run_id)
+                tags.update(completed=len(completed_links), incomplete=len(incomplete_links))
+
+            with span("persistence", target="links"):
+                extractor.save_to_json(completed_links, incomplete_links, store, chapter_from_url(url))
+                extractor.save_to_csv(store)
+                if incremental:
+                    store.save_fingerprint(url, fingerprint, etag, last_modified, pending=len(incomplete_links))
+
+            result.update(completed=len(completed_links), incomplete=len(incomplete_links))
+            if incomplete_links:
+                await process_incomplete_links(page, incomplete_links)
+            return result
+        finally:
+            await page.close()
+
+
+async def main_async(user_name=None, password=None, incremental=False, concurrency=None,
+                     storage_state=None, profile="debug", listing_backend="browser"):
+    """
+    异步提取流程：以有上限的并发度同时处理PRACTICE_CHAPTERS中的各个章节
+
+    Args:
+        user_name: 用户名（提供storage_state时不需要）
+        password: 密码
+        incremental: 增量模式，跳过内容未变化且没有待处理项目的章节
+        concurrency: 同时处理的章节数，默认DEFAULT_CONCURRENCY
+        storage_state: 已登录上下文的storage_state（字典或文件路径），提供时不再登录
+        profile: 浏览器性能配置（PERFORMANCE_PROFILES中的名称）
+        listing_backend: 章节列表获取方式，browser或http
+
+    Returns:
+        dict: 汇总的已完成数、未完成数和跳过的章节数
+    """
+    check_supported(listing_backend)
+    concurrency = clamp_concurrency(concurrency if concurrency is not None else DEFAULT_CONCURRENCY)
+    profile, settings = profile_settings(profile)
+    practice_page_urls = [site_url(f"practice.php?chapter={chapter}") for chapter in extractor.PRACTICE_CHAPTERS]
+    logger.info(f"异步提取流程开始（{len(practice_page_urls)}个章节，并发度{concurrency}，{profile}配置）...")
+
+    store = RunStore()
+    store.start_run("extract")
+    summary = {"completed": 0, "incomplete": 0, "skipped": 0}
+    fetcher = None
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=settings["headless"], slow_mo=settings["slow_mo"],
+                                                   args=DEFAULT_LAUNCH_ARGS)
+        try:
+            with span("login", engine="async", reused_state=storage_state is not None):
+                context = await new_context_async(browser, settings["block_resources"], storage_state)
+                if storage_state is None:
+                    page = await context.new_page()
+                    try:
+                        if not await login_to_system_async(page, user_name, password):
+                            raise RuntimeError("登录失败，无法继续执行")
+                    finally:
+                        await page.close()
+            if listing_backend == "http":
+                # 章节列表页面只读取，用HTTP直接获取后离线解析，浏览器只处理未完成的练习
+                fetcher = ListingFetcher(await context.cookies())
+                logger.info("✓ 章节列表使用HTTP获取")
+
+            semaphore = asyncio.Semaphore(concurrency)
+            results = await asyncio.gather(
+                *(process_chapter(context, url, store, semaphore, incremental, fetcher)
+                  for url in practice_page_urls),
+                return_exceptions=True
+            )
+            for url, result in zip(practice_page_urls, results):
+                if isinstance(result, Exception):
+                    logger.error(f"✗ 处理章节失败 {url}: {result}")
+                    continue
+                summary["completed"] += result["completed"]
+                summary["incomplete"] += result["incomplete"]
+                summary["skipped"] += result["skipped"]
+
+            logger.info("=== 提取结果总结 ===")
+            logger.info(f"已完成的学习项目: {summary['completed']} 个，未完成的学习项目: {summary['incomplete']} 个")
+            logger.info(f"数据已保存到: {extractor.OUTPUT_JSON_FILE} 和 {extractor.OUTPUT_CSV_FILE}")
+            if incremental:
+                logger.info(f"增量模式跳过的章节: {summary['skipped']}/{len(practice_page_urls)} 个")
+            store.finish_run()
+        except Exception as e:
+            logger.error(f"✗ 异步提取流程发生严重错误: {e}", exc_info=True)
+            store.finish_run("failed")
+        finally:
+            if fetcher:
+                fetcher.close()
+            await browser.close()
+            store.close()
+    return summary
+
+
+def run(user_name=None, password=None, incremental=False, concurrency=None, storage_state=None,
+        profile="debug", listing_backend="browser"):
+    """
+    在独立线程的事件循环中运行异步提取流程并等待结束
+
+    同一线程中已启动的sync_playwright会占用事件循环，因此不直接在调用线程中asyncio.run
+
+    Returns:
+        dict: main_async的汇总结果
+
+    Raises:
+        ValueError: 异步引擎不支持当前的LISTING_BACKEND或提取后端
+    """
+    check_supported(listing_backend)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="async-extractor") as executor:
+        future = executor.submit(asyncio.run, main_async(user_name, password, incremental, concurrency,
+                                                         storage_state, profile, listing_backend))
+        return future.result()
+
+
+def run_config(config, storage_state=None):
+    """
+    按Config配置运行异步提取流程（USER_NAME、PASSWORD、INCREMENTAL、EXTRACT_CONCURRENCY、
+    PERFORMANCE_PROFILE、LISTING_BACKEND）
+
+    Args:
+        config: main.Config配置
+        storage_state: 已登录上下文的storage_state，提供时不再登录
+
+    Returns:
+        dict: main_async的汇总结果
+    """
+    return run(config.get('USER_NAME'), config.get('PASSWORD'),
+               incremental=config.get('INCREMENTAL', False),
+               concurrency=config.get('EXTRACT_CONCURRENCY'),
+               storage_state=storage_state,
+               profile=config.get('PERFORMANCE_PROFILE', 'debug'),
+               listing_backend=config.get('LISTING_BACKEND', 'browser'))
+
+
+if __name__ == "__main__":
+    setup_logging()
+    run_config(Config("config.txt"))
@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+端到端性能基准测试
+启动本地模拟站点，用同一个浏览器会话依次运行课程内容提取和课程爬取两个阶段，
+输出每秒页面数、导航耗时p50/p95和峰值内存，便于离线发现吞吐量退化
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows没有resource模块
+    resource = None
+
+import page_readiness
+import page_snapshot
+import instrumentation
+import artifact_store
+import course_scraper
+import course_content_extractor
+import async_extractor
+from browser_session import BrowserSession
+from listing_fetcher import ListingFetcher, parse_listing
+from page_pool import benchmark_page_pool
+from course_page_parser import set_site_base_url, SITE_BASE_URL
+from fixture_server import FixtureServer
+from main import Config, STAGES, run_stages
+from log_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def peak_rss_mb():
+    """
+    返回当前进程和已结束子进程（浏览器）的峰值常驻内存（MB）
+
+    Returns:
+        dict: {"self": MB, "children": MB}，不支持的平台上为None
+    """
+    if resource is None:
+        return {"self": None, "children": None}
+    # Linux上ru_maxrss单位为KB，macOS上为字节
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+
+def process_tree_rss_mb(pid=None):
+    """
+    返回某个进程所有子孙进程（Playwright驱动和浏览器）当前常驻内存之和（MB）
+
+    Args:
+        pid: 根进程，默认当前进程
+
+    Returns:
+        float: 常驻内存（MB），没有/proc的平台上为None
+    """
+    if not os.path.isdir("/proc"):
+        return None
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                # 第2个字段（进程名）可能包含空格，从最后一个")"之后开始取
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    total_kb = 0
+    stack = list(children.get(pid or os.getpid(), []))
+    while stack:
+        child = stack.pop()
+        stack.extend(children.get(child, []))
+        try:
+            with open(f"/proc/{child}/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total_kb / 1024
+
+
+@contextmanager
+def fixture_environment(workdir=None, **site_options):
+    """
+    启动本地模拟站点，并把运行目录、站点地址和各种等待时间切换为基准测试用的设置，退出时全部恢复
+
+    Args:
+        workdir: 运行目录（output/写在这里），默认使用临时目录，避免污染真实数据
+        **site_options: FixtureServer的站点参数
+
+    Yields:
+        FixtureServer: 已启动的模拟站点
+    """
+    original_cwd = os.getcwd()
+    original_base_url = SITE_BASE_URL
+    workdir = workdir or tempfile.mkdtemp(prefix="linuxstudio_bench_")
+    os.makedirs(os.path.join(workdir, "output"), exist_ok=True)
+
+    # 基准测试不需要模拟学习时长和操作间隔
+    saved_timings = (course_scraper.STUDY_SECONDS, course_scraper.COURSE_INTERVAL_SECONDS,
+                     course_content_extractor.LINK_INTERVAL_SECONDS)
+    course_scraper.STUDY_SECONDS = 0
+    course_scraper.COURSE_INTERVAL_SECONDS = (0, 0)
+    course_content_extractor.LINK_INTERVAL_SECONDS = 0
+    try:
+        os.chdir(workdir)
+        with FixtureServer(**site_options) as server:
+            set_site_base_url(server.base_url)
+            yield server
+    finally:
+        instrumentation.close()
+        artifact_store.close()
+        os.chdir(original_cwd)
+        set_site_base_url(original_base_url)
+        (course_scraper.STUDY_SECONDS, course_scraper.COURSE_INTERVAL_SECONDS,
+         course_content_extractor.LINK_INTERVAL_SECONDS) = saved_timings
+
+
+def run_benchmark(courses=10, items_per_chapter=30, latency=0.05, profile="fast", workdir=None):
+    """
+    在本地模拟站点上运行完整流程并收集性能指标
+
+    Args:
+        courses: my_plan.php中的未学习课程数
+        items_per_chapter: 每个练习章节的列表项数
+        latency: 每个页面请求的注入延迟（秒）
+        profile: 浏览器性能配置
+        workdir: 运行目录，默认使用临时目录
+
+    Returns:
+        dict: 各阶段耗时、每秒页面数、导航耗时分位数和峰值内存
+    """
+    results = {"courses": courses, "items_per_chapter": items_per_chapter,
+               "latency": latency, "profile": profile, "stages": {}}
+    with fixture_environment(workdir, courses=courses, items_per_chapter=items_per_chapter,
+                             latency=latency) as server:
+        page_snapshot.reset_stats()
+        total_start = time.perf_counter()
+        config = Config(USER_NAME="benchmark", PASSWORD="benchmark")
+        with BrowserSession.from_profile("benchmark", "benchmark", profile=profile) as session:
+            results["setup_seconds"] = session.setup_seconds
+            stages = (
+                ("extract", lambda: course_content_extractor.Extractor(config, context=session.context).run()),
+                ("scrape", lambda: course_scraper.Scraper(config, context=session.context).run()),
+            )
+            for name, run_stage in stages:
+                requests_before = server.site.page_requests
+                start = time.perf_counter()
+                run_stage()
+                elapsed = time.perf_counter() - start
+                pages = server.site.page_requests - requests_before
+                results["stages"][name] = {
+                    "seconds": elapsed,
+                    "pages": pages,
+                    "pages_per_second": pages / elapsed if elapsed else 0.0
+                }
+        total_seconds = time.perf_counter() - total_start
+        total_pages = server.site.page_requests
+
+    navigation = sorted(value for values in page_readiness.latencies().values() for value in values)
+    results.update({
+        "total_seconds": total_seconds,
+        "pages": total_pages,
+        "pages_per_second": total_pages / total_seconds if total_seconds else 0.0,
+        "navigation_p50": page_readiness.percentile(navigation, 0.5),
+        "navigation_p95": page_readiness.percentile(navigation, 0.95),
+        "navigations": len(navigation),
+        "peak_rss_mb": peak_rss_mb(),
+        "phases": instrumentation.phase_totals(),
+        "snapshots": page_snapshot.snapshot_stats(),
+    })
+    return results
+
+
+def compare_extract_engines(items_per_chapter=60, latency=0.2, concurrency=None, profile="fast", workdir=None):
+    """
+    在本地模拟站点上分别用同步引擎和异步引擎运行课程内容提取阶段，比较耗时
+
+    两种引擎共用同一次登录：异步引擎通过storage_state复用同步会话的Cookie，
+    但会启动自己的浏览器，这部分启动时间计入异步引擎
+
+    Args:
+        items_per_chapter: 每个练习章节的列表项数（半数未完成，需要逐个处理）
+        latency: 每个页面请求的注入延迟（秒）
+        concurrency: 异步引擎的并发章节数，默认async_extractor.DEFAULT_CONCURRENCY
+        profile: 浏览器性能配置
+        workdir: 运行目录，默认使用临时目录
+
+    Returns:
+        dict: {"sync": {...}, "async": {...}}，每项包含耗时、页面数和每秒页面数
+    """
+    concurrency = async_extractor.clamp_concurrency(
+        concurrency if concurrency is not None else async_extractor.DEFAULT_CONCURRENCY)
+    results = {}
+    with fixture_environment(workdir, items_per_chapter=items_per_chapter, latency=latency) as server:
+        with BrowserSession.from_profile("benchmark", "benchmark", profile=profile) as session:
+            engines = (
+                ("sync", lambda: course_content_extractor.main("benchmark", "benchmark", context=session.context)),
+                ("async", lambda: async_extractor.run(storage_state=session.context.storage_state(),
+                                                      concurrency=concurrency, profile=profile)),
+            )
+            for name, run_engine in engines:
+                requests_before = server.site.page_requests
+                start = time.perf_counter()
+                run_engine()
+                elapsed = time.perf_counter() - start
+                pages = server.site.page_requests - requests_before
+                results[name] = {"seconds": elapsed, "pages": pages,
+                                 "pages_per_second": pages / elapsed if elapsed else 0.0}
+    results["async"]["concurrency"] = concurrency
+
+    for name, result in results.items():
+        logger.info(f"提取引擎 {name}: {result['seconds']:.2f}秒，{result['pages']}个页面，"
+                    f"{result['pages_per_second']:.1f}页/秒")
+    if results["async"]["seconds"]:
+        logger.info(f"🚀 异步引擎（并发度{concurrency}）加速比: "
+                    f"{results['sync']['seconds'] / results['async']['seconds']:.2f}x")
+    return results
+
+
+def compare_pipeline(chapters=12, items_per_chapter=400, latency=0.2, profile="fast", workdir=None):
+    """
+    在本地模拟站点上比较同步提取引擎的预取流水线和逐章节顺序处理
+
+    站点上的项目全部标记为已完成，只测量“加载章节→解析→保存”这一段，
+    列表越长、延迟越高，后台解析保存与下一章节加载的重叠收益越明显
+
+    Args:
+        chapters: 练习章节数
+        items_per_chapter: 每个练习章节的列表项数
+        latency: 每个页面请求的注入延迟（秒）
+        profile: 浏览器性能配置
+        workdir: 运行目录，默认使用临时目录
+
+    Returns:
+        dict: {"sequential": {...}, "pipelined": {...}, "speedup": 加速比}
+    """
+    chapter_names = [f"练习章节{i}" for i in range(1, chapters + 1)]
+    original_chapters = course_content_extractor.PRACTICE_CHAPTERS
+    course_content_extractor.PRACTICE_CHAPTERS = chapter_names
+    results = {}
+    try:
+        with fixture_environment(workdir, chapters=chapter_names, items_per_chapter=items_per_chapter,
+                                 completed_ratio=1.0, latency=latency) as server:
+            with BrowserSession.from_profile("benchmark", "benchmark", profile=profile) as session:
+                for name, pipelined in (("sequential", False), ("pipelined", True)):
+                    requests_before = server.site.page_requests
+                    start = time.perf_counter()
+                    course_content_extractor.main("benchmark", "benchmark", context=session.context,
+                                                  pipelined=pipelined)
+                    elapsed = time.perf_counter() - start
+                    results[name] = {"seconds": elapsed, "pages": server.site.page_requests - requests_before}
+    finally:
+        course_content_extractor.PRACTICE_CHAPTERS = original_chapters
+
+    for name in ("sequential", "pipelined"):
+        logger.info(f"提取方式 {name}: {results[name]['seconds']:.2f}秒，{results[name]['pages']}个页面")
+    results["speedup"] = (results["sequential"]["seconds"] / results["pipelined"]["seconds"]
+                          if results["pipelined"]["seconds"] else 0.0)
+    logger.info(f"🚀 预取流水线（{chapters}个章节×{items_per_chapter}项）加速比: {results['speedup']:.2f}x")
+    return results
+
+
+def compare_listing_backends(rounds=5, courses=50, items_per_chapter=300, latency=0.05, profile="fast",
+                             workdir=None):
+    """
+    在本地模拟站点上比较列表页面（my_plan.php和各练习章节）的三种获取方式：
+    浏览器导航后等待网络空闲、浏览器导航后只等待就绪条件、复用登录Cookie的httpx连接池直接请求
+
+    每种方式都取得HTML并离线解析，耗时包含获取和解析；内存包括Python侧的tracemalloc峰值
+    和浏览器进程树的常驻内存（HTTP方式下浏览器没有打开列表页面）
+
+    Args:
+        rounds: 每种方式获取全部列表页面的轮数
+        courses: my_plan.php中的未学习课程数
+        items_per_chapter: 每个练习章节的列表项数
+        latency: 每个页面请求的注入延迟（秒）
+        profile: 浏览器性能配置
+        workdir: 运行目录，默认使用临时目录
+
+    Returns:
+        dict: 每种方式的页面数、耗时p50/p95、总耗时、Python峰值内存和浏览器进程树内存
+    """
+    results = {}
+    original_mode = page_readiness.wait_mode
+    with fixture_environment(workdir, courses=courses, items_per_chapter=items_per_chapter,
+                             latency=latency) as server:
+        urls = [(f"{server.base_url}/user/my_plan.php", "my_plan")]
+        urls += [(f"{server.base_url}/practice.php?chapter={chapter}", "practice_list")
+                 for chapter in server.site.chapters]
+        with BrowserSession.from_profile("benchmark", "benchmark", profile=profile) as session:
+
+            def run_rounds(fetch, count):
+                timings = []
+                for _ in range(count):
+                    for url, page_type in urls:
+                        start = time.perf_counter()
+                        parse_listing(fetch(url, page_type), page_type)
+                        timings.append(time.perf_counter() - start)
+                return timings
+
+            def browser_fetch(page):
+                def fetch(url, page_type):
+                    page_readiness.goto_ready(page, url, page_type)
+                    return page.content()
+                return fetch
+
+            for name, mode in (("browser_networkidle", "networkidle"), ("browser_targeted", "targeted"),
+                               ("http", None)):
+                if mode:
+                    page_readiness.set_wait_mode(mode)
+                    page = session.context.new_page()
+                    fetch, cleanup = browser_fetch(page), page.close
+                else:
+                    fetcher = ListingFetcher.from_context(session.context)
+                    fetch, cleanup = fetcher.fetch, fetcher.close
+                try:
+                    # 先预热一轮（建立连接、加载页面模板），再计时
+                    run_rounds(fetch, 1)
+                    start = time.perf_counter()
+                    timings = sorted(run_rounds(fetch, rounds))
+                    seconds = time.perf_counter() - start
+                    browser_rss = process_tree_rss_mb()
+                    tracemalloc.start()
+                    try:
+                        run_rounds(fetch, 1)
+                        _, peak = tracemalloc.get_traced_memory()
+                    finally:
+                        tracemalloc.stop()
+                finally:
+                    cleanup()
+                    page_readiness.set_wait_mode(original_mode)
+                results[name] = {
+                    "pages": len(timings),
+                    "p50_ms": page_readiness.percentile(timings, 0.5) * 1000,
+                    "p95_ms": page_readiness.percentile(timings, 0.95) * 1000,
+                    "seconds": seconds,
+                    "python_peak_mb": peak / 1024 / 1024,
+                    "browser_rss_mb": browser_rss,
+                }
+
+    for name, result in results.items():
+        rss = result["browser_rss_mb"]
+        logger.info(f"列表获取 {name}: {result['pages']}个页面，p50={result['p50_ms']:.0f}ms，"
+                    f"p95={result['p95_ms']:.0f}ms，总计{result['seconds']:.2f}秒，"
+                    f"Python峰值{result['python_peak_mb']:.1f}MB"
+                    + (f"，浏览器进程树{rss:.0f}MB" if rss is not None else ""))
+    for name in ("browser_networkidle", "browser_targeted"):
+        if results["http"]["seconds"]:
+            logger.info(f"🚀 http相对{name}加速比: {results[name]['seconds'] / results['http']['seconds']:.2f}x")
+    return results
+
+
+def compare_page_pool(courses=20, latency=0.05, rounds=3, profile="fast", workdir=None):
+    """
+    在本地模拟站点上比较课程页面“每门课程新建并关闭页面”和页面池两种方式的页面创建次数和每门课程的页面管理开销
+
+    Args:
+        courses: 课程数（每轮依次打开每门课程的页面）
+        latency: 每个页面请求的注入延迟（秒）
+        rounds: 轮数
+        profile: 浏览器性能配置
+        workdir: 运行目录，默认使用临时目录
+
+    Returns:
+        dict: page_pool.benchmark_page_pool的结果
+    """
+    with fixture_environment(workdir, courses=courses, latency=latency) as server:
+        urls = [f"{server.base_url}/study/content/{course_id}_1_课程{course_id}.php"
+                for course_id in range(1, courses + 1)]
+        with BrowserSession.from_profile("benchmark", "benchmark", profile=profile) as session:
+            return benchmark_page_pool(session.context, urls, rounds=rounds)
+
+
+def test_parallel_stages(courses=6, items_per_chapter=20, latency=0.05, profile="fast", workdir=None):
+    """
+    并发测试：在本地模拟站点上先依次、再并行（各自的线程和浏览器会话）运行提取和爬取两个阶段，
+    检查并行时两个阶段的结果与依次运行完全一致、互不干扰
+
+    检查内容：提取到的每个章节的链接及完成状态、爬取阶段收集的课程记录，
+    以及每个阶段实例只持有自己的数据
+
+    Returns:
+        dict: 两种方式的耗时和测试是否通过
+    """
+    config = Config(USER_NAME="benchmark", PASSWORD="benchmark")
+
+    def snapshot(results):
+        extractor, scraper = (results[stage.key] for stage in STAGES)
+        links = {url: sorted((link.index, link.href, link.completed) for link in completed + incomplete)
+                 for url, (completed, incomplete) in extractor.chapter_links.items()}
+        records = sorted((record.course_name, record.course_id, record.status) for record in scraper.course_data)
+        return links, records
+
+    outcomes = {}
+    with fixture_environment(workdir, courses=courses, items_per_chapter=items_per_chapter,
+                             latency=latency) as server:
+        with BrowserSession.from_profile("benchmark", "benchmark", profile=profile) as session:
+            storage_state = session.context.storage_state()
+        for mode, parallel in (("sequential", False), ("parallel", True)):
+            start = time.perf_counter()
+            results = run_stages(config, storage_state, profile=profile, parallel=parallel)
+            outcomes[mode] = {"seconds": time.perf_counter() - start, "snapshot": snapshot(results)}
+
+    sequential_links, sequential_records = outcomes["sequential"]["snapshot"]
+    parallel_links, parallel_records = outcomes["parallel"]["snapshot"]
+    checks = {
+        "链接一致": parallel_links == sequential_links,
+        "课程记录一致": parallel_records == sequential_records,
+        "章节完整": len(parallel_links) == len(course_content_extractor.PRACTICE_CHAPTERS),
+        "课程完整": len(parallel_records) == courses,
+    }
+    for name, passed in checks.items():
+        logger.info(f"{'✓' if passed else '✗'} {name}")
+    passed = all(checks.values())
+    seconds = {mode: outcome["seconds"] for mode, outcome in outcomes.items()}
+    logger.info(f"依次运行{seconds['sequential']:.2f}秒，并行运行{seconds['parallel']:.2f}秒")
+    if passed:
+        logger.info("🎉 测试通过! 两个阶段并行运行时互不干扰")
+    else:
+        logger.error("❌ 测试失败! 并行运行的结果与依次运行不一致")
+    return {"passed": passed, "checks": checks, "seconds": seconds}
+
+
+def log_results(results):
+    """输出基准测试结果"""
+    logger.info("===== 端到端基准测试结果 =====")
+    logger.info(f"规模: {results['courses']}门课程，每章节{results['items_per_chapter']}项，"
+                f"注入延迟{results['latency'] * 1000:.0f}ms，性能配置{results['profile']}")
+    logger.info(f"启动和登录: {results['setup_seconds']:.2f}秒")
+    for name, stage in results["stages"].items():
+        logger.info(f"阶段 {name}: {stage['seconds']:.2f}秒，{stage['pages']}个页面，"
+                    f"{stage['pages_per_second']:.1f}页/秒")
+    logger.info(f"总计: {results['total_seconds']:.2f}秒，{results['pages']}个页面，"
+                f"{results['pages_per_second']:.1f}页/秒")
+    logger.info(f"导航耗时: p50={results['navigation_p50'] * 1000:.0f}ms，"
+                f"p95={results['navigation_p95'] * 1000:.0f}ms（{results['navigations']}次）")
+    logger.info(f"各阶段耗时:\n{instrumentation.format_phase_table(results['phases'], results['total_seconds'])}")
+    snapshots = results["snapshots"]
+    logger.info(f"页面HTML快照: 序列化{snapshots['serializations']}次（{snapshots['bytes'] / 1024:.0f}KB），"
+                f"复用{snapshots['hits']}次")
+    rss = results["peak_rss_mb"]
+    if rss["self"] is not None:
+        logger.info(f"峰值内存: Python进程{rss['self']:.0f}MB，浏览器子进程{rss['children']:.0f}MB")
+
+
+if __name__ == "__main__":
+    setup_logging()
+    parser = argparse.ArgumentParser(description="在本地模拟站点上运行端到端基准测试")
+    parser.add_argument("--courses", type=int, default=10, help="my_plan.php中的未学习课程数")
+    parser.add_argument("--items", type=int, default=30, help="每个练习章节的列表项数")
+    parser.add_argument("--latency", type=float, default=0.05, help="每个页面请求的注入延迟（秒）")
+    parser.add_argument("--profile", default="fast", help="浏览器性能配置（debug/fast）")
+    parser.add_argument("--output", help="把结果保存为JSON文件")
+    parser.add_argument("--compare-engines", action="store_true",
+                        help="只运行课程内容提取阶段，比较同步引擎和异步引擎")
+    parser.add_argument("--concurrency", type=int, help="异步引擎的并发章节数")
+    parser.add_argument("--compare-pipeline", action="store_true",
+                        help="只运行章节列表的提取和保存，比较预取流水线和顺序处理")
+    parser.add_argument("--chapters", type=int, default=12, help="--compare-pipeline使用的练习章节数")
+    parser.add_argument("--test-parallel", action="store_true",
+                        help="并发测试：检查提取和爬取两个阶段并行运行时互不干扰")
+    parser.add_argument("--compare-listing", action="store_true",
+                        help="比较列表页面的浏览器导航和HTTP直接获取的耗时和内存")
+    parser.add_argument("--rounds", type=int, default=5, help="--compare-listing/--compare-page-pool的轮数")
+    parser.add_argument("--compare-page-pool", action="store_true",
+                        help="比较课程页面每次新建页面和页面池复用的创建次数和开销")
+    args = parser.parse_args()
+
+    if args.compare_page_pool:
+        benchmark_results = compare_page_pool(courses=args.courses, latency=args.latency,
+                                              rounds=args.rounds, profile=args.profile)
+    elif args.compare_listing:
+        benchmark_results = compare_listing_backends(rounds=args.rounds, courses=args.courses,
+                                                     items_per_chapter=args.items, latency=args.latency,
+                                                     profile=args.profile)
+    elif args.test_parallel:
+        benchmark_results = test_parallel_stages(courses=args.courses, items_per_chapter=args.items,
+                                                 latency=args.latency, profile=args.profile)
+    elif args.compare_pipeline:
+        benchmark_results = compare_pipeline(chapters=args.chapters, items_per_chapter=args.items,
+                                             latency=args.latency, profile=args.profile)
+    elif args.compare_engines:
+        benchmark_results = compare_extract_engines(items_per_chapter=args.items, latency=args.latency,
+                                                    concurrency=args.concurrency, profile=args.profile)
+    else:
+        benchmark_results = run_benchmark(courses=args.courses, items_per_chapter=args.items,
+                                          latency=args.latency, profile=args.profile)
+        log_results(benchmark_results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(benchmark_results, f, ensure_ascii=False, indent=2)
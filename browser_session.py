@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+浏览器会话管理模块
+启动一次Chromium并登录一次，把已登录的BrowserContext交给各个流程阶段复用
+"""
+
+import os
+import json
+import time
+import logging
+from playwright.sync_api import sync_playwright
+from course_page_parser import site_url
+from instrumentation import span
+from page_snapshot import page_html, page_html_async, invalidate
+
+logger = logging.getLogger(__name__)
+
+# 登录页面（相对站点根目录）
+LOGIN_PATH = "user/index.php"
+
+# 已登录状态（storage_state）缓存文件，包含登录Cookie，仅当前用户可读写
+STORAGE_STATE_FILE = "output/storage_state.json"
+
+# 校验缓存的登录状态是否仍然有效时请求的页面，已登录时页面中包含my_info.php链接
+SESSION_CHECK_PATH = LOGIN_PATH
+
+# 浏览器启动参数
+DEFAULT_LAUNCH_ARGS = ["--start-maximized", "--disable-gpu", "--no-sandbox",
+                       "--disable-dev-shm-usage", "--disable-extensions"]
+
+# 性能配置：debug显示浏览器窗口并放慢操作便于观察，fast无界面运行并拦截无用资源
+# 样式表不能拦截：绿色链接识别依赖计算样式；图片被拦截后img的src属性仍在，
+# content1.png等基于属性的选择器不受影响
+PERFORMANCE_PROFILES = {
+    "debug": {"headless": False, "slow_mo": 100, "block_resources": ()},
+    "fast": {"headless": True, "slow_mo": 0, "block_resources": ("image", "media", "font")},
+}
+
+
+def profile_settings(profile):
+    """
+    取得性能配置
+
+    Args:
+        profile: PERFORMANCE_PROFILES中的配置名称，未知名称按debug处理
+
+    Returns:
+        tuple: (实际使用的配置名称, 配置字典的副本)
+    """
+    if profile not in PERFORMANCE_PROFILES:
+        logger.warning(f"未知的性能配置 {profile}，使用debug配置")
+        profile = "debug"
+    return profile, dict(PERFORMANCE_PROFILES[profile])
+
+
+def login_to_system(page, user_name, password):
+    """
+    在已打开的页面上执行登录操作
+
+    Args:
+        page: Playwright页面对象
+        user_name: 用户名
+        password: 密码
+
+    Returns:
+        bool: 登录是否成功
+    """
+    try:
+        logger.info("开始登录流程...")
+
+        # 访问登录页面
+        login_url = site_url(LOGIN_PATH)
+        page.goto(login_url, wait_until="domcontentloaded")
+        logger.info(f"✓ 已访问登录页面: {login_url}")
+
+        # 等待页面元素加载完成
+        page.wait_for_selector("#username", state="visible", timeout=15000)
+
+        # 填写用户名和密码
+        page.fill("#username", user_name)
+        page.fill("#password", password)
+        logger.info("✓ 已输入用户名和密码")
+
+        # 尝试点击提交按钮
+        submit_button = page.locator("input[type='submit']").first
+        try:
+            submit_button.scroll_into_view_if_needed()
+            submit_button.click(force=True)  # 使用force参数确保点击成功
+            logger.info("✓ 已点击登录按钮")
+        except Exception as e:
+            logger.warning(f"直接点击登录按钮失败，尝试通过坐标点击: {e}")
+            # 备选方案：通过坐标点击
+            button_bounding_box = submit_button.bounding_box()
+            if button_bounding_box:
+                x = button_bounding_box['x'] + button_bounding_box['width'] / 2
+                y = button_bounding_box['y'] + button_bounding_box['height'] / 2
+                page.mouse.click(x, y)
+                logger.info("✓ 已通过坐标点击登录按钮")
+
+        # 等待页面跳转和加载完成
+        page.wait_for_url("**", timeout=20000)
+        page.wait_for_load_state("networkidle", timeout=20000)
+
+        # 登录表单可能通过AJAX提交而不发生导航，作废提交前的快照后再验证登录状态
+        invalidate(page)
+        page_content = page_html(page)
+        if "my_info.php" in page_content or "登录成功" in page_content or "用户中心" in page_content:
+            logger.info("✓ 登录成功")
+            return True
+        logger.error("✗ 登录失败：页面中未找到登录成功的标识")
+        return False
+
+    except Exception as e:
+        logger.error(f"✗ 登录过程中发生错误: {e}")
+        return False
+
+
+async def login_to_system_async(page, user_name, password):
+    """
+    login_to_system的异步版本，page为playwright.async_api的页面对象
+
+    Returns:
+        bool: 登录是否成功
+    """
+    try:
+        logger.info("开始登录流程（异步）...")
+        await page.goto(site_url(LOGIN_PATH), wait_until="domcontentloaded")
+        await page.wait_for_selector("#username", state="visible", timeout=15000)
+        await page.fill("#username", user_name)
+        await page.fill("#password", password)
+        async with page.expect_navigation(wait_until="domcontentloaded", timeout=20000):
+            await page.locator("input[type='submit']").first.click(force=True)
+
+        invalidate(page)
+        page_content = await page_html_async(page)
+        if "my_info.php" in page_content or "登录成功" in page_content or "用户中心" in page_content:
+            logger.info("✓ 登录成功")
+            return True
+        logger.error("✗ 登录失败：页面中未找到登录成功的标识")
+        return False
+
+    except Exception as e:
+        logger.error(f"✗ 登录过程中发生错误: {e}")
+        return False
+
+
+async def new_context_async(browser, block_resources=(), storage_state=None):
+    """
+    在playwright.async_api的浏览器中创建上下文，与BrowserSession的上下文设置相同：
+    不固定窗口大小、中文语言，并拦截性能配置中的资源类型
+
+    Args:
+        browser: 异步API的Browser
+        block_resources: 需要拦截的资源类型（PERFORMANCE_PROFILES中的block_resources）
+        storage_state: 已登录上下文的storage_state（字典或文件路径）
+
+    Returns:
+        BrowserContext: 新的上下文
+    """
+    context = await browser.new_context(viewport=None, locale="zh-CN", storage_state=storage_state)
+    block_resources = frozenset(block_resources)
+    if block_resources:
+        async def route_request(route):
+            if route.request.resource_type in block_resources:
+                await route.abort()
+            else:
+                await route.continue_()
+
+        await context.route("**/*", route_request)
+    return context
+
+
+class BrowserSession:
+    """持有Playwright、浏览器和已登录的上下文，供多个流程阶段共享"""
+
+    def __init__(self, user_name, password, headless=False, launch_args=None, slow_mo=0,
+                 storage_state_file=None, block_resources=(), profile=None, storage_state=None):
+        self.user_name = user_name
+        self.password = password
+        self.headless = headless
+        self.launch_args = DEFAULT_LAUNCH_ARGS if launch_args is None else launch_args
+        self.slow_mo = slow_mo
+        # 需要拦截的资源类型（Playwright的request.resource_type）
+        self.block_resources = frozenset(block_resources)
+        self.profile = profile
+        # 每次页面加载耗时 [(url, 秒)]
+        self.page_load_times = []
+        self._navigation_starts = {}
+        # 提供文件路径时启用登录状态缓存
+        self.storage_state_file = storage_state_file
+        # 其他会话导出的storage_state（字典），提供时优先用它恢复登录状态（例如各阶段线程各自启动浏览器时）
+        self.storage_state = storage_state
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        # 启动浏览器和登录各自耗费的时间（秒）
+        self.startup_seconds = 0.0
+        self.login_seconds = 0.0
+        # 本次是否复用了缓存的登录状态（热启动）
+        self.reused_state = False
+
+    @classmethod
+    def from_profile(cls, user_name, password, profile="debug", **kwargs):
+        """
+        按性能配置创建会话
+
+        Args:
+            user_name: 用户名
+            password: 密码
+            profile: PERFORMANCE_PROFILES中的配置名称，未知名称按debug处理
+            **kwargs: 其余BrowserSession参数
+
+        Returns:
+            BrowserSession: 未启动的会话
+        """
+        profile, settings = profile_settings(profile)
+        settings.update(kwargs)
+        return cls(user_name, password, profile=profile, **settings)
+
+    def start(self):
+        """
+        启动浏览器、创建上下文并登录
+
+        Returns:
+            BrowserSession: 自身，便于链式调用
+
+        Raises:
+            RuntimeError: 登录失败
+        """
+        start = time.perf_counter()
+        self.playwright = sync_playwright().start()
+        self.browser = self.playwright.chromium.launch(
+            headless=self.headless,
+            args=self.launch_args,
+            slow_mo=self.slow_mo
+        )
+        self.startup_seconds = time.perf_counter() - start
+        logger.info(f"✓ 浏览器已启动（{self.startup_seconds:.2f}秒）")
+
+        start = time.perf_counter()
+        with span("login") as tags:
+            self.reused_state = self._restore_state()
+            tags["reused_state"] = self.reused_state
+            if not self.reused_state:
+                self.context = self.browser.new_context(viewport=None, locale="zh-CN")
+                self._setup_context()
+                page = self.context.new_page()
+                try:
+                    logged_in = login_to_system(page, self.user_name, self.password)
+                finally:
+                    page.close()
+                if not logged_in:
+                    raise RuntimeError("登录失败，无法继续执行")
+                self._save_state()
+        self.login_seconds = time.perf_counter() - start
+        mode = "热启动，复用登录状态" if self.reused_state else "冷启动，完整登录"
+        logger.info(f"✓ 登录完成（{mode}，{self.login_seconds:.2f}秒）")
+        return self
+
+    def _restore_state(self):
+        """
+        用缓存的storage_state创建上下文，并用一次轻量请求校验登录状态
+
+        Returns:
+            bool: 缓存的登录状态是否可用；不可用时不保留上下文
+        """
+        state = self.storage_state
+        if state is None:
+            if not self.storage_state_file or not os.path.exists(self.storage_state_file):
+                return False
+            state = self.storage_state_file
+        try:
+            self.context = self.browser.new_context(viewport=None, locale="zh-CN", storage_state=state)
+            response = self.context.request.get(site_url(SESSION_CHECK_PATH), timeout=10000)
+            if response.ok and "my_info.php" in response.text():
+                self._setup_context()
+                return True
+            logger.info("缓存的登录状态已失效，重新登录")
+        except Exception as e:
+            logger.warning(f"校验缓存的登录状态失败，重新登录: {e}")
+        if self.context:
+            self.context.close()
+            self.context = None
+        return False
+
+    def _setup_context(self):
+        """为上下文注册资源拦截规则和页面加载计时"""
+        if self.block_resources:
+            self.context.route("**/*", self._route_request)
+        self.context.on("page", self._track_page_loads)
+
+    def _route_request(self, route):
+        """拦截不需要的资源类型，其余请求照常发出"""
+        if route.request.resource_type in self.block_resources:
+            route.abort()
+        else:
+            route.continue_()
+
+    def _track_page_loads(self, page):
+        """记录页面主文档导航请求发出到load事件之间的耗时"""
+        def on_request(request):
+            if request.is_navigation_request() and request.frame == page.main_frame:
+                self._navigation_starts[page] = (request.url, time.perf_counter())
+
+        def on_load(_):
+            started = self._navigation_starts.pop(page, None)
+            if started:
+                url, start = started
+                self.page_load_times.append((url, time.perf_counter() - start))
+
+        page.on("request", on_request)
+        page.on("load", on_load)
+
+    def load_time_summary(self):
+        """
+        汇总页面加载耗时
+
+        Returns:
+            dict: 页面数、平均值、中位数和最大值（秒），没有记录时为None
+        """
+        if not self.page_load_times:
+            return None
+        seconds = sorted(elapsed for _, elapsed in self.page_load_times)
+        return {
+            "pages": len(seconds),
+            "mean": sum(seconds) / len(seconds),
+            "p50": seconds[len(seconds) // 2],
+            "max": seconds[-1]
+        }
+
+    def _save_state(self):
+        """把当前上下文的storage_state写入缓存文件（权限0600）"""
+        if not self.storage_state_file:
+            return
+        try:
+            directory = os.path.dirname(self.storage_state_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            state = self.context.storage_state()
+            fd = os.open(self.storage_state_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            # 文件已存在时os.open不会修改权限
+            os.chmod(self.storage_state_file, 0o600)
+            logger.info(f"✓ 登录状态已缓存到 {self.storage_state_file}")
+        except Exception as e:
+            logger.warning(f"缓存登录状态失败: {e}")
+
+    @property
+    def setup_seconds(self):
+        """启动和登录的总开销"""
+        return self.startup_seconds + self.login_seconds
+
+    def new_page(self):
+        """在已登录的上下文中创建新页面"""
+        return self.context.new_page()
+
+    def close(self):
+        """关闭上下文、浏览器和Playwright（已关闭时直接返回）"""
+        if self.playwright is None and self.browser is None and self.context is None:
+            return
+        summary = self.load_time_summary()
+        if summary:
+            logger.info(f"页面加载耗时（{self.profile or '自定义'}配置）: {summary['pages']}个页面，"
+                        f"平均{summary['mean']:.2f}秒，中位数{summary['p50']:.2f}秒，最长{summary['max']:.2f}秒")
+        for resource in (self.context, self.browser):
+            try:
+                if resource:
+                    resource.close()
+            except Exception as e:
+                logger.warning(f"关闭浏览器资源时出错: {e}")
+        try:
+            if self.playwright:
+                self.playwright.stop()
+        except Exception as e:
+            logger.warning(f"停止Playwright时出错: {e}")
+        self.context = self.browser = self.playwright = None
+
+    def __enter__(self):
+        try:
+            return self.start()
+        except Exception:
+            self.close()
+            raise
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def benchmark_session_cache(user_name, password, storage_state_file=STORAGE_STATE_FILE):
+    """
+    分别测量冷启动（删除缓存后完整登录）和热启动（复用缓存的登录状态）的登录耗时
+
+    Args:
+        user_name: 用户名
+        password: 密码
+        storage_state_file: 登录状态缓存文件
+
+    Returns:
+        dict: 冷启动和热启动的浏览器启动耗时与登录耗时
+    """
+    if os.path.exists(storage_state_file):
+        os.remove(storage_state_file)
+
+    results = {}
+    for mode in ("cold", "warm"):
+        with BrowserSession(user_name, password, headless=True, storage_state_file=storage_state_file) as session:
+            results[mode] = {
+                "startup_seconds": session.startup_seconds,
+                "login_seconds": session.login_seconds,
+                "reused_state": session.reused_state
+            }
+        logger.info(f"{mode}: 启动{results[mode]['startup_seconds']:.2f}秒，"
+                    f"登录{results[mode]['login_seconds']:.2f}秒，复用登录状态={results[mode]['reused_state']}")
+    return results
+
+
+def benchmark_profiles(user_name, password, urls, profiles=("debug", "fast")):
+    """
+    在每种性能配置下依次加载给定页面，比较每个页面的加载耗时
+
+    Args:
+        user_name: 用户名
+        password: 密码
+        urls: 要加载的页面URL列表
+        profiles: 要比较的性能配置名称
+
+    Returns:
+        dict: 每种配置下 {url: 秒} 以及汇总信息
+    """
+    results = {}
+    for profile in profiles:
+        with BrowserSession.from_profile(user_name, password, profile=profile) as session:
+            session.page_load_times.clear()
+            page = session.new_page()
+            try:
+                for url in urls:
+                    page.goto(url, wait_until="load")
+            finally:
+                page.close()
+            results[profile] = {
+                "pages": dict(session.page_load_times),
+                "summary": session.load_time_summary()
+            }
+        for url, elapsed in results[profile]["pages"].items():
+            logger.info(f"[{profile}] {elapsed:.2f}秒  {url}")
+    return results
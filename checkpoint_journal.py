@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+课程学习检查点日志模块
+学习开始前写入本次的课程列表，每学完（或放弃）一门课程立即追加一条检查点（序号、网址、结果）并fsync，
+中断后用--resume从最后的检查点继续，不再重新加载学习计划页面和已完成的课程
+"""
+
+import os
+import json
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 检查点日志文件（JSON Lines）
+CHECKPOINT_FILE = "output/scrape_checkpoint.jsonl"
+
+# 恢复时跳过的课程结果，其余结果（failed、submission_failed）在恢复时重新学习
+DONE_OUTCOMES = ("completed",)
+
+
+class CheckpointJournal:
+    """
+    只追加的检查点日志
+
+    文件中的每行是一个事件：
+        {"event": "plan", "courses": [...]}              本次要学习的课程列表
+        {"event": "course", "index": 1, "url": ..., ...}  一门课程的结果
+        {"event": "finished"}                            全部课程处理完毕
+    """
+
+    def __init__(self, journal_file=CHECKPOINT_FILE):
+        self.journal_file = journal_file
+        self._file = None
+        directory = os.path.dirname(journal_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _append(self, event):
+        self._file.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def start(self, courses):
+        """
+        开始新的一次学习：清空旧的日志并写入课程列表
+
+        Args:
+            courses: 课程列表（课程名称、跳转网址、课程状态组成的字典）
+        """
+        self.close()
+        self._file = open(self.journal_file, 'w', encoding='utf-8')
+        self._append({"event": "plan", "time": time.time(), "courses": courses})
+
+    def resume(self):
+        """
+        继续上次未完成的学习，之后的检查点追加到原日志末尾
+
+        Returns:
+            ResumeState: 上次的课程列表和各课程的检查点，日志不存在、
+                         没有课程列表或上次已全部处理完毕时返回None
+        """
+        state = load_checkpoint(self.journal_file)
+        if state is None or state.finished:
+            return None
+        self.close()
+        _truncate_partial_line(self.journal_file)
+        self._file = open(self.journal_file, 'a', encoding='utf-8')
+        return state
+
+    def record(self, index, url, course_name, outcome):
+        """
+        追加一门课程的检查点并立即落盘
+
+        Args:
+            index: 课程在课程列表中的序号（从1开始）
+            url: 课程网址
+            course_name: 课程名称
+            outcome: 学习结果（completed、submission_failed、failed）
+        """
+        self._append({"event": "course", "index": index, "url": url, "course_name": course_name,
+                      "outcome": outcome, "time": time.time()})
+
+    def finish(self):
+        """标记全部课程已处理完毕，下次--resume时从头开始"""
+        self._append({"event": "finished", "time": time.time()})
+
+    def close(self):
+        if self._file and not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ResumeState:
+    """从检查点日志恢复的状态"""
+
+    def __init__(self, courses, checkpoints, finished):
+        self.courses = courses
+        # {序号: 该课程最后一次的检查点}
+        self.checkpoints = checkpoints
+        self.finished = finished
+
+    def done_indexes(self):
+        """恢复时跳过的课程序号"""
+        return {index for index, checkpoint in self.checkpoints.items()
+                if checkpoint["outcome"] in DONE_OUTCOMES}
+
+    @property
+    def last_index(self):
+        """最后一个检查点的课程序号，还没有检查点时为0"""
+        return max(self.checkpoints, default=0)
+
+
+def _truncate_partial_line(journal_file):
+    """截掉中断时写到一半的末行，避免后续追加的检查点与它连成一行"""
+    with open(journal_file, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def load_checkpoint(journal_file=CHECKPOINT_FILE):
+    """
+    读取检查点日志，跳过写到一半的末行
+
+    Args:
+        journal_file: 检查点日志文件
+
+    Returns:
+        ResumeState: 日志中的课程列表和检查点，日志不存在或没有课程列表时返回None
+    """
+    if not os.path.exists(journal_file):
+        return None
+    courses = None
+    checkpoints = {}
+    finished = False
+    with open(journal_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"跳过无法解析的检查点行: {line[:80]}")
+                continue
+            kind = event.get("event")
+            if kind == "plan":
+                courses = event["courses"]
+                checkpoints = {}
+                finished = False
+            elif kind == "course":
+                checkpoints[event["index"]] = event
+            elif kind == "finished":
+                finished = True
+    if courses is None:
+        return None
+    return ResumeState(courses, checkpoints, finished)
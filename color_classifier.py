@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CSS颜色解析与绿色判断模块
+把十六进制、rgb()/rgba()和命名颜色解析为RGB，按色相和饱和度判断是否为绿色，
+批量判断时一次把所有计算样式颜色转为数组用NumPy向量化计算（未安装NumPy时逐个计算）
+"""
+
+import re
+import time
+import random
+import logging
+from functools import lru_cache
+from log_setup import setup_logging
+
+try:
+    import numpy as np
+except ImportError:  # NumPy是可选依赖，没有时使用纯Python实现
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# 绿色的判断条件：HSV色相（度）在该范围内，且饱和度、明度和不透明度不低于下限
+# （排除接近白色/灰色/黑色和透明的颜色，以及偏黄的橄榄色、偏蓝的青色）
+GREEN_HUE_RANGE = (75.0, 165.0)
+MIN_SATURATION = 0.2
+MIN_VALUE = 0.2
+MIN_ALPHA = 0.1
+
+# CSS命名颜色（CSS Color Module Level 4）
+NAMED_COLORS = {
+    "aliceblue": "#f0f8ff", "antiquewhite": "#faebd7", "aqua": "#00ffff", "aquamarine": "#7fffd4",
+    "azure": "#f0ffff", "beige": "#f5f5dc", "bisque": "#ffe4c4", "black": "#000000",
+    "blanchedalmond": "#ffebcd", "blue": "#0000ff", "blueviolet": "#8a2be2", "brown": "#a52a2a",
+    "burlywood": "#deb887", "cadetblue": "#5f9ea0", "chartreuse": "#7fff00", "chocolate": "#d2691e",
+    "coral": "#ff7f50", "cornflowerblue": "#6495ed", "cornsilk": "#fff8dc", "crimson": "#dc143c",
+    "cyan": "#00ffff", "darkblue": "#00008b", "darkcyan": "#008b8b", "darkgoldenrod": "#b8860b",
+    "darkgray": "#a9a9a9", "darkgreen": "#006400", "darkgrey": "#a9a9a9", "darkkhaki": "#bdb76b",
+    "darkmagenta": "#8b008b", "darkolivegreen": "#556b2f", "darkorange": "#ff8c00", "darkorchid": "#9932cc",
+    "darkred": "#8b0000", "darksalmon": "#e9967a", "darkseagreen": "#8fbc8f", "darkslateblue": "#483d8b",
+    "darkslategray": "#2f4f4f", "darkslategrey": "#2f4f4f", "darkturquoise": "#00ced1", "darkviolet": "#9400d3",
+    "deeppink": "#ff1493", "deepskyblue": "#00bfff", "dimgray": "#696969", "dimgrey": "#696969",
+    "dodgerblue": "#1e90ff", "firebrick": "#b22222", "floralwhite": "#fffaf0", "forestgreen": "#228b22",
+    "fuchsia": "#ff00ff", "gainsboro": "#dcdcdc", "ghostwhite": "#f8f8ff", "gold": "#ffd700",
+    "goldenrod": "#daa520", "gray": "#808080", "green": "#008000", "greenyellow": "#adff2f",
+    "grey": "#808080", "honeydew": "#f0fff0", "hotpink": "#ff69b4", "indianred": "#cd5c5c",
+    "indigo": "#4b0082", "ivory": "#fffff0", "khaki": "#f0e68c", "lavender": "#e6e6fa",
+    "lavenderblush": "#fff0f5", "lawngreen": "#7cfc00", "lemonchiffon": "#fffacd", "lightblue": "#add8e6",
+    "lightcoral": "#f08080", "lightcyan": "#e0ffff", "lightgoldenrodyellow": "#fafad2", "lightgray": "#d3d3d3",
+    "lightgreen": "#90ee90", "lightgrey": "#d3d3d3", "lightpink": "#ffb6c1", "lightsalmon": "#ffa07a",
+    "lightseagreen": "#20b2aa", "lightskyblue": "#87cefa", "lightslategray": "#778899", "lightslategrey": "#778899",
+    "lightsteelblue": "#b0c4de", "lightyellow": "#ffffe0", "lime": "#00ff00", "limegreen": "#32cd32",
+    "linen": "#faf0e6", "magenta": "#ff00ff", "maroon": "#800000", "mediumaquamarine": "#66cdaa",
+    "mediumblue": "#0000cd", "mediumorchid": "#ba55d3", "mediumpurple": "#9370db", "mediumseagreen": "#3cb371",
+    "mediumslateblue": "#7b68ee", "mediumspringgreen": "#00fa9a", "mediumturquoise": "#48d1cc",
+    "mediumvioletred": "#c71585", "midnightblue": "#191970", "mintcream": "#f5fffa", "mistyrose": "#ffe4e1",
+    "moccasin": "#ffe4b5", "navajowhite": "#ffdead", "navy": "#000080", "oldlace": "#fdf5e6",
+    "olive": "#808000", "olivedrab": "#6b8e23", "orange": "#ffa500", "orangered": "#ff4500",
+    "orchid": "#da70d6", "palegoldenrod": "#eee8aa", "palegreen": "#98fb98", "paleturquoise": "#afeeee",
+    "palevioletred": "#db7093", "papayawhip": "#ffefd5", "peachpuff": "#ffdab9", "peru": "#cd853f",
+    "pink": "#ffc0cb", "plum": "#dda0dd", "powderblue": "#b0e0e6", "purple": "#800080",
+    "rebeccapurple": "#663399", "red": "#ff0000", "rosybrown": "#bc8f8f", "royalblue": "#4169e1",
+    "saddlebrown": "#8b4513", "salmon": "#fa8072", "sandybrown": "#f4a460", "seagreen": "#2e8b57",
+    "seashell": "#fff5ee", "sienna": "#a0522d", "silver": "#c0c0c0", "skyblue": "#87ceeb",
+    "slateblue": "#6a5acd", "slategray": "#708090", "slategrey": "#708090", "snow": "#fffafa",
+    "springgreen": "#00ff7f", "steelblue": "#4682b4", "tan": "#d2b48c", "teal": "#008080",
+    "thistle": "#d8bfd8", "tomato": "#ff6347", "turquoise": "#40e0d0", "violet": "#ee82ee",
+    "wheat": "#f5deb3", "white": "#ffffff", "whitesmoke": "#f5f5f5", "yellow": "#ffff00",
+    "yellowgreen": "#9acd32",
+}
+
+# rgb()/rgba()：逗号或空格分隔，分量可以是数字或百分比，透明度可以用斜杠分隔
+RGB_PATTERN = re.compile(
+    r"rgba?\(\s*([\d.]+%?)\s*[,\s]\s*([\d.]+%?)\s*[,\s]\s*([\d.]+%?)\s*(?:[,/]\s*([\d.]+%?)\s*)?\)"
+)
+HEX_PATTERN = re.compile(r"#([0-9a-f]{3,4}|[0-9a-f]{6}|[0-9a-f]{8})")
+
+# 批量解析时按行匹配getComputedStyle的输出格式，不匹配的行四个分组都为空
+COMPUTED_COLORS_PATTERN = re.compile(
+    r"^rgba?\((\d+(?:\.\d+)?), (\d+(?:\.\d+)?), (\d+(?:\.\d+)?)(?:, (\d*\.?\d+))?\)$|^.*$", re.M
+)
+
+# 内联style中的颜色声明（color、background-color、background）
+STYLE_COLOR_PATTERN = re.compile(r"(?:^|;)\s*(?:color|background(?:-color)?)\s*:\s*([^;]+)")
+
+
+def _channel(value):
+    """rgb()中的一个分量（0-255的数字或百分比）"""
+    if value.endswith("%"):
+        return min(255.0, float(value[:-1]) * 2.55)
+    return min(255.0, float(value))
+
+
+def _alpha(value):
+    if value is None:
+        return 1.0
+    if value.endswith("%"):
+        return min(1.0, float(value[:-1]) / 100)
+    return min(1.0, float(value))
+
+
+@lru_cache(maxsize=4096)
+def parse_color(value):
+    """
+    把CSS颜色解析为RGBA（计算样式中的颜色重复度很高，解析结果按字符串缓存）
+
+    Args:
+        value: CSS颜色，如"#32cd32"、"#0f0"、"rgb(0, 128, 0)"、"rgba(0 128 0 / 50%)"、"green"、"transparent"
+
+    Returns:
+        tuple: (r, g, b, a)，r/g/b为0-255的浮点数，a为0-1；无法解析时返回None
+    """
+    if not value:
+        return None
+    text = value.strip().lower()
+    match = RGB_PATTERN.fullmatch(text)
+    if match:
+        red, green, blue, alpha = match.groups()
+        return _channel(red), _channel(green), _channel(blue), _alpha(alpha)
+    if text == "transparent":
+        return 0.0, 0.0, 0.0, 0.0
+    text = NAMED_COLORS.get(text, text)
+    match = HEX_PATTERN.fullmatch(text)
+    if match:
+        digits = match.group(1)
+        if len(digits) <= 4:
+            digits = "".join(digit * 2 for digit in digits)
+        channels = [int(digits[i:i + 2], 16) for i in range(0, len(digits), 2)]
+        alpha = channels[3] / 255 if len(channels) == 4 else 1.0
+        return float(channels[0]), float(channels[1]), float(channels[2]), alpha
+    return None
+
+
+def is_green_rgba(rgba):
+    """
+    按HSV色相、饱和度、明度和不透明度判断一个RGBA颜色是否为绿色（纯Python）
+
+    Args:
+        rgba: parse_color返回的(r, g, b, a)，为None时返回False
+
+    Returns:
+        bool: 是否为绿色
+    """
+    if rgba is None:
+        return False
+    red, green, blue, alpha = rgba
+    high = max(red, green, blue)
+    if alpha < MIN_ALPHA or high < MIN_VALUE * 255:
+        return False
+    delta = high - min(red, green, blue)
+    if delta < MIN_SATURATION * high:
+        return False
+    # 饱和度达到下限时delta>0，色相有定义
+    if high == red:
+        hue = 60.0 * (((green - blue) / delta) % 6)
+    elif high == green:
+        hue = 60.0 * ((blue - red) / delta + 2)
+    else:
+        hue = 60.0 * ((red - green) / delta + 4)
+    return GREEN_HUE_RANGE[0] <= hue <= GREEN_HUE_RANGE[1]
+
+
+def is_green_color(value):
+    """判断一个CSS颜色字符串是否为绿色"""
+    return is_green_rgba(parse_color(value))
+
+
+def _parse_batch(colors):
+    """
+    把一批颜色解析为N×4的RGBA数组：getComputedStyle输出的"rgb(r, g, b)"/"rgba(r, g, b, a)"
+    用一次多行正则匹配取出，其他写法逐个交给parse_color
+
+    Returns:
+        tuple: (RGBA数组, 是否能解析的bool数组)
+    """
+    text = "\n".join(colors)
+    if text.count("\n") != len(colors) - 1:
+        # 颜色字符串中带换行时按行匹配会错位
+        rows = [("", "", "", "")] * len(colors)
+    else:
+        rows = COMPUTED_COLORS_PATTERN.findall(text)
+    valid = np.ones(len(colors), dtype=bool)
+
+    def channels():
+        for i, row in enumerate(rows):
+            if row[0]:
+                yield float(row[0])
+                yield float(row[1])
+                yield float(row[2])
+                yield float(row[3]) if row[3] else 1.0
+                continue
+            rgba = parse_color(colors[i])
+            if rgba is None:
+                valid[i] = False
+                rgba = (0.0, 0.0, 0.0, 0.0)
+            yield from rgba
+
+    rgba = np.fromiter(channels(), dtype=np.float64, count=4 * len(colors)).reshape(-1, 4)
+    return rgba, valid
+
+
+def _classify_numpy(colors):
+    """去重后一次解析所有不同的颜色，用NumPy同时计算色相和饱和度"""
+    positions = {}
+    codes = np.fromiter((positions.setdefault(color or "", len(positions)) for color in colors),
+                        dtype=np.intp, count=len(colors))
+    rgba, valid = _parse_batch(list(positions))
+    red, green, blue, alpha = rgba.T
+    high = rgba[:, :3].max(axis=1)
+    delta = high - rgba[:, :3].min(axis=1)
+    safe_delta = np.where(delta > 0, delta, 1.0)
+    hue = np.where(
+        high == red, ((green - blue) / safe_delta) % 6,
+        np.where(high == green, (blue - red) / safe_delta + 2, (red - green) / safe_delta + 4),
+    ) * 60.0
+    green_mask = (
+        valid
+        & (alpha >= MIN_ALPHA)
+        & (high >= MIN_VALUE * 255)
+        & (delta > 0)
+        & (delta >= MIN_SATURATION * high)
+        & (hue >= GREEN_HUE_RANGE[0])
+        & (hue <= GREEN_HUE_RANGE[1])
+    )
+    return green_mask[codes].tolist()
+
+
+def classify_green(colors, use_numpy=None):
+    """
+    批量判断一组CSS颜色是否为绿色
+
+    Args:
+        colors: CSS颜色字符串列表（如getComputedStyle返回的color/backgroundColor）
+        use_numpy: 是否使用NumPy向量化计算，为None时安装了NumPy就使用
+
+    Returns:
+        list: 与colors一一对应的bool列表
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy and colors:
+        return _classify_numpy(colors)
+    return [is_green_color(color) for color in colors]
+
+
+def inline_style_colors(style):
+    """
+    取出内联style属性中color、background-color和background声明的颜色值
+
+    Returns:
+        list: 颜色字符串列表（background简写只取其中第一个能解析的颜色）
+    """
+    colors = []
+    for match in STYLE_COLOR_PATTERN.finditer(style or ""):
+        value = match.group(1).strip()
+        if parse_color(value) is None:
+            value = next((token for token in value.split() if parse_color(token) is not None), None)
+        if value:
+            colors.append(value)
+    return colors
+
+
+def has_green_class(class_name):
+    """类名中带有green或success（站点用这些类名标记已完成的链接）"""
+    class_name = (class_name or "").lower()
+    return "green" in class_name or "success" in class_name
+
+
+# 原有实现用于子串匹配的绿色写法
+LEGACY_GREEN_KEYWORDS = [
+    'green', 'rgb(0,128,0)', 'rgb(0, 128, 0)',
+    '#008000', '#008000', '#00ff00', '#00FF00',
+    'rgb(0,255,0)', 'rgb(0, 255, 0)', '#32cd32', '#32CD32',
+    'rgb(50,205,50)', 'rgb(50, 205, 50)', 'rgba(0,128,0,', 'rgba(0, 128, 0,',
+    'rgba(0,255,0,', 'rgba(0, 255, 0,', 'rgba(50,205,50,', 'rgba(50, 205, 50,'
+]
+
+
+def benchmark_color_classification(n_colors=100_000, distinct=None, seed=42):
+    """
+    比较原有的关键字子串匹配与批量判断（纯Python逐个计算/NumPy向量化）对n_colors个计算样式颜色的吞吐量
+
+    Args:
+        n_colors: 颜色数量
+        distinct: 不同颜色的数量（真实页面中计算样式颜色大量重复），为None时每个颜色都随机生成
+        seed: 随机种子
+
+    Returns:
+        dict: 每种方式的耗时（秒）、每秒处理的颜色数和判断为绿色的数量
+    """
+    rng = random.Random(seed)
+
+    def random_color():
+        red, green, blue = (rng.randrange(256) for _ in range(3))
+        return f"rgb({red}, {green}, {blue})" if rng.random() < 0.9 else f"rgba({red}, {green}, {blue}, 0.5)"
+
+    pool = [random_color() for _ in range(distinct)] if distinct else None
+    colors = [rng.choice(pool) for _ in range(n_colors)] if pool else [random_color() for _ in range(n_colors)]
+
+    def legacy(values):
+        return [any(keyword.lower() in value.lower() for keyword in LEGACY_GREEN_KEYWORDS) for value in values]
+
+    modes = {
+        "legacy_keywords": legacy,
+        "batch_python": lambda values: classify_green(values, use_numpy=False),
+    }
+    if np is not None:
+        modes["batch_numpy"] = lambda values: classify_green(values, use_numpy=True)
+
+    results = {}
+    for name, classify in modes.items():
+        parse_color.cache_clear()
+        start = time.perf_counter()
+        flags = classify(colors)
+        seconds = time.perf_counter() - start
+        results[name] = {"seconds": seconds, "colors_per_second": n_colors / seconds, "green": sum(flags)}
+
+    logger.info(f"=== 颜色判断基准测试（{n_colors}个颜色，"
+                f"{f'{distinct}种不同颜色' if distinct else '全部随机'}，NumPy{'已' if np is not None else '未'}安装） ===")
+    for name, result in results.items():
+        logger.info(f"{name}: {result['seconds'] * 1000:.1f}ms，每秒{result['colors_per_second'] / 1000:.0f}K个颜色，"
+                    f"绿色{result['green']}个")
+    return results
+
+
+if __name__ == "__main__":
+    setup_logging()
+    benchmark_color_classification()
+    benchmark_color_classification(distinct=50)
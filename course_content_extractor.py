@@ -10,38 +10,116 @@ from playwright.sync_api import sync_playwright, expect
 import time
 import json
 import csv
-import re
-import os
+import io
+import logging
+import contextlib
+import contextvars
+import concurrent.futures
 from datetime import datetime
+from course_page_parser import parse_course_links, chapter_from_url, normalize_href, site_url, content_fingerprint
+from link_patterns import total_steps as parse_total_steps
+from records import LinkInfo
+from main import Config
+from run_store import RunStore
+from browser_session import BrowserSession
+from page_readiness import goto_ready
+from listing_fetcher import ListingFetcher
+from page_snapshot import page_html
+from color_classifier import classify_green, inline_style_colors, has_green_class
+from artifact_store import save_artifact
+from instrumentation import span, set_tags, clear_tags
+from log_setup import setup_logging, log_level, capture_logging
 
-# 配置信息
-PRACTICE_PAGE_URL = [
-    "http://www.linuxstudio.cn/practice.php?chapter=Linux常用命令",
-    "http://www.linuxstudio.cn/practice.php?chapter=Shell脚本编程基础",
-    "http://www.linuxstudio.cn/practice.php?chapter=VI编辑器"
+logger = logging.getLogger(__name__)
+
+# 配置信息：需要处理的练习章节
+PRACTICE_CHAPTERS = [
+    "Linux常用命令",
+    "Shell脚本编程基础",
+    "VI编辑器"
 ]
 
-# 用户名和密码将从外部传入或通过配置文件加载
-USER_NAME = None
-PASSWORD = None
+# 处理相邻两个未完成链接之间的等待时间（秒），避免过快操作
+LINK_INTERVAL_SECONDS = 2
+
+# 输出文件（由运行存储导出，不再与课程爬取模块的completed_courses.*互相覆盖）
+OUTPUT_JSON_FILE = "output/extracted_links.json"
+OUTPUT_CSV_FILE = "output/extracted_links.csv"
+
+# 课程链接提取后端："html"为离线解析page.content()，"locator"为逐个元素查询
+EXTRACT_BACKEND = "html"
+
+# 预取流水线：章节HTML的解析和保存交给后台线程，浏览器同时开始加载下一个章节
+# （只对html后端生效，未完成链接在所有章节列表都读取完之后再依次处理）
+PIPELINE_PREFETCH = True
+
+# 章节页面HTML在调试快照存储中的阶段名
+CHAPTER_PAGE_PHASE = "chapter_page"
+
+
+# 一次性在页面内收集所有链接的样式信息（批量模式只需一次IPC往返）
+LINK_STYLE_SCRIPT = """(elements) => elements.map((el) => {
+    const computed = getComputedStyle(el);
+    return {
+        href: el.getAttribute('href'),
+        style: el.getAttribute('style') || '',
+        color: computed.color,
+        backgroundColor: computed.backgroundColor,
+        className: el.getAttribute('class') || ''
+    };
+})"""
 
-# 输出文件
-OUTPUT_JSON_FILE = "output/completed_courses.json"
-OUTPUT_CSV_FILE = "output/completed_courses.csv"
+
+def is_green_style(style, color, background_color, class_name):
+    """
+    根据内联样式、计算样式和类名判断链接是否呈现为绿色
+    
+    Args:
+        style: 内联style属性
+        color: 计算后的文字颜色
+        background_color: 计算后的背景颜色
+        class_name: class属性
+    
+    Returns:
+        bool: 是否为绿色链接
+    """
+    return classify_link_styles([{"style": style, "color": color, "backgroundColor": background_color,
+                                  "className": class_name}])[0]
 
 
-def log_message(message):
-    """带时间戳的日志输出"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] {message}")
+def classify_link_styles(link_styles):
+    """
+    批量判断链接是否呈现为绿色：所有链接的文字颜色、背景颜色和内联样式中的颜色一次交给color_classifier
+    按色相和饱和度判断，类名中带green或success的链接也算绿色
+    
+    Args:
+        link_styles: LINK_STYLE_SCRIPT返回的样式信息列表
+    
+    Returns:
+        list: 与link_styles一一对应的bool列表
+    """
+    colors = []
+    owners = []
+    for i, info in enumerate(link_styles):
+        link_colors = [info['color'], info['backgroundColor']] + inline_style_colors(info['style'])
+        colors.extend(link_colors)
+        owners.extend([i] * len(link_colors))
+    
+    green = [has_green_class(info['className']) for info in link_styles]
+    for owner, is_green in zip(owners, classify_green(colors)):
+        if is_green:
+            green[owner] = True
+    return green
 
 
-def extract_green_links(page):
+def extract_green_links(page, batched=True):
     """
     从页面中提取ID为"study_content"的ul元素中视觉呈现为绿色的URL链接
     
     Args:
         page: Playwright页面对象
+        batched: 是否使用批量模式（一次evaluate_all收集全部样式后在Python中分类），
+                 为False时逐个链接查询样式
     
     Returns:
         list: 符合条件的URL链接列表
@@ -49,92 +127,89 @@ def extract_green_links(page):
     green_links = []
     
     try:
-        log_message("开始提取绿色链接...")
+        logger.info("开始提取绿色链接...")
         
         # 定位到ID为"study_content"的元素
         study_content_element = page.locator("#study_content")
         
         # 检查元素是否存在
         if not study_content_element.count():
-            log_message("❌ 未找到ID为'study_content'的元素")
+            logger.error("❌ 未找到ID为'study_content'的元素")
             return green_links
         
-        log_message("✅ 已找到ID为'study_content'的元素")
+        logger.info("✅ 已找到ID为'study_content'的元素")
         
         # 定位到study_content下的ul元素 (路径为//*[@id="study_content"]/ul)
         ul_element = study_content_element.locator("ul")
         
         # 检查ul元素是否存在
         if not ul_element.count():
-            log_message("❌ 未找到'study_content'下的ul元素")
+            logger.error("❌ 未找到'study_content'下的ul元素")
             return green_links
         
-        log_message("✅ 已找到'study_content'下的ul元素")
+        logger.info("✅ 已找到'study_content'下的ul元素")
         
         # 获取ul元素中的所有链接(a标签)
         links = ul_element.locator("a")
-        links_count = links.count()
-        log_message(f"📊 在ul元素中找到{links_count}个链接")
         
-        # 绿色相关的颜色值定义（包括常见的绿色表示方式）
-        green_keywords = [
-            'green', 'rgb(0,128,0)', 'rgb(0, 128, 0)', 
-            '#008000', '#008000', '#00ff00', '#00FF00',
-            'rgb(0,255,0)', 'rgb(0, 255, 0)', '#32cd32', '#32CD32',
-            'rgb(50,205,50)', 'rgb(50, 205, 50)', 'rgba(0,128,0,', 'rgba(0, 128, 0,',
-            'rgba(0,255,0,', 'rgba(0, 255, 0,', 'rgba(50,205,50,', 'rgba(50, 205, 50,'
-        ]
-        
-        # 遍历所有链接，检查是否为绿色
-        for i in range(links_count):
-            link = links.nth(i)
+        if batched:
+            link_styles = links.evaluate_all(LINK_STYLE_SCRIPT)
+            logger.info(f"📊 在ul元素中找到{len(link_styles)}个链接（批量模式）")
             
-            try:
-                # 获取元素的style属性（内联样式）
-                style = link.get_attribute("style") or ""
-                
-                # 使用Playwright的API获取样式信息，避免JavaScript评估错误
-                color = link.evaluate('(el) => getComputedStyle(el).color')
-                background_color = link.evaluate('(el) => getComputedStyle(el).backgroundColor')
-                class_name = link.get_attribute('class') or ''
-                computed_style = {"color": color, "backgroundColor": background_color, "className": class_name}
-                
-                # 组合所有可能包含颜色信息的样式
-                all_styles = f"{style} {computed_style['color']} {computed_style['backgroundColor']} {computed_style['className']}".lower()
-                
-                # 检查是否包含绿色相关的样式
-                is_green = False
-                for keyword in green_keywords:
-                    if keyword.lower() in all_styles:
-                        is_green = True
-                        break
-                
-                # 额外检查是否有green类名或其他绿色相关的类
-                if 'green' in computed_style['className'].lower() or 'success' in computed_style['className'].lower():
-                    is_green = True
-                
-                # 记录样式信息用于调试
-                log_message(f"🔍 链接{i+1}样式分析: color={computed_style['color']}, bg={computed_style['backgroundColor']}, class={computed_style['className']}")
+            # 所有链接的颜色一次批量判断
+            green_flags = classify_link_styles(link_styles)
+            for i, info in enumerate(link_styles):
+                logger.debug("🔍 链接%s样式分析: color=%s, bg=%s, class=%s", i+1, info['color'], info['backgroundColor'], info['className'])
                 
-                if is_green:
-                    # 提取URL链接
-                    url = link.get_attribute("href")
+                if green_flags[i]:
+                    url = info['href']
                     if url:
-                        log_message(f"🟢 链接{i+1}被识别为绿色，URL: {url}")
+                        logger.debug("🟢 链接%s被识别为绿色，URL: %s", i+1, url)
                         green_links.append(url)
                     else:
-                        log_message(f"🟢 链接{i+1}被识别为绿色，但没有找到有效URL")
+                        logger.debug("🟢 链接%s被识别为绿色，但没有找到有效URL", i+1)
                 else:
-                    log_message(f"⚪ 链接{i+1}不是绿色")
-            except Exception as link_error:
-                log_message(f"❌ 分析链接{i+1}时出错: {str(link_error)}")
+                    logger.debug("⚪ 链接%s不是绿色", i+1)
+        else:
+            links_count = links.count()
+            logger.info(f"📊 在ul元素中找到{links_count}个链接")
+            
+            # 遍历所有链接，检查是否为绿色
+            for i in range(links_count):
+                link = links.nth(i)
+                
+                try:
+                    # 获取元素的style属性（内联样式）
+                    style = link.get_attribute("style") or ""
+                    
+                    # 使用Playwright的API获取样式信息，避免JavaScript评估错误
+                    color = link.evaluate('(el) => getComputedStyle(el).color')
+                    background_color = link.evaluate('(el) => getComputedStyle(el).backgroundColor')
+                    class_name = link.get_attribute('class') or ''
+                    
+                    # 记录样式信息用于调试
+                    logger.debug("🔍 链接%s样式分析: color=%s, bg=%s, class=%s", i+1, color, background_color, class_name)
+                    
+                    if is_green_style(style, color, background_color, class_name):
+                        # 提取URL链接
+                        url = link.get_attribute("href")
+                        if url:
+                            logger.debug("🟢 链接%s被识别为绿色，URL: %s", i+1, url)
+                            green_links.append(url)
+                        else:
+                            logger.debug("🟢 链接%s被识别为绿色，但没有找到有效URL", i+1)
+                    else:
+                        logger.debug("⚪ 链接%s不是绿色", i+1)
+                except Exception as link_error:
+                    logger.error(f"❌ 分析链接{i+1}时出错: {str(link_error)}")
         
         # 提取完成后的统计信息
-        log_message(f"✅ 绿色链接提取完成，共找到{len(green_links)}个绿色URL链接")
-        for idx, url in enumerate(green_links):
-            log_message(f"  [{idx+1}] {url}")
+        logger.info(f"✅ 绿色链接提取完成，共找到{len(green_links)}个绿色URL链接")
+        if logger.isEnabledFor(logging.DEBUG):
+            for idx, url in enumerate(green_links):
+                logger.debug("  [%s] %s", idx+1, url)
     except Exception as e:
-        log_message(f"❌ 提取绿色链接时出错: {str(e)}")
+        logger.error(f"❌ 提取绿色链接时出错: {str(e)}")
     
     return green_links
 
@@ -143,7 +218,7 @@ def test_green_links_extraction():
     """
     测试绿色链接提取功能的正确性
     """
-    log_message("===== 开始测试绿色链接提取功能 =====")
+    logger.info("===== 开始测试绿色链接提取功能 =====")
     
     try:
         # 创建一个简单的HTML测试页面
@@ -157,12 +232,7 @@ def test_green_links_extraction():
             try:
                 # 加载测试页面
                 page.set_content(test_html, timeout=5000)
-                log_message("✅ 已加载测试页面")
-                
-                # 调用提取函数
-                green_links = extract_green_links(page)
-                log_message(f"✅ 提取到{len(green_links)}个绿色链接")
-                log_message(f"绿色链接列表: {green_links}")
+                logger.info("✅ 已加载测试页面")
                 
                 # 预期的绿色链接
                 expected_links = [
@@ -173,88 +243,227 @@ def test_green_links_extraction():
                     "https://example.com/link6"
                 ]
                 
-                # 检查结果
-                missing_links = set(expected_links) - set(green_links)
-                unexpected_links = set(green_links) - set(expected_links)
-                
-                if not missing_links and not unexpected_links:
-                    log_message("🎉 测试通过! 绿色链接提取功能工作正常")
-                else:
-                    if missing_links:
-                        log_message(f"❌ 未找到的绿色链接: {missing_links}")
-                    if unexpected_links:
-                        log_message(f"⚠️ 错误识别的绿色链接: {unexpected_links}")
+                # 逐个查询模式和批量模式应得到相同的结果
+                for batched in (False, True):
+                    mode_name = "批量模式" if batched else "逐个查询模式"
+                    
+                    # 调用提取函数
+                    green_links = extract_green_links(page, batched=batched)
+                    logger.info("✅ [%s] 提取到%s个绿色链接", mode_name, len(green_links))
+                    logger.info("绿色链接列表: %s", green_links)
+                    
+                    # 检查结果
+                    missing_links = set(expected_links) - set(green_links)
+                    unexpected_links = set(green_links) - set(expected_links)
+                    
+                    if not missing_links and not unexpected_links:
+                        logger.info("🎉 [%s] 测试通过! 绿色链接提取功能工作正常", mode_name)
+                    else:
+                        if missing_links:
+                            logger.error(f"❌ [{mode_name}] 未找到的绿色链接: {missing_links}")
+                        if unexpected_links:
+                            logger.warning(f"⚠️ [{mode_name}] 错误识别的绿色链接: {unexpected_links}")
             
             finally:
                 page.close()
                 browser.close()
-                log_message("✅ 已关闭浏览器")
+                logger.info("✅ 已关闭浏览器")
     
     except Exception as e:
-        log_message(f"❌ 测试过程中发生错误: {str(e)}")
+        logger.error(f"❌ 测试过程中发生错误: {str(e)}")
     
-    log_message("===== 测试完成 =====")
-
+    logger.info("===== 测试完成 =====")
 
 
-def login_to_system(page):
+def build_green_links_fixture(n_links=500):
     """
-    在已打开的页面上执行登录操作
+    生成包含指定数量链接的study_content测试页面，绿色/非绿色链接交替出现
     
     Args:
-        page: Playwright页面对象
+        n_links: 链接数量
     
     Returns:
-        bool: 登录是否成功
+        str: 测试页面HTML
     """
-    try:
-        log_message("开始登录流程...")
-        
-        # 访问登录页面
-        login_url = "http://www.linuxstudio.cn/user/index.php"
-        page.goto(login_url, wait_until="domcontentloaded")
-        log_message(f"✓ 已访问登录页面: {login_url}")
-        
-        # 等待页面元素加载完成
-        page.wait_for_selector("#username", state="visible", timeout=15000)
-        
-        # 填写用户名和密码
-        page.fill("#username", USER_NAME)
-        page.fill("#password", PASSWORD)
-        log_message("✓ 已输入用户名和密码")
+    link_templates = [
+        '<a href="https://example.com/link{i}" style="color: green;">绿色文本链接{i}</a>',
+        '<a href="https://example.com/link{i}" class="green-text">绿色类链接{i}</a>',
+        '<a href="https://example.com/link{i}" class="green-bg">绿色背景链接{i}</a>',
+        '<a href="https://example.com/link{i}" style="color: #32cd32;">浅绿色链接{i}</a>',
+        '<a href="https://example.com/link{i}" class="normal-link">普通蓝色链接{i}</a>',
+        '<a href="https://example.com/link{i}" style="color: rgb(0,128,0);">RGB绿色链接{i}</a>',
+    ]
+    items = "".join(
+        f"<li>{link_templates[i % len(link_templates)].format(i=i + 1)}</li>"
+        for i in range(n_links)
+    )
+    return (
+        '<!DOCTYPE html><html><head><title>绿色链接基准测试</title><style>'
+        '.green-text { color: green; }.green-bg { background-color: #008000; color: white; }'
+        '.normal-link { color: blue; }</style></head><body>'
+        f'<div id="study_content"><ul>{items}</ul></div></body></html>'
+    )
+
+
+class _RoundTripCounter:
+    """包装Page/Locator对象，统计会触发浏览器IPC往返的方法调用次数"""
+    IPC_METHODS = {"count", "get_attribute", "evaluate", "evaluate_all", "text_content", "all"}
+    
+    def __init__(self, target, counter=None):
+        self._target = target
+        self._counter = counter if counter is not None else {"calls": 0}
+    
+    @property
+    def calls(self):
+        return self._counter["calls"]
+    
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name in ("first", "last"):
+            return _RoundTripCounter(attr, self._counter)
+        if not callable(attr):
+            return attr
         
-        # 尝试点击提交按钮
+        def wrapper(*args, **kwargs):
+            if name in self.IPC_METHODS:
+                self._counter["calls"] += 1
+            result = attr(*args, **kwargs)
+            # 链式定位器同样需要计数
+            if name in ("locator", "nth"):
+                return _RoundTripCounter(result, self._counter)
+            return result
+        return wrapper
+
+
+def benchmark_green_links_extraction(n_links=500, rounds=3):
+    """
+    对比逐个查询模式与批量模式在生成的n_links个链接页面上的IPC往返次数和耗时
+    
+    Args:
+        n_links: 测试页面中的链接数量
+        rounds: 每种模式的重复次数（取最短耗时）
+    
+    Returns:
+        dict: 每种模式的往返次数、耗时和识别出的绿色链接数
+    """
+    logger.info(f"===== 开始绿色链接提取基准测试（{n_links}个链接） =====")
+    results = {}
+    
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
         try:
-            # 使用多种方式尝试点击登录按钮
-            submit_button = page.locator("input[type='submit'][name='submit']")
-            submit_button.scroll_into_view_if_needed()
-            submit_button.click(force=True)  # 使用force参数确保点击成功
-            log_message("✓ 已点击登录按钮")
-        except Exception as e:
-            log_message(f"警告：直接点击登录按钮失败，尝试通过坐标点击: {e}")
-            # 备选方案：通过坐标点击
-            button_bounding_box = submit_button.bounding_box()
-            if button_bounding_box:
-                x = button_bounding_box['x'] + button_bounding_box['width'] / 2
-                y = button_bounding_box['y'] + button_bounding_box['height'] / 2
-                page.mouse.click(x, y)
-                log_message("✓ 已通过坐标点击登录按钮")
-        
-        # 等待页面跳转和加载完成
-        page.wait_for_url("**", timeout=20000)
-        page.wait_for_load_state("networkidle", timeout=20000)
-        
-        # 验证登录状态
-        if "my_info.php" in page.content():
-            log_message("✓ 登录成功")
-            return True
-        else:
-            log_message("✗ 登录失败：页面中未找到登录成功的标识")
-            return False
+            page.set_content(build_green_links_fixture(n_links))
+            
+            # 基准测试期间屏蔽逐链接日志，避免打印耗时干扰结果
+            with log_level("WARNING"):
+                for batched in (False, True):
+                    mode_name = "batched" if batched else "per_link"
+                    best_elapsed = None
+                    for _ in range(rounds):
+                        counted_page = _RoundTripCounter(page)
+                        start = time.perf_counter()
+                        green_links = extract_green_links(counted_page, batched=batched)
+                        elapsed = time.perf_counter() - start
+                        if best_elapsed is None or elapsed < best_elapsed:
+                            best_elapsed = elapsed
+                    results[mode_name] = {
+                        "round_trips": counted_page.calls,
+                        "seconds": best_elapsed,
+                        "green_links": len(green_links)
+                    }
+        finally:
+            page.close()
+            browser.close()
     
-    except Exception as e:
-        log_message(f"✗ 登录过程中发生错误: {e}")
-        return False
+    for mode_name, result in results.items():
+        logger.info("📊 %s: 往返%s次, 耗时%.1fms, 绿色链接%s个", mode_name, result['round_trips'],
+                    result['seconds'] * 1000, result['green_links'])
+    if results["batched"]["seconds"] > 0:
+        logger.info(f"🚀 批量模式加速比: {results['per_link']['seconds'] / results['batched']['seconds']:.1f}x")
+    logger.info("===== 基准测试完成 =====")
+    return results
+
+
+def build_course_page_fixture(n_items=200):
+    """
+    生成模拟练习页面的HTML，每隔一项带有蓝色对勾（已完成）
+    
+    Args:
+        n_items: 列表项数量
+    
+    Returns:
+        str: 测试页面HTML
+    """
+    items = []
+    for i in range(n_items):
+        check = '<font color="blue">✓</font>' if i % 2 == 0 else '<font color="red">✗</font>'
+        href = f"practice_process.php?chapter=Linux常用命令&amp;id={i + 1}" if i % 3 else f"/study/content/{i + 1}.php"
+        items.append(f'<li>{check} <a href="{href}">第{i + 1}关 <b>练习</b></a></li>')
+    return (
+        '<!DOCTYPE html><html><head><title>练习页面</title></head><body>'
+        '<ul><li><a href="/user/my_info.php">个人信息</a></li></ul>'
+        f'<div id="study_content"><ul>{"".join(items)}</ul></div></body></html>'
+    )
+
+
+def benchmark_log_levels(n_items=2000, rounds=5):
+    """
+    在生成的练习页面上测量提取循环（离线解析+逐条日志）在不同日志方式下的耗时
+
+    对比原先同步print的log_message、队列日志INFO级别（逐条DEBUG日志被过滤）和DEBUG级别，
+    日志输出到内存流，不受终端速度影响
+
+    Args:
+        n_items: 测试页面的列表项数量
+        rounds: 每种方式的重复次数（取最短耗时）
+
+    Returns:
+        dict: 每种方式的耗时（秒）和输出字节数
+    """
+    html = build_course_page_fixture(n_items)
+
+    def legacy_log_message(message):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{timestamp}] {message}")
+
+    def legacy_loop():
+        completed_links, incomplete_links = parse_course_links(html)
+        for link_info in sorted(completed_links + incomplete_links, key=lambda x: x.index):
+            done = link_info.completed
+            legacy_log_message(f"{'✓' if done else '○'} 发现{'' if done else '未'}完成项目 {link_info.index}: {link_info.text} -> {link_info.href}")
+        legacy_log_message(f"✓ 提取完成：已完成项目{len(completed_links)}个，未完成项目{len(incomplete_links)}个")
+
+    def logging_loop():
+        completed_links, incomplete_links = parse_course_links(html)
+        log_extracted_links(completed_links, incomplete_links)
+        logger.info(f"✓ 提取完成：已完成项目{len(completed_links)}个，未完成项目{len(incomplete_links)}个")
+
+    results = {}
+    for mode in ("print", "INFO", "DEBUG"):
+        best = None
+        for _ in range(rounds):
+            stream = io.StringIO()
+            if mode == "print":
+                with contextlib.redirect_stdout(stream):
+                    start = time.perf_counter()
+                    legacy_loop()
+                    elapsed = time.perf_counter() - start
+            else:
+                with capture_logging(mode, stream):
+                    start = time.perf_counter()
+                    logging_loop()
+                    elapsed = time.perf_counter() - start
+            if best is None or elapsed < best:
+                best = elapsed
+        results[mode] = {"seconds": best, "output_bytes": len(stream.getvalue().encode("utf-8"))}
+
+    for mode, result in results.items():
+        logger.info("📊 %s: 提取%s项耗时%.1fms，日志输出%s字节", mode, n_items, result['seconds'] * 1000,
+                    result['output_bytes'])
+    if results["INFO"]["seconds"] > 0:
+        logger.info(f"🚀 INFO级别相对原print方式加速比: {results['print']['seconds'] / results['INFO']['seconds']:.1f}x")
+    return results
 
 
 def visit_practice_page(page, url):
@@ -268,39 +477,138 @@ def visit_practice_page(page, url):
         bool: 页面访问是否成功
     """
     try:
-        log_message(f"访问练习页面: {url}")
-        page.goto(url, wait_until="domcontentloaded")
+        logger.info(f"访问练习页面: {url}")
         
-        # 等待页面加载完成
-        page.wait_for_load_state("networkidle", timeout=20000)
+        # 等待章节列表出现即可，不等待网络空闲
+        goto_ready(page, url, "practice_list", timeout=20000)
         
-        log_message(f"✓ 页面访问成功，当前URL: {page.url}")
-        log_message(f"页面标题: {page.title()}")
+        logger.info(f"✓ 页面访问成功，当前URL: {page.url}")
+        logger.info(f"页面标题: {page.title()}")
         
         return True
     except Exception as e:
-        log_message(f"✗ 访问练习页面失败: {e}")
+        logger.error(f"✗ 访问练习页面失败: {e}")
         return False
 
 
-def extract_course_links(page):
+def fetch_practice_html(fetcher, url):
+    """
+    用HTTP直接获取练习页面HTML（不经过浏览器导航）
+    
+    Args:
+        fetcher: ListingFetcher实例
+        url: 练习页面URL
+    
+    Returns:
+        str: 页面HTML，获取失败时返回None，由调用方改用浏览器访问
+    """
+    try:
+        logger.info(f"HTTP获取练习页面: {url}")
+        return fetcher.fetch(url, "practice_list")
+    except Exception as e:
+        logger.warning(f"⚠ HTTP获取练习页面失败，改用浏览器访问: {e}")
+        return None
+
+
+def fetch_page_validators(page, url):
+    """
+    通过一次轻量的HEAD请求获取页面的ETag和Last-Modified（复用浏览器上下文的登录状态）
+    
+    Args:
+        page: Playwright页面对象
+        url: 页面URL
+    
+    Returns:
+        tuple: (etag, last_modified)，服务器未提供时为None
+    """
+    try:
+        response = page.context.request.head(url, timeout=10000)
+        headers = response.headers
+        return headers.get("etag"), headers.get("last-modified")
+    except Exception as e:
+        logger.warning(f"! 获取页面缓存校验头失败: {e}")
+        return None, None
+
+
+def chapter_fingerprint(page):
+    """
+    计算当前页面#study_content内容的指纹（与HTTP获取的同一页面指纹相同）
+    
+    Args:
+        page: Playwright页面对象
+    
+    Returns:
+        str: 规范化内容的SHA-256哈希
+    """
+    return content_fingerprint(page_html(page))
+
+
+def log_extracted_links(completed_links, incomplete_links):
+    """
+    按页面顺序逐条输出提取到的链接（DEBUG级别，未启用DEBUG时直接跳过整个循环）
+    
+    Args:
+        completed_links: 已完成的链接列表
+        incomplete_links: 未完成的链接列表
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    for link_info in sorted(completed_links + incomplete_links, key=lambda x: x.index):
+        done = link_info.completed
+        logger.debug("%s 发现%s完成项目 %s: %s -> %s", '✓' if done else '○', '' if done else '未',
+                     link_info.index, link_info.text, link_info.href)
+
+
+def save_course_page_html(html, chapter=None, run=None):
+    """把章节页面HTML交给调试快照存储（后台压缩写入，相同页面只存一份）"""
+    save_artifact(html, CHAPTER_PAGE_PHASE, run=run, course=chapter)
+    logger.debug("✓ 已提交章节页面快照: %s", chapter)
+
+
+def extract_links_from_html(html, chapter=None, run=None):
+    """
+    保存并离线解析章节页面HTML，不访问页面对象，可以在后台线程中执行
+    
+    Args:
+        html: 章节页面HTML
+        chapter: 章节名称，写入调试快照索引
+        run: 运行ID，写入调试快照索引
+    
+    Returns:
+        tuple: (已完成的链接列表, 未完成的链接列表)
+    """
+    save_course_page_html(html, chapter, run)
+    completed_links, incomplete_links = parse_course_links(html)
+    log_extracted_links(completed_links, incomplete_links)
+    logger.info(f"✓ 提取完成：已完成项目{len(completed_links)}个，未完成项目{len(incomplete_links)}个")
+    return completed_links, incomplete_links
+
+
+def extract_course_links(page, backend=None, run=None):
     """
     从页面中提取已完成和未完成的课程链接
     
     Args:
         page: Playwright页面对象
+        backend: 提取后端，"html"为离线解析页面HTML，"locator"为逐个元素查询，
+                 为None时使用EXTRACT_BACKEND
+        run: 运行ID，写入调试快照索引
     
     Returns:
         tuple: (已完成的链接列表, 未完成的链接列表)
     """
+    backend = backend or EXTRACT_BACKEND
     completed_links = []
     incomplete_links = []
     
     try:
+        html = page_html(page)
+        chapter = chapter_from_url(page.url)
+        if backend == "html":
+            return extract_links_from_html(html, chapter, run)
+        
         # 保存页面HTML用于调试
-        with open("./output/course_page.html", "w", encoding="utf-8") as f:
-            f.write(page.content())
-        log_message("✓ 已保存页面HTML到course_page.html")
+        save_course_page_html(html, chapter, run)
         
         # 查找id="study_content"的div块中的<ul>元素，然后获取其中的<li>元素
         try:
@@ -309,7 +617,7 @@ def extract_course_links(page):
             if study_content_div:
                 # 查找div中的ul元素
                 ul_elements = study_content_div.locator("ul").all()
-                log_message(f"✓ 找到{len(ul_elements)}个ul元素在study_content div中")
+                logger.info(f"✓ 找到{len(ul_elements)}个ul元素在study_content div中")
                 
                 # 收集所有ul中的li元素
                 list_items = []
@@ -317,18 +625,20 @@ def extract_course_links(page):
                     ul_list_items = ul.locator("li").all()
                     list_items.extend(ul_list_items)
                 
-                log_message(f"✓ 找到{len(list_items)}个列表项在study_content div的ul中")
+                logger.info(f"✓ 找到{len(list_items)}个列表项在study_content div的ul中")
             else:
-                log_message("! 未找到id='study_content'的div元素，回退到查找所有li元素")
+                logger.warning("! 未找到id='study_content'的div元素，回退到查找所有li元素")
                 # 回退到原来的方式
                 list_items = page.locator("li").all()
-                log_message(f"✓ 回退后找到{len(list_items)}个列表项")
+                logger.info(f"✓ 回退后找到{len(list_items)}个列表项")
         except Exception as e:
-            log_message(f"! 查找study_content div中的列表项时出错: {str(e)}")
+            logger.warning(f"! 查找study_content div中的列表项时出错: {str(e)}")
             # 出错时回退到原来的方式
             list_items = page.locator("li").all()
-            log_message(f"✓ 出错回退后找到{len(list_items)}个列表项")
+            logger.info(f"✓ 出错回退后找到{len(list_items)}个列表项")
         
+        # 同一页面的链接共用一个提取时刻，写入文件时才格式化
+        extraction_time = time.time()
         for index, item in enumerate(list_items):
             try:
                 # 检查是否包含蓝色对勾标记
@@ -350,115 +660,98 @@ def extract_course_links(page):
                         href = a_element.get_attribute("href")
                         if href:
                             # 处理相对路径，转换为绝对路径
-                            if not href.startswith("http"):
-                                if href.startswith("/"):
-                                    href = f"http://www.linuxstudio.cn{href}"
-                                else:
-                                    href = f"http://www.linuxstudio.cn/{href}"
+                            href = normalize_href(href)
                             
                             # 提取链接文本
                             link_text = a_element.text_content().strip() or "未知链接文本"
                             
                             # 记录链接信息
-                            link_info = {
-                                "index": index + 1,
-                                "href": href,
-                                "text": link_text,
-                                "completed": has_blue_check,
-                                "extraction_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                            }
+                            link_info = LinkInfo(index + 1, href, link_text, has_blue_check, extraction_time)
                             
                             if has_blue_check:
                                 completed_links.append(link_info)
                             else:
                                 incomplete_links.append(link_info)
                             
-                            log_message(f"{'✓' if has_blue_check else '○'} 发现{'' if has_blue_check else '未'}完成项目 {index + 1}: {link_text} -> {href}")
+                            logger.debug("%s 发现%s完成项目 %s: %s -> %s", '✓' if has_blue_check else '○', '' if has_blue_check else '未', index + 1, link_text, href)
                     except Exception as e:
-                        log_message(f"处理链接时出错: {e}")
+                        logger.info("处理链接时出错: %s", e)
                         continue
             except Exception as e:
-                log_message(f"处理列表项 {index + 1} 时出错: {e}")
+                logger.info("处理列表项 %s 时出错: %s", index + 1, e)
                 continue
         
-        log_message(f"✓ 提取完成：已完成项目{len(completed_links)}个，未完成项目{len(incomplete_links)}个")
+        logger.info(f"✓ 提取完成：已完成项目{len(completed_links)}个，未完成项目{len(incomplete_links)}个")
         return completed_links, incomplete_links
     
     except Exception as e:
-        log_message(f"✗ 提取课程链接时发生错误: {e}")
+        logger.error(f"✗ 提取课程链接时发生错误: {e}")
         return completed_links, incomplete_links
 
 
-def save_to_json(completed_links, incomplete_links):
+def save_to_json(completed_links, incomplete_links, store, chapter):
     """
-    将提取的链接保存到JSON文件
+    将提取的链接写入运行存储，并导出JSON文件
     
     Args:
         completed_links: 已完成的链接列表
         incomplete_links: 未完成的链接列表
+        store: RunStore运行存储
+        chapter: 链接所属章节
     """
     try:
-        data = {
-            "extraction_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "completed_links": completed_links,
-            "incomplete_links": incomplete_links,
-            "summary": {
-                "total_completed": len(completed_links),
-                "total_incomplete": len(incomplete_links),
-                "total": len(completed_links) + len(incomplete_links)
-            }
-        }
-        
-        with open(OUTPUT_JSON_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        
-        log_message(f"✓ 已将数据保存到JSON文件: {OUTPUT_JSON_FILE}")
+        store.save_links(chapter, completed_links, incomplete_links)
+        store.export_links_json(OUTPUT_JSON_FILE)
+        logger.info(f"✓ 已将数据保存到JSON文件: {OUTPUT_JSON_FILE}")
     except Exception as e:
-        log_message(f"✗ 保存JSON文件失败: {e}")
+        logger.error(f"✗ 保存JSON文件失败: {e}")
 
 
-def save_to_csv(completed_links, incomplete_links):
+def save_chapter_links(url, completed_links, incomplete_links, store, fingerprint_info=None):
     """
-    将提取的链接保存到CSV文件
+    保存一个章节提取到的链接，增量模式下同时记录章节指纹
     
     Args:
+        url: 章节页面URL
         completed_links: 已完成的链接列表
         incomplete_links: 未完成的链接列表
+        store: RunStore运行存储
+        fingerprint_info: (指纹, ETag, Last-Modified)，非增量模式为None
     """
-    try:
-        all_links = []
-        
-        # 添加已完成的链接
-        for link in completed_links:
-            link_copy = link.copy()
-            link_copy["status"] = "completed"
-            all_links.append(link_copy)
-        
-        # 添加未完成的链接
-        for link in incomplete_links:
-            link_copy = link.copy()
-            link_copy["status"] = "incomplete"
-            all_links.append(link_copy)
-        
-        # 按照索引排序
-        all_links.sort(key=lambda x: x["index"])
-        
-        # 保存到CSV
-        with open(OUTPUT_CSV_FILE, "w", newline="", encoding="utf-8") as f:
-            if all_links:
-                fieldnames = ["index", "text", "href", "status", "completed", "extraction_time"]
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(all_links)
-        
-        log_message(f"✓ 已将数据保存到CSV文件: {OUTPUT_CSV_FILE}")
-    except Exception as e:
-        log_message(f"✗ 保存CSV文件失败: {e}")
-
+    with span("persistence", target="links"):
+        save_to_json(completed_links, incomplete_links, store, chapter_from_url(url))
+        save_to_csv(store)
+        if fingerprint_info:
+            fingerprint, etag, last_modified = fingerprint_info
+            store.save_fingerprint(url, fingerprint, etag, last_modified, pending=len(incomplete_links))
 
 
+def parse_and_save_links(html, url, store, fingerprint_info=None):
+    """
+    流水线的后台步骤：解析章节HTML并保存链接
+    
+    Returns:
+        tuple: (已完成的链接列表, 未完成的链接列表)
+    """
+    with span("extraction", backend="html", pipelined=True) as tags:
+        completed_links, incomplete_links = extract_links_from_html(html, chapter_from_url(url), store.run_id)
+        tags.update(completed=len(completed_links), incomplete=len(incomplete_links))
+    save_chapter_links(url, completed_links, incomplete_links, store, fingerprint_info)
+    return completed_links, incomplete_links
 
 
+def save_to_csv(store):
+    """
+    从运行存储导出全部链接到CSV文件
+    
+    Args:
+        store: RunStore运行存储
+    """
+    try:
+        store.export_links_csv(OUTPUT_CSV_FILE)
+        logger.info(f"✓ 已将数据保存到CSV文件: {OUTPUT_CSV_FILE}")
+    except Exception as e:
+        logger.error(f"✗ 保存CSV文件失败: {e}")
 
 
 def process_practice_page(page):
@@ -475,51 +768,49 @@ def process_practice_page(page):
         bool: 处理是否成功
     """
     try:
-        log_message("🔍 开始处理练习页面")
+        logger.info("🔍 开始处理练习页面")
         
         # 1. 查找特定颜色文本并提取数字
         red_text_element = page.locator("font[color='#FF5809']").first
         if red_text_element.count() > 0:
             red_text = red_text_element.text_content().strip()
-            log_message(f"✓ 找到红色文本: {red_text}")
+            logger.info(f"✓ 找到红色文本: {red_text}")
             
             # 提取括号中的数字
-            match = re.search(r'（共 (\d+) 关）', red_text)
-            if match:
-                total_steps = match.group(1)
-                log_message(f"✓ 提取到总关卡数: {total_steps}")
+            total_steps = parse_total_steps(red_text)
+            if total_steps is not None:
+                logger.info(f"✓ 提取到总关卡数: {total_steps}")
                 
                 # 2. 修改隐藏表单字段
                 step_input = page.locator("input[type='hidden'][name='step']")
                 if step_input.count() > 0:
                     # 使用evaluate修改隐藏字段的值（始终设置为total_steps + 1）
-                    page.evaluate(f"document.querySelector('input[type=\\'hidden\\'][name=\\'step\\']').value = '{int(total_steps) + 1}'")
-                    log_message(f"✓ 已修改step值为: {int(total_steps) + 1}")
+                    page.evaluate(f"document.querySelector('input[type=\\'hidden\\'][name=\\'step\\']').value = '{total_steps + 1}'")
+                    logger.info(f"✓ 已修改step值为: {total_steps + 1}")
                     
                     # 点击提交按钮
                     submit_button = page.locator("input[type='submit'][name='button_prac_process']")
                     if submit_button.count() > 0:
-                        submit_button.click()
-                        page.wait_for_load_state("networkidle")
-                        log_message("✓ 已点击提交按钮")
+                        # 等待提交引起的导航完成DOM加载
+                        with page.expect_navigation(wait_until="domcontentloaded"):
+                            submit_button.click()
+                        logger.info("✓ 已点击提交按钮")
                         return True
                     else:
-                        log_message("✗ 未找到提交按钮")
+                        logger.error("✗ 未找到提交按钮")
                         return False
                 else:
-                    log_message("✗ 未找到step隐藏字段")
+                    logger.error("✗ 未找到step隐藏字段")
                     return False
             else:
-                log_message("✗ 未能从红色文本中提取数字")
+                logger.error("✗ 未能从红色文本中提取数字")
                 return False
         else:
-            log_message("✗ 未找到特定颜色的文本")
+            logger.error("✗ 未找到特定颜色的文本")
             return False
         
     except Exception as e:
-        log_message(f"✗ 处理练习页面时出错: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.error(f"✗ 处理练习页面时出错: {e}", exc_info=True)
         return False
 
 def process_incomplete_links(page, incomplete_links):
@@ -530,152 +821,230 @@ def process_incomplete_links(page, incomplete_links):
         page: Playwright页面对象
         incomplete_links: 未完成的链接列表
     """
-    log_message(f"\n=== 开始处理未完成的链接（共{len(incomplete_links)}个） ===")
+    logger.info(f"\n=== 开始处理未完成的链接（共{len(incomplete_links)}个） ===")
     
     for index, link_info in enumerate(incomplete_links):
         try:
-            log_message(f"\n🔍 处理第{index + 1}/{len(incomplete_links)}个未完成链接")
-            log_message(f"📄 链接: {link_info['text']} -> {link_info['href']}")
+            logger.info("\n🔍 处理第%s/%s个未完成链接", index + 1, len(incomplete_links))
+            logger.info("📄 链接: %s -> %s", link_info.text, link_info.href)
             
             # 先访问链接
-            page.goto(link_info['href'], wait_until="domcontentloaded")
-            page.wait_for_load_state("networkidle")
-            log_message(f"✓ 已访问链接: {link_info['href']}")
+            is_practice_link = "practice" in link_info.href or "prac" in link_info.href
+            goto_ready(page, link_info.href, "practice" if is_practice_link else None, timeout=10000)
+            logger.info("✓ 已访问链接: %s", link_info.href)
             
             # 检查访问后的页面是否是练习页面
             if "practice" in page.url or "prac" in page.url:
-                log_message("⚠ 检测到练习页面，开始处理")
-                process_practice_page(page)
+                logger.info("⚠ 检测到练习页面，开始处理")
+                with span("practice_submit", item=link_info.index):
+                    process_practice_page(page)
             else:
-                log_message("ℹ️ 访问的页面不是练习页面，跳过处理")
+                logger.info("ℹ️ 访问的页面不是练习页面，跳过处理")
             
             # 等待几秒，避免过快操作
-            time.sleep(2)
+            time.sleep(LINK_INTERVAL_SECONDS)
             
         except Exception as e:
-            log_message(f"✗ 处理链接时出错: {e}")
+            logger.error(f"✗ 处理链接时出错: {e}")
             continue
     
-    log_message("\n✓ 所有未完成链接处理完毕")
+    logger.info("\n✓ 所有未完成链接处理完毕")
 
-def main(user_name=None, password=None):
+class Extractor:
     """
-    主函数：执行完整的提取和处理流程
-    
-    Args:
-        user_name: 用户名，如果为None则使用默认值
-        password: 密码，如果为None则使用默认值
+    课程内容提取阶段：访问各练习章节，提取并保存链接，处理未完成的练习
+
+    运行所需的状态（配置、已登录的上下文、各章节的提取结果）都保存在实例上，
+    不依赖模块级可变变量，多个实例可以在不同线程中同时运行
     """
-    completed_links = []
-    incomplete_links = []
-    
-    # 使用全局变量存储用户名和密码
-    global USER_NAME, PASSWORD
-    if user_name:
-        USER_NAME = user_name
-    if password:
-        PASSWORD = password
-    
-    # 如果没有提供用户名和密码，尝试从配置文件加载
-    if not USER_NAME or not PASSWORD:
-        try:
-            import configparser
-            config = configparser.ConfigParser()
-            config_path = "d:/code/python_code/ai_factory/linuxclass_quick_done/config.txt"
-            
-            # 读取配置文件（使用简单的文本格式）
-            with open(config_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line or line.startswith('#'):
-                        continue
-                    if '=' in line:
-                        key, value = line.split('=', 1)
-                        key = key.strip()
-                        value = value.strip()
-                        if (value.startswith('"') and value.endswith('"')) or \
-                           (value.startswith("'") and value.endswith("'")):
-                            value = value[1:-1]
-                        if key == 'USER_NAME':
-                            USER_NAME = value
-                        elif key == 'PASSWORD':
-                            PASSWORD = value
-        except Exception as e:
-            log_message(f"✗ 从配置文件加载用户名和密码失败: {e}")
+
+    def __init__(self, config, context=None, pipelined=None):
+        """
+        Args:
+            config: main.Config配置（USER_NAME、PASSWORD、INCREMENTAL、LISTING_BACKEND）
+            context: 已登录的BrowserContext，提供时复用该上下文而不再启动浏览器和登录
+            pipelined: 是否使用预取流水线，默认PIPELINE_PREFETCH（locator后端始终逐章节处理）
+        """
+        self.config = config
+        self.user_name = config.get('USER_NAME')
+        self.password = config.get('PASSWORD')
+        self.incremental = config.get('INCREMENTAL', False)
+        self.context = context
+        self.pipelined = PIPELINE_PREFETCH if pipelined is None else pipelined
+        # 练习章节列表的获取方式：browser（Chromium导航）或http（复用登录Cookie直接请求）
+        self.listing_backend = config.get('LISTING_BACKEND', 'browser')
+        self.chapters = list(PRACTICE_CHAPTERS)
+        # 各章节的提取结果 {章节URL: (已完成的链接列表, 未完成的链接列表)}
+        self.chapter_links = {}
+
+    def run(self):
+        """
+        执行完整的提取和处理流程
+
+        增量模式下跳过内容指纹与上次运行相同且没有待处理项目的章节
+        """
+        # 验证用户名和密码（复用已登录的上下文时不需要）
+        if self.context is None and (not self.user_name or not self.password):
+            logger.error("✗ 用户名或密码为空，无法执行登录")
             return
+        
+        completed_links = []
+        incomplete_links = []
+        incremental = self.incremental
+        pipelined = self.pipelined and EXTRACT_BACKEND == "html"
+        fetcher = None
+        self.chapter_links = {}
     
-    # 验证用户名和密码
-    if not USER_NAME or not PASSWORD:
-        log_message("✗ 用户名或密码为空，无法执行登录")
-        return
+        store = RunStore()
+        store.start_run("extract")
+        session = None
+        page = None
+        # 流水线模式下解析和保存在单个后台线程中按章节顺序执行
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="extract-pipeline") if pipelined else None
+        chapter_jobs = []
     
-    with sync_playwright() as p:
         try:
-            log_message("自动化提取流程开始...")
-            
-            # 启动浏览器
-            browser = p.chromium.launch(
-                headless=False,  # 显示浏览器窗口便于调试
-                args=["--start-maximized"]
-            )
-            context = browser.new_context(
-                viewport=None,
-                locale="zh-CN"
-            )
+            logger.info("自动化提取流程开始...")
+        
+            context = self.context
+            if context is None:
+                # 独立运行时自行启动浏览器并登录
+                session = BrowserSession(self.user_name, self.password, launch_args=["--start-maximized"])
+                session.start()
+                context = session.context
+            else:
+                logger.info("✓ 复用已登录的浏览器上下文")
             page = context.new_page()
+            if self.listing_backend == "http":
+                # 章节列表页面只读取，用HTTP直接获取后离线解析，浏览器只处理未完成的练习
+                fetcher = ListingFetcher.from_context(context)
+                logger.info("✓ 章节列表使用HTTP获取")
+        
+            practice_page_urls = [site_url(f"practice.php?chapter={chapter}") for chapter in self.chapters]
+            skipped_chapters = 0
+            for url in practice_page_urls:
+                # 本章节内记录的span都带上章节标签
+                set_tags(chapter=chapter_from_url(url))
+                if incremental:
+                    # 上次运行时该章节已没有待处理项目，且服务器缓存校验头未变化时无需访问
+                    previous = store.get_fingerprint(url)
+                    unchanged_before = previous is not None and not previous["pending"]
+                    etag, last_modified = fetch_page_validators(page, url)
+                    if unchanged_before and (etag or last_modified) and \
+                            (etag, last_modified) == (previous["etag"], previous["last_modified"]):
+                        logger.info("⏭ 章节未变化（ETag/Last-Modified），跳过: %s", url)
+                        skipped_chapters += 1
+                        continue
             
-            # 登录系统
-            if not login_to_system(page):
-                log_message("✗ 登录失败，无法继续执行")
-                return
-            
-            for url in PRACTICE_PAGE_URL:
-                # 访问练习页面
-                if not visit_practice_page(page, url):
-                    log_message("✗ 页面访问失败，无法继续执行")
+                # 获取练习页面：HTTP获取失败时改用浏览器访问
+                html = fetch_practice_html(fetcher, url) if fetcher else None
+                if html is None and not visit_practice_page(page, url):
+                    logger.error("✗ 页面访问失败，无法继续执行")
                     return
-                
+            
+                fingerprint_info = None
+                if incremental:
+                    fingerprint = content_fingerprint(html) if html is not None else chapter_fingerprint(page)
+                    if unchanged_before and fingerprint == previous["fingerprint"]:
+                        logger.info("⏭ 章节内容指纹未变化，跳过: %s", url)
+                        store.save_fingerprint(url, fingerprint, etag, last_modified, pending=0)
+                        skipped_chapters += 1
+                        continue
+                    fingerprint_info = (fingerprint, etag, last_modified)
+            
+                if executor:
+                    # 主线程只取一次HTML快照，解析和保存交给后台线程，随后立即访问下一个章节；
+                    # 复制上下文使后台记录的span带上当前章节标签
+                    if html is None:
+                        html = page_html(page)
+                    job = executor.submit(contextvars.copy_context().run,
+                                          parse_and_save_links, html, url, store, fingerprint_info)
+                    chapter_jobs.append((url, job))
+                    continue
+            
                 # 提取课程链接
-                completed_links, incomplete_links = extract_course_links(page)
-                
+                with span("extraction", backend=EXTRACT_BACKEND if html is None else "html") as tags:
+                    if html is not None:
+                        completed_links, incomplete_links = extract_links_from_html(html, chapter_from_url(url),
+                                                                                    store.run_id)
+                    else:
+                        completed_links, incomplete_links = extract_course_links(page, run=store.run_id)
+                    tags.update(completed=len(completed_links), incomplete=len(incomplete_links))
+            
                 # 保存提取的链接
-                save_to_json(completed_links, incomplete_links)
-                save_to_csv(completed_links, incomplete_links)
-                
+                save_chapter_links(url, completed_links, incomplete_links, store, fingerprint_info)
+                self.chapter_links[url] = (completed_links, incomplete_links)
+            
                 # 处理未完成的链接
                 if incomplete_links:
                     process_incomplete_links(page, incomplete_links)
-            
+        
+            # 流水线模式：所有章节列表读取完后，按章节顺序处理未完成的链接
+            for url, job in chapter_jobs:
+                set_tags(chapter=chapter_from_url(url))
+                completed_links, incomplete_links = job.result()
+                self.chapter_links[url] = (completed_links, incomplete_links)
+                if incomplete_links:
+                    process_incomplete_links(page, incomplete_links)
+        
             # 输出总结信息
-            log_message("\n=== 提取结果总结 ===")
-            log_message(f"已完成的学习项目: {len(completed_links)} 个")
-            log_message(f"未完成的学习项目: {len(incomplete_links)} 个")
-            log_message(f"总共提取的链接: {len(completed_links) + len(incomplete_links)} 个")
-            log_message(f"数据已保存到: {OUTPUT_JSON_FILE} 和 {OUTPUT_CSV_FILE}")
-            
-        except Exception as e:
-            log_message(f"✗ 自动化流程发生严重错误: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.info("\n=== 提取结果总结 ===")
+            logger.info(f"已完成的学习项目: {len(completed_links)} 个")
+            logger.info(f"未完成的学习项目: {len(incomplete_links)} 个")
+            logger.info(f"总共提取的链接: {len(completed_links) + len(incomplete_links)} 个")
+            logger.info(f"数据已保存到: {OUTPUT_JSON_FILE} 和 {OUTPUT_CSV_FILE}")
+            if incremental:
+                logger.info(f"增量模式跳过的章节: {skipped_chapters}/{len(practice_page_urls)} 个")
+            store.finish_run()
         
+        except Exception as e:
+            logger.error(f"✗ 自动化流程发生严重错误: {e}", exc_info=True)
+            store.finish_run("failed")
+    
         finally:
-            # 等待一段时间以便查看结果
-            log_message("\n等待5秒后关闭浏览器...")
-            time.sleep(5)
-            # 关闭资源
-            if 'page' in locals():
+            clear_tags()
+            if executor:
+                # 等待已提交的解析和保存完成后再关闭运行存储
+                executor.shutdown(wait=True)
+            # 关闭资源（共享的浏览器上下文由调用方负责关闭）
+            if page:
                 page.close()
-            if 'context' in locals():
-                context.close()
-            if 'browser' in locals():
-                browser.close()
-            log_message("✓ 浏览器已关闭")
-
+            if fetcher:
+                fetcher.close()
+            if session:
+                # 等待一段时间以便查看结果
+                logger.info("\n等待5秒后关闭浏览器...")
+                time.sleep(5)
+                session.close()
+                logger.info("✓ 浏览器已关闭")
+            store.close()
 
 
+def main(user_name=None, password=None, incremental=False, context=None, pipelined=None):
+    """
+    主函数：用给定的参数创建Extractor并执行完整的提取和处理流程
+    
+    Args:
+        user_name: 用户名（复用已登录的上下文时不需要）
+        password: 密码
+        incremental: 增量模式，跳过内容指纹与上次运行相同且没有待处理项目的章节
+        context: 已登录的BrowserContext，提供时复用该上下文而不再启动浏览器和登录
+        pipelined: 是否使用预取流水线，默认PIPELINE_PREFETCH
+    
+    Returns:
+        Extractor: 已运行的提取阶段实例
+    """
+    extractor = Extractor(Config(USER_NAME=user_name, PASSWORD=password, INCREMENTAL=incremental),
+                          context=context, pipelined=pipelined)
+    extractor.run()
+    return extractor
 
 if __name__ == "__main__":
     # 运行绿色链接提取测试
     # test_green_links_extraction()
+    # benchmark_green_links_extraction()
+    # benchmark_log_levels()
     
-    main()
\ No newline at end of file
+    setup_logging()
+    Extractor(Config("config.txt")).run()
\ No newline at end of file
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Linux Studio课程页面离线解析模块
+基于标准库html.parser，直接解析page.content()或服务器返回的原始HTML字符串，
+无需逐个元素与浏览器进行IPC往返
+"""
+
+from html.parser import HTMLParser
+from urllib.parse import urlparse, parse_qs, urljoin
+import time
+import hashlib
+from records import LinkInfo
+
+# 站点根地址，用于把相对链接转换为绝对链接（可通过set_site_base_url指向本地测试服务器）
+SITE_BASE_URL = "http://www.linuxstudio.cn"
+
+# 没有结束标签的HTML空元素
+VOID_ELEMENTS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr"
+}
+
+# 开始标签会先结束的p元素（HTML规范中“关闭button作用域内的p元素”的块级元素）
+P_CLOSING_TAGS = {
+    "address", "article", "aside", "blockquote", "details", "dialog", "dir", "div", "dl", "dd", "dt",
+    "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header",
+    "hgroup", "hr", "li", "main", "menu", "nav", "ol", "p", "pre", "section", "summary", "table", "ul"
+}
+
+# 可以省略结束标签的元素：开始标签隐式结束的元素 {开始标签: [(被结束的元素, 向上查找的边界元素), ...]}
+# 服务器返回的原始HTML常省略</li>等结束标签，浏览器解析时会自动补上，这里按同样的规则处理
+IMPLIED_END_TAGS = {
+    "li": [({"li"}, {"ul", "ol", "table"})],
+    "dt": [({"dt", "dd"}, {"dl", "table"})],
+    "dd": [({"dt", "dd"}, {"dl", "table"})],
+    "option": [({"option"}, {"select", "datalist", "optgroup"})],
+    "optgroup": [({"option", "optgroup"}, {"select"})],
+    "tr": [({"tr", "td", "th"}, {"table", "tbody", "thead", "tfoot"})],
+    "td": [({"td", "th"}, {"tr", "table"})],
+    "th": [({"td", "th"}, {"tr", "table"})],
+    "tbody": [({"tbody", "thead", "tfoot", "tr", "td", "th"}, {"table"})],
+    "thead": [({"tbody", "thead", "tfoot", "tr", "td", "th"}, {"table"})],
+    "tfoot": [({"tbody", "thead", "tfoot", "tr", "td", "th"}, {"table"})],
+}
+P_SCOPE_BOUNDARIES = {"button", "table", "td", "th", "caption", "object", "template"}
+
+# 结束标签只在这些边界元素以内查找同名元素，找不到时忽略（不会越过列表或表格结束外层元素）
+END_TAG_BOUNDARIES = {
+    "li": {"ul", "ol", "table"},
+    "dt": {"dl", "table"},
+    "dd": {"dl", "table"},
+    "option": {"select"},
+    "tr": {"table"},
+    "td": {"table"},
+    "th": {"table"},
+    "p": P_SCOPE_BOUNDARIES,
+}
+
+
+class Element:
+    """轻量级DOM节点，只保留提取链接所需的信息"""
+    __slots__ = ("tag", "attrs", "children", "parent")
+
+    def __init__(self, tag, attrs=None, parent=None):
+        self.tag = tag
+        self.attrs = dict(attrs or [])
+        self.children = []
+        self.parent = parent
+
+    def get(self, name, default=None):
+        """获取属性值（对应Playwright的get_attribute）"""
+        return self.attrs.get(name, default)
+
+    def iter(self, tag=None):
+        """按文档顺序遍历所有后代元素（不含自身）"""
+        stack = [child for child in reversed(self.children) if isinstance(child, Element)]
+        while stack:
+            node = stack.pop()
+            if tag is None or node.tag == tag:
+                yield node
+            stack.extend(child for child in reversed(node.children) if isinstance(child, Element))
+
+    def text_content(self):
+        """拼接所有后代文本节点（对应DOM的textContent）"""
+        parts = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                parts.append(node)
+            else:
+                stack.extend(reversed(node.children))
+        return "".join(parts)
+
+
+class DocumentParser(HTMLParser):
+    """把HTML字符串解析为Element树"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Element("#document")
+        self._current = self.root
+
+    def _close_implied(self, closes, boundaries):
+        """结束当前元素向上直到边界元素之间最外层的、标签在closes中的元素（连同其中未结束的元素）"""
+        outermost = None
+        node = self._current
+        while node is not self.root and node.tag not in boundaries:
+            if node.tag in closes:
+                outermost = node
+            node = node.parent
+        if outermost is not None:
+            self._current = outermost.parent
+
+    def handle_starttag(self, tag, attrs):
+        for closes, boundaries in IMPLIED_END_TAGS.get(tag, ()):
+            self._close_implied(closes, boundaries)
+        if tag in P_CLOSING_TAGS:
+            self._close_implied({"p"}, P_SCOPE_BOUNDARIES)
+        element = Element(tag, attrs, self._current)
+        self._current.children.append(element)
+        if tag not in VOID_ELEMENTS:
+            self._current = element
+
+    def handle_startendtag(self, tag, attrs):
+        if tag not in VOID_ELEMENTS:
+            # <li/>等非空元素的自闭合写法按开始标签处理（与浏览器一致）
+            self.handle_starttag(tag, attrs)
+            return
+        element = Element(tag, attrs, self._current)
+        self._current.children.append(element)
+
+    def handle_endtag(self, tag):
+        # 回溯到最近的同名元素，容忍未闭合的标签
+        boundaries = END_TAG_BOUNDARIES.get(tag, ())
+        node = self._current
+        while node is not self.root and node.tag != tag:
+            if node.tag in boundaries:
+                return
+            node = node.parent
+        if node is not self.root:
+            self._current = node.parent
+
+    def handle_data(self, data):
+        self._current.children.append(data)
+
+
+def parse_document(html):
+    """
+    解析HTML字符串
+
+    Args:
+        html: 页面HTML
+
+    Returns:
+        Element: 文档根节点
+    """
+    parser = DocumentParser()
+    parser.feed(html)
+    parser.close()
+    return parser.root
+
+
+def set_site_base_url(base_url):
+    """设置站点根地址（例如本地测试服务器 http://127.0.0.1:8000）"""
+    global SITE_BASE_URL
+    SITE_BASE_URL = base_url.rstrip("/")
+
+
+def site_url(path=""):
+    """
+    拼接站点内页面的绝对地址
+
+    Args:
+        path: 相对站点根目录的路径，例如"user/my_plan.php"
+
+    Returns:
+        str: 绝对URL
+    """
+    return f"{SITE_BASE_URL}/{path.lstrip('/')}"
+
+
+def normalize_href(href):
+    """处理相对路径，按站点根目录解析为绝对路径（包括../和/开头的路径）"""
+    if href.startswith(("http://", "https://")):
+        return href
+    return urljoin(f"{SITE_BASE_URL}/", href)
+
+
+def chapter_from_url(url):
+    """从练习页面URL的chapter参数中取出章节名称，没有该参数时返回URL本身"""
+    return parse_qs(urlparse(url).query).get("chapter", [url])[0]
+
+
+def find_study_list_items(root):
+    """
+    查找#study_content中所有ul下的li元素，顺序与locator("ul").all()→locator("li").all()一致
+
+    Args:
+        root: 文档根节点
+
+    Returns:
+        list: li元素列表
+    """
+    study_content = find_study_content(root)
+    if study_content is None:
+        return []
+
+    list_items = []
+    for ul in study_content.iter("ul"):
+        list_items.extend(ul.iter("li"))
+    return list_items
+
+
+def find_study_content(root):
+    """查找id为study_content的元素，没有时返回None"""
+    return next((el for el in root.iter() if el.get("id") == "study_content"), None)
+
+
+def canonical_markup(node):
+    """
+    把元素子树按固定格式重新序列化：属性按名称排序、实体已解码、文本空白折叠，
+    服务器原始HTML与浏览器page.content()的写法差异（引号、省略的结束标签、缩进）不影响结果
+
+    Args:
+        node: Element节点
+
+    Returns:
+        str: 规范化后的标记
+    """
+    parts = []
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            text = " ".join(item.split())
+            if text:
+                parts.append(text)
+        elif isinstance(item, tuple):
+            parts.append(item[0])
+        else:
+            attrs = "".join(f' {name}="{value or ""}"' for name, value in sorted(item.attrs.items()))
+            parts.append(f"<{item.tag}{attrs}>")
+            if item.tag not in VOID_ELEMENTS:
+                stack.append((f"</{item.tag}>",))
+            stack.extend(reversed(item.children))
+    return "".join(parts)
+
+
+def content_fingerprint(html):
+    """
+    计算章节页面#study_content内容的指纹，只取决于列表内容本身，
+    与页面其他部分（导航、时间戳、令牌）以及获取方式（浏览器或HTTP）无关
+
+    Args:
+        html: 页面HTML（page.content()或服务器原始响应）
+
+    Returns:
+        str: 规范化内容的SHA-256哈希（页面没有#study_content时按整个文档计算）
+    """
+    root = parse_document(html)
+    node = find_study_content(root) or root
+    return hashlib.sha256(canonical_markup(node).encode("utf-8")).hexdigest()
+
+
+def has_blue_check(item):
+    """检查列表项中是否包含蓝色对勾标记"""
+    for font in item.iter("font"):
+        if (font.get("color") or "").lower() == "blue":
+            text = font.text_content().strip()
+            if "✓" in text or "✔" in text:
+                return True
+    return False
+
+
+def parse_course_links(html):
+    """
+    从页面HTML中提取已完成和未完成的课程链接，结果与基于locator的提取方式一致
+
+    Args:
+        html: page.content()返回的页面HTML
+
+    Returns:
+        tuple: (已完成的LinkInfo列表, 未完成的LinkInfo列表)
+    """
+    completed_links = []
+    incomplete_links = []
+    # 同一页面的链接共用一个提取时刻，写入文件时才格式化
+    extraction_time = time.time()
+
+    for index, item in enumerate(find_study_list_items(parse_document(html))):
+        completed = has_blue_check(item)
+        for a_element in item.iter("a"):
+            href = a_element.get("href")
+            if not href:
+                continue
+
+            link_info = LinkInfo(index + 1, normalize_href(href),
+                                 a_element.text_content().strip() or "未知链接文本",
+                                 completed, extraction_time)
+
+            if completed:
+                completed_links.append(link_info)
+            else:
+                incomplete_links.append(link_info)
+
+    return completed_links, incomplete_links
+
+
+def parse_unstudied_course_hrefs(html):
+    """
+    从学习计划页面HTML中提取未学习课程的链接，对应locator("a:has(img[src*='content1.png'])")
+
+    Args:
+        html: my_plan.php页面HTML
+
+    Returns:
+        list: 按文档顺序排列的href原始值（未转换为绝对地址）
+    """
+    hrefs = []
+    for a_element in parse_document(html).iter("a"):
+        if any("content1.png" in (img.get("src") or "") for img in a_element.iter("img")):
+            hrefs.append(a_element.get("href") or "")
+    return hrefs
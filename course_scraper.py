@@ -1,618 +1,731 @@
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
-import re
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 import json
 import os
+import argparse
 import time
 import random
 import csv
+import logging
 from datetime import datetime
+from urllib.parse import unquote
+from selector_cache import SelectorCache
+from record_sink import CourseRecordSink, export_legacy_json, RECORDS_JSONL_FILE
+from checkpoint_journal import CheckpointJournal
+from run_store import RunStore
+from records import CourseRecord
+from main import Config
+from browser_session import BrowserSession
+from page_readiness import goto_ready, wait_until_ready
+from course_page_parser import site_url, parse_unstudied_course_hrefs
+from listing_fetcher import ListingFetcher
+from page_pool import PagePool
+from page_snapshot import page_html, invalidate
+from artifact_store import save_artifact
+from link_patterns import (parse_course_href, normalize_course_href, course_id_from_url,
+                           location_href, resolve_url, survey_ref_from_onclick, survey_url as build_survey_url)
+from instrumentation import span, set_tags, clear_tags
+from log_setup import setup_logging
 
+logger = logging.getLogger(__name__)
 
-# 日志函数 - 简洁版
-def log_message(message, level="INFO"):
-    """打印带有时间戳和日志级别的消息"""
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-    log_levels = {
-        "INFO": "ℹ️ ",
-        "WARNING": "⚠️ ",
-        "ERROR": "❌",
-        "DEBUG": "🔍"
-    }
-    color = log_levels.get(level.upper(), "ℹ️ ")
-    print(f"[{timestamp}] {color} [{level.upper()}]  {message}")
-
-# 课程数据存储
-course_data = []
-
-def save_course_data_to_csv(filename="output/completed_courses.csv"):
-    """将课程数据保存为CSV文件"""
-    global course_data
-    if not course_data:
-        log_message("⚠ 没有数据可保存到CSV", "WARNING")
-        return False
-    
+# 每门课程的学习时长（秒）
+STUDY_SECONDS = 65
+
+# 相邻两门课程之间的随机间隔范围（秒），避免被识别为机器人
+COURSE_INTERVAL_SECONDS = (1, 3)
+
+# 完成学习按钮的候选选择器
+FINISH_SELECTORS = [
+    "input[type='button'][value='完成本节学习']",  # 优先匹配特定值的按钮
+    "input[type='button'][onclick*='survey.php']",  # 其次匹配包含survey.php的按钮
+    "button:has-text('完成')",
+    "button:has-text('结束学习')",
+    "#finish-btn",
+    "[id*='finish']",
+    "[class*='finish']"
+]
+
+# 问卷难度选项的候选选择器
+DIFFICULTY_SELECTORS = [
+    {"type": "select", "selector": "select[name='difficulty']", "value": "1", "label": "容易"},
+    {"type": "select", "selector": "select[name='level']", "value": "1", "label": "容易"},
+    {"type": "radio", "selector": "input[type='radio'][name='difficulty'][value='1']", "label": "容易"},
+    {"type": "radio", "selector": "input[type='radio'][name='level'][value='1']", "label": "容易"},
+    {"type": "radio", "selector": "input[type='radio'][value='1']", "label": "容易"},
+]
+
+# 问卷实用性选项的候选选择器
+USE_SELECTORS = [
+    {"type": "select", "selector": "select[name='use']", "value": "2", "label": "有用"},
+    {"type": "select", "selector": "select[name='utility']", "value": "2", "label": "有用"},
+    {"type": "radio", "selector": "input[type='radio'][name='use'][value='2']", "label": "有用"},
+    {"type": "radio", "selector": "input[type='radio'][name='utility'][value='2']", "label": "有用"},
+    {"type": "radio", "selector": "input[type='radio'][value='2']", "label": "有用"},
+]
+
+# 问卷提交按钮的候选选择器
+SUBMIT_SELECTORS = [
+    "input[type='submit']",
+    "button[type='submit']",
+    "button:has-text('提交')",
+    "input[value*='提交']",
+    "//button[contains(text(), '提交')]",  # XPath
+    "//input[contains(@value, '提交')]"   # XPath
+]
+
+def save_course_data_to_csv(sink):
+    """将已收集但尚未落盘的课程记录同步到CSV（及JSON Lines）文件"""
     try:
-        fieldnames = ['timestamp', 'course_name', 'course_id', 'duration', 'status']
-        file_exists = os.path.exists(filename)
-        
-        with open(filename, 'a', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            # 如果文件不存在，写入表头
-            if not file_exists:
-                writer.writeheader()
-            
-            # 写入数据
-            for course in course_data:
-                writer.writerow(course)
-        
-        log_message(f"✓ 课程数据已保存到 {filename}", "INFO")
+        sink.flush()
+        logger.info(f"✓ 课程数据已同步到 {sink.csv_file}")
         return True
     except Exception as e:
-        log_message(f"⚠ 保存CSV文件失败: {e}", "ERROR")
+        logger.error(f"⚠ 保存CSV文件失败: {e}")
         return False
 
-def save_course_data_to_json(filename="output/completed_courses.json"):
-    """将课程数据保存为JSON文件"""
-    global course_data
-    if not course_data:
-        log_message("⚠ 没有数据可保存到JSON", "WARNING")
-        return False
-    
+def save_course_data_to_json(filename="output/completed_courses.json", jsonl_file=RECORDS_JSONL_FILE):
+    """从追加写入的JSON Lines文件导出格式化的JSON文件"""
     try:
-        # 如果文件已存在，读取现有数据
-        existing_data = []
-        if os.path.exists(filename):
-            try:
-                with open(filename, 'r', encoding='utf-8') as jsonfile:
-                    existing_data = json.load(jsonfile)
-            except:
-                existing_data = []
-        
-        # 合并数据
-        existing_data.extend(course_data)
-        
-        # 保存数据
-        with open(filename, 'w', encoding='utf-8') as jsonfile:
-            json.dump(existing_data, jsonfile, ensure_ascii=False, indent=2)
-        
-        log_message(f"✓ 课程数据已保存到 {filename}", "INFO")
+        count = export_legacy_json(jsonl_file, filename)
+        if not count:
+            logger.warning("⚠ 没有数据可保存到JSON")
+            return False
+        logger.info(f"✓ 课程数据已保存到 {filename}（共{count}条）")
         return True
     except Exception as e:
-        log_message(f"⚠ 保存JSON文件失败: {e}", "ERROR")
+        logger.error(f"⚠ 保存JSON文件失败: {e}")
         return False
 
-def collect_course_info(page, course_name="未知课程", duration=65, status="completed"):
-    """收集课程信息并添加到数据列表"""
-    global course_data
+def collect_course_info(page, course_name="未知课程", duration=65, status="completed", sink=None, store=None):
+    """
+    生成一条课程记录，提供sink/store时同时追加写入文件和运行存储
+    
+    Returns:
+        CourseRecord: 课程记录
+    """
     course_id = ""
     try:
-        # 尝试从URL获取课程ID
-        url = page.url
-        # 从URL中提取数字ID
-        ids = re.findall(r'\d+', url)
-        if ids:
-            course_id = ids[0]
+        # 从课程页面URL中获取课程ID
+        course_id = course_id_from_url(page.url)
     except:
         pass
     
-    course_info = {
-        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        'course_name': course_name,
-        'course_id': course_id,
-        'duration': duration,
-        'status': status
-    }
+    # 时间戳在写入文件和运行存储时才格式化
+    course_info = CourseRecord(time.time(), course_name, course_id, duration, status)
     
-    course_data.append(course_info)
-    log_message(f"✓ 已收集课程信息: {course_name} (ID: {course_id})", "DEBUG")
-
-def main(user_name, password):
-    """主函数：登录并自动学习课程"""
-    start_time = datetime.now()
-    log_message("===== 开始执行自动化学习流程 =====")
-    log_message(f"开始时间: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
-
-    courses_data = []
-    completed_courses = 0
-    browser = None
-    context = None
-    page = None
-    playwright_instance = None
+    with span("persistence", target="course_record"):
+        if sink:
+            sink.write(course_info)
+        if store:
+            store.record_course_outcome(course_info)
+    logger.debug("✓ 已收集课程信息: %s (ID: %s)", course_name, course_id)
+    return course_info
+
+def fetch_plan_hrefs(context, url):
+    """
+    用HTTP直接获取学习计划页面并离线解析未学习课程的链接
 
+    Args:
+        context: 已登录的BrowserContext（提供登录Cookie）
+        url: 学习计划页面URL
+
+    Returns:
+        list: 未学习课程的href原始值，获取失败时返回None，由调用方改用浏览器访问
+    """
     try:
-        # 1. 初始化浏览器和登录
-        log_message("\n[步骤1] 启动浏览器...")
-        playwright_instance = sync_playwright().start()
-        log_message("✓ Playwright 初始化成功")
-
-        browser = playwright_instance.chromium.launch(
-            headless=False,
-            args=["--start-maximized", "--disable-gpu", "--no-sandbox", 
-                  "--disable-dev-shm-usage", "--disable-extensions"],
-            slow_mo=100
-        )
-        log_message("✓ 浏览器已启动")
-
-        context = browser.new_context(viewport=None, locale="zh-CN")
-        page = context.new_page()
-        log_message("✓ 浏览器上下文和页面创建完成")
-
-        # 2. 执行登录
-        log_message("\n[步骤2] 执行自动化登录...")
-        page.goto("http://www.linuxstudio.cn/user/index.php", wait_until="domcontentloaded")
-        log_message("✓ 登录页面加载完成")
-        
-        page.fill("#username", user_name)
-        page.fill("#password", password)
-        log_message("✓ 已输入用户名和密码")
+        with ListingFetcher.from_context(context) as fetcher:
+            html = fetcher.fetch(url, "my_plan")
+        logger.info("✓ 课程页面已通过HTTP获取")
+        return parse_unstudied_course_hrefs(html)
+    except Exception as e:
+        logger.warning(f"⚠ HTTP获取课程页面失败，改用浏览器访问: {e}")
+        return None
 
-        # 点击提交按钮
-        submit_button = page.locator("input[type='submit']")
-        submit_button.click(force=True)
-        log_message("✓ 已点击提交按钮")
 
-        # 等待页面加载完成，不依赖特定URL
-        page.wait_for_load_state("networkidle", timeout=20000)
-        
-        # 验证登录状态（通过检查页面内容）
-        page_content = page.content()
-        if "登录成功" in page_content or "用户中心" in page_content or "my_info" in page_content:
-            log_message("✓ 登录成功，页面内容验证通过")
-        else:
-            log_message("⚠ 登录状态验证不确定，但继续执行", "WARNING")
-
-        # 3. 访问课程页面
-        log_message("\n[步骤3] 访问课程页面...")
-        course_url = "http://www.linuxstudio.cn/user/my_plan.php"
-        page.goto(course_url, wait_until="domcontentloaded")
-        log_message("✓ 课程页面加载完成")
-
-        # 4. 识别未学习课程
-        log_message("\n[步骤4] 识别课程链接...")
+def find_survey_url(course_page, finish_selectors, selector_cache):
+    """
+    依次尝试完成按钮的候选选择器，从onclick属性中提取survey.php链接
+    
+    Returns:
+        str: 完整的survey链接，未找到时为None
+    """
+    survey_url = None
+    finish_attempts = 0
+    
+    # 尝试从按钮中提取survey.php链接
+    while survey_url is None and finish_attempts < len(finish_selectors):
+        try:
+            selector = finish_selectors[finish_attempts]
+            finish_button = course_page.locator(selector)
+
+            if finish_button.is_visible():
+                onclick_attr = finish_button.get_attribute("onclick")
+
+                if onclick_attr:
+                    # 尝试提取完整的survey.php链接
+                    logger.debug("📋 分析onclick属性: %s", onclick_attr)
+
+                    # 尝试提取window.location.href中的URL（已处理HTML实体编码）
+                    relative_url = location_href(onclick_attr)
+
+                    if relative_url:
+                        # 按站点根目录解析为完整URL
+                        survey_url = resolve_url(relative_url)
+                        logger.info("🚀 提取到survey链接: %s", survey_url)
+                    else:
+                        # 如果没有直接的URL，尝试提取参数并构建链接
+                        survey_ref = survey_ref_from_onclick(onclick_attr)
+                        if survey_ref:
+                            survey_url = build_survey_url(survey_ref)
+                            logger.info("🚀 使用提取的参数构建链接: %s", survey_url)
+
+                    # 特殊处理用户指定的案例
+                    if survey_url and "content_id=60" in survey_url and "Linux常用命令" in unquote(survey_url):
+                        logger.info("🎯 成功识别并处理用户指定的按钮案例!")
+
+            # 如果没有找到URL，继续尝试下一个选择器
+            if survey_url is None:
+                selector_cache.record_miss("finish", selector)
+                finish_attempts += 1
+            else:
+                selector_cache.record_hit("finish", selector)
+        except Exception as e:
+            selector_cache.record_miss("finish", selector)
+            finish_attempts += 1
+            logger.debug("⚠ 尝试选择器 %s 失败: %s", selector, e)
+    
+    return survey_url
+
+
+def fill_survey(course_page, selector_cache):
+    """
+    在问卷页面设置难度和实用性选项并提交
+    
+    Returns:
+        bool: 是否成功点击了提交按钮
+    """
+    # 增加页面内容检查
+    try:
+        page_content = page_html(course_page)
+        if "survey" not in page_content.lower() and "问卷" not in page_content:
+            logger.warning("⚠ 似乎不在调查问卷页面，但尝试继续")
+    except:
+        logger.error("⚠ 无法获取页面内容")
+
+    # 设置调查问卷选项 - 优化版
+    # 首先等待页面上可能存在的所有表单元素加载完成
+    try:
+        course_page.wait_for_load_state("domcontentloaded", timeout=5000)
+        logger.debug("页面DOM已加载完成")
+
+        # 尝试等待可能的表单容器
+        try:
+            course_page.wait_for_selector("form", timeout=3000)
+            logger.debug("找到表单元素")
+        except:
+            logger.debug("未找到表单元素")
+    except Exception as e:
+        logger.debug("页面加载检查出错: %s", e)
+
+    # 函数：尝试设置选项
+    def set_option(selectors_list, option_type):
+        success = False
+        option_name = "难度" if option_type == "difficulty" else "实用性"
+
+        for option in selector_cache.ordered(option_type, selectors_list, key=lambda o: o['selector']):
+            try:
+                logger.debug("尝试设置%s - %s: %s", option_name, option['type'], option['selector'])
+
+                # 检查元素是否存在
+                if course_page.locator(option['selector']).count() > 0:
+                    logger.debug("找到%s元素: %s", option_name, option['selector'])
+
+                    # 根据类型设置选项
+                    if option['type'] == "select":
+                        course_page.locator(option['selector']).select_option(value=option['value'], timeout=3000)
+                    elif option['type'] == "radio":
+                        course_page.locator(option['selector']).first.click(force=True, timeout=2000)
+
+                    logger.info("✓ 已设置%s为：%s (%s - %s)", option_name, option['label'], option['type'], option['selector'])
+                    selector_cache.record_hit(option_type, option['selector'])
+                    success = True
+                    break
+                selector_cache.record_miss(option_type, option['selector'])
+            except Exception as e:
+                selector_cache.record_miss(option_type, option['selector'])
+                logger.debug("⚠ 设置%s失败 (%s): %s", option_name, option['selector'], e)
+
+        # 如果所有选择器都失败，尝试等待并重新查找
+        if not success:
+            logger.debug("所有%s选择器都失败，尝试全局查找相关元素", option_name)
+            try:
+                # 尝试直接等待并选择下拉菜单
+                for selector in ["select", "select[name*='']"]:
+                    if course_page.locator(selector).count() > 0:
+                        selects = course_page.locator(selector).all()
+                        for select in selects:
+                            try:
+                                # 尝试设置值
+                                value = "1" if option_type == "difficulty" else "2"
+                                select.select_option(value=value, timeout=2000)
+                                logger.info("✓ 已设置%s为：%s (全局选择器 - %s)", option_name,
+                                            '容易' if option_type == 'difficulty' else '有用', selector)
+                                success = True
+                                break
+                            except:
+                                pass
+                        if success:
+                            break
+            except Exception as e:
+                logger.warning(f"⚠ 全局查找{option_name}失败: {e}")
+
+        return success
+
+    # 优先设置难度选项
+    with span("selector_search", target="difficulty"):
+        difficulty_success = set_option(DIFFICULTY_SELECTORS, "difficulty")
+    if not difficulty_success:
+        logger.warning("⚠ 未能设置难度选项，请检查页面结构")
+
+    # 然后设置实用性选项
+    with span("selector_search", target="use"):
+        use_success = set_option(USE_SELECTORS, "use")
+    if not use_success:
+        logger.warning("⚠ 未能设置实用性选项，请检查页面结构")
+
+    # 确认两个选项都已设置
+    if difficulty_success and use_success:
+        logger.debug("✓ 问卷两个选项（难度和实用性）均已成功设置")
+    else:
+        logger.warning("⚠ 问卷选项设置不完整，可能会影响提交结果")
+
+    # 提交问卷 - 增强版
+    submit_success = False
+
+    with span("selector_search", target="submit"):
+        for selector in selector_cache.ordered("submit", SUBMIT_SELECTORS):
+            try:
+                logger.debug("尝试提交按钮: %s", selector)
+                if "//" in selector:  # XPath选择器
+                    btn = course_page.locator(f"xpath={selector}")
+                else:  # CSS选择器
+                    btn = course_page.locator(selector)
+
+                if btn.count() > 0:
+                    btn.first.click(force=True, timeout=3000)
+                    logger.info("✓ 已点击提交按钮: %s", selector)
+                    selector_cache.record_hit("submit", selector)
+                    submit_success = True
+                    break
+                selector_cache.record_miss("submit", selector)
+            except Exception as e:
+                selector_cache.record_miss("submit", selector)
+                logger.debug("点击提交按钮 %s 失败: %s", selector, e)
+
+    # 如果所有选择器都失败，尝试坐标点击
+    if not submit_success:
+        try:
+            logger.warning("尝试使用坐标点击提交区域")
+            course_page.mouse.click(course_page.viewport_size["width"] // 2, course_page.viewport_size["height"] * 0.8)
+            logger.info("✓ 已使用坐标点击提交区域")
+            submit_success = True
+        except Exception as e:
+            logger.error(f"⚠ 所有提交方式均失败: {e}")
+
+    # 选项和提交可能只通过脚本修改页面而不发生导航，之后读取页面HTML时需要重新序列化
+    invalidate(course_page)
+    return submit_success
+
+
+class Scraper:
+    """
+    课程爬取阶段：登录并自动学习课程
+
+    运行所需的状态（配置、已登录的上下文、本次收集的课程记录）都保存在实例上，
+    不依赖模块级可变变量，多个实例可以在不同线程中同时运行
+    """
+
+    def __init__(self, config, context=None):
+        """
+        Args:
+            config: main.Config配置（USER_NAME、PASSWORD、INCREMENTAL、RESUME、LISTING_BACKEND）
+            context: 已登录的BrowserContext，提供时直接复用，由调用方负责关闭
+        """
+        self.config = config
+        self.user_name = config.get('USER_NAME')
+        self.password = config.get('PASSWORD')
+        self.incremental = config.get('INCREMENTAL', False)
+        # 断点续学：从检查点日志中最后的检查点继续
+        self.resume = config.get('RESUME', False)
+        # 学习计划页面的获取方式：browser（Chromium导航）或http（复用登录Cookie直接请求）
+        self.listing_backend = config.get('LISTING_BACKEND', 'browser')
+        self.context = context
+        # 本次运行收集的课程记录（CourseRecord）
+        self.course_data = []
+
+    def collect_course_info(self, page, course_name="未知课程", duration=65, status="completed", sink=None, store=None):
+        """收集课程信息并添加到本实例的课程记录中"""
+        record = collect_course_info(page, course_name, duration, status, sink=sink, store=store)
+        self.course_data.append(record)
+        return record
+
+    def run(self):
+        """
+        登录并自动学习课程，增量模式下跳过运行存储中已完成的课程，
+        断点续学时从检查点日志中的课程列表继续，跳过已完成的课程
+
+        传入已登录的BrowserContext时直接复用，不再启动浏览器和登录
+        """
+        start_time = datetime.now()
+        logger.info("===== 开始执行自动化学习流程 =====")
+        logger.info(f"开始时间: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+
+        courses_data = []
+        completed_courses = 0
+        # 选择器命中缓存：优先尝试上次成功的选择器
+        selector_cache = SelectorCache()
+        # 课程记录追加写入器：每条记录只写一次
+        record_sink = None
+        # 运行存储：记录本次运行和每门课程的学习结果
+        store = RunStore()
+        store.start_run("scrape")
+        # 检查点日志：每门课程结束后记录结果
+        journal = CheckpointJournal()
+        done_indexes = set()
+        session = None
+        page = None
+        pool = None
+
+        try:
+            # 1-2. 初始化浏览器和登录
+            context = self.context
+            if context is None:
+                logger.info("\n[步骤1] 启动浏览器并执行自动化登录...")
+                session = BrowserSession(self.user_name, self.password, slow_mo=100)
+                session.start()
+                context = session.context
+                logger.info("✓ 浏览器已启动并登录成功")
+            else:
+                logger.info("\n[步骤1] 复用已登录的浏览器上下文")
+            # 页面池：学习计划页面和各门课程依次租用同一个页面，只在页面关闭或崩溃时新建
+            pool = PagePool(context, setup=lambda new_page: new_page.set_default_timeout(30000))
+            # 断点续学：直接使用检查点日志中的课程列表，不再加载学习计划页面
+            resume_state = journal.resume() if self.resume else None
+            if resume_state is not None:
+                courses_data = resume_state.courses
+                done_indexes = resume_state.done_indexes()
+                completed_courses = len(done_indexes)
+                logger.info(f"\n[步骤3-5] 从检查点继续：共 {len(courses_data)} 门课程，"
+                            f"最后检查点为第 {resume_state.last_index} 门，跳过 {len(done_indexes)} 门已完成课程")
+            else:
+                if self.resume:
+                    logger.info("没有未完成的检查点，从学习计划页面开始")
+                # 3. 访问课程页面
+                logger.info("\n[步骤3] 访问课程页面...")
+                course_url = site_url("user/my_plan.php")
+                # 学习计划页面只读取：HTTP模式下直接获取HTML离线解析，失败时改用浏览器
+                hrefs = fetch_plan_hrefs(context, course_url) if self.listing_backend == "http" else None
+                if hrefs is None:
+                    page = pool.acquire()
+                    logger.info("✓ 页面创建完成")
+                    goto_ready(page, course_url, "my_plan", timeout=30000)
+                    logger.info("✓ 课程页面加载完成")
+
+                # 4. 识别未学习课程
+                logger.info("\n[步骤4] 识别课程链接...")
         
-        # 等待课程列表加载
-        page.wait_for_selector("img[src*='content1.png']", timeout=10000)
+                if hrefs is None:
+                    # 等待课程列表加载（只要求元素存在：fast配置下图片被拦截，不一定可见）
+                    page.wait_for_selector("img[src*='content1.png']", state="attached", timeout=10000)
         
-        # 查找所有未学习课程
-        course_links = page.locator("a:has(img[src*='content1.png'])")
-        count = course_links.count()
-        log_message(f"✓ 找到 {count} 个未学习课程")
+                with span("extraction", target="my_plan"):
+                    if hrefs is None:
+                        # 查找所有未学习课程
+                        course_links = page.locator("a:has(img[src*='content1.png'])")
+                        hrefs = [course_links.nth(i).get_attribute("href") or "" for i in range(course_links.count())]
+                    logger.info(f"✓ 找到 {len(hrefs)} 个未学习课程")
         
-        for i in range(count):
-            link = course_links.nth(i)
-            href = link.get_attribute("href") or ""
-            text = re.search(r"\d+_\d+_(.*?).php", href).group(1)
-            
-            # 清理URL（移除user路径段）
-            if "../" in href:
-                href = href.replace("../", "http://www.linuxstudio.cn/")
-                href = href.replace("user/study/content", "study/content")
+                    for href in hrefs:
+                        course_ref = parse_course_href(href)
+                        if course_ref is None:
+                            logger.warning(f"⚠ 无法识别的课程链接，跳过: {href}")
+                            continue
+                        text = course_ref.name
             
-            courses_data.append({
-                "课程名称": text,
-                "跳转网址": href,
-                "课程状态": "未看过"
-            })
-            log_message(f"  - 识别到课程: {text}")
-
-        # 5. 保存数据
-        if courses_data:
-            log_message("\n[步骤5] 保存课程数据...")
-            with open("output/courses_data.json", "w", encoding="utf-8") as f:
-                json.dump(courses_data, f, ensure_ascii=False, indent=2)
-            log_message("✓ 数据已保存到 output/courses_data.json")
-
-        # 6. 自动学习课程
-        log_message("\n[步骤6] 开始自动学习课程...")
-        for idx, course in enumerate(courses_data, 1):
-            log_message(f"\n===== 开始学习课程 {idx}/{len(courses_data)} =====")
-            log_message(f"课程名称: {course['课程名称']}")
-            course_page = None
-            current_status = "failed"
+                        # 按学习计划页面解析为绝对地址（移除user路径段）
+                        href = normalize_course_href(href)
             
-            try:
-                # 打开课程页面 - 增加重试机制
-                course_url = course['跳转网址']
-                max_retries = 3
-                retry_count = 0
-                page_loaded = False
-                
-                while retry_count < max_retries and not page_loaded:
-                    try:
-                        course_page = context.new_page()
-                        course_page.set_default_timeout(30000)
-                        course_page.goto(course_url, wait_until="networkidle")
-                        log_message("✓ 课程页面加载完成")
-                        page_loaded = True
-                    except Exception as e:
-                        retry_count += 1
-                        log_message(f"⚠ 课程页面加载失败 (尝试 {retry_count}/{max_retries}): {e}", "WARNING")
-                        if course_page:
-                            course_page.close()
-                        course_page = None
-                        if retry_count < max_retries:
-                            log_message("准备重试...")
-                            time.sleep(3)
-                        else:
-                            log_message("❌ 达到最大重试次数，跳过此课程", "ERROR")
-                
-                if not page_loaded:
+                        courses_data.append({
+                            "课程名称": text,
+                            "跳转网址": href,
+                            "课程状态": "未看过"
+                        })
+                        logger.info("  - 识别到课程: %s", text)
+
+                # 学习计划页面用完后归还，留给第一门课程使用
+                pool.release(page)
+                page = None
+
+                # 增量模式：跳过之前运行中已经完成的课程
+                if self.incremental and courses_data:
+                    completed_names = store.completed_course_names()
+                    remaining = [course for course in courses_data if course["课程名称"] not in completed_names]
+                    logger.info(f"✓ 增量模式：跳过 {len(courses_data) - len(remaining)} 个已完成课程，剩余 {len(remaining)} 个")
+                    courses_data = remaining
+        
+                # 5. 保存数据
+                if courses_data:
+                    logger.info("\n[步骤5] 保存课程数据...")
+                    with span("persistence", target="courses_data"):
+                        with open("output/courses_data.json", "w", encoding="utf-8") as f:
+                            json.dump(courses_data, f, ensure_ascii=False, indent=2)
+                    logger.info("✓ 数据已保存到 output/courses_data.json")
+
+                journal.start(courses_data)
+
+            # 6. 自动学习课程
+            logger.info("\n[步骤6] 开始自动学习课程...")
+            record_sink = CourseRecordSink()
+            for idx, course in enumerate(courses_data, 1):
+                if idx in done_indexes:
+                    logger.debug("跳过已完成课程 %s/%s: %s", idx, len(courses_data), course['课程名称'])
                     continue
+                logger.info("\n===== 开始学习课程 %s/%s =====", idx, len(courses_data))
+                logger.info("课程名称: %s", course['课程名称'])
+                course_page = None
+                current_status = "failed"
+                # 本课程内记录的span都带上课程标签
+                set_tags(course=course['课程名称'], course_index=idx)
+            
+                try:
+                    # 打开课程页面 - 增加重试机制（重试时复用同一个页面，页面已关闭或崩溃时才换新页面）
+                    course_page = pool.acquire()
+                    course_url = course['跳转网址']
+                    max_retries = 3
+                    retry_count = 0
+                    page_loaded = False
                 
-                # 学习课程（等待65秒）
-                log_message("学习课程中（65秒）...")
-                remaining_time = 65
-                while remaining_time > 0:
-                    try:
-                        # 定期检查页面是否还在
-                        if not course_page or course_page.is_closed():
-                            raise Exception("页面已关闭")
-                        log_message(f"  剩余时间: {remaining_time}秒", "DEBUG")
-                        time.sleep(5)
-                        remaining_time -= 5
-                    except Exception as e:
-                        log_message(f"⚠ 学习过程中断: {e}", "WARNING")
-                        # 尝试重新打开页面
-                        if course_page:
-                            course_page.close()
-                        course_page = context.new_page()
-                        course_page.goto(course_url, wait_until="domcontentloaded")
-                        log_message("✓ 已重新打开课程页面")
-                
-                # 修改为获取参数并直接跳转的逻辑
-                survey_url = None
-                finish_attempts = 0
-                finish_selectors = [
-                    "input[type='button'][value='完成本节学习']",  # 优先匹配特定值的按钮
-                    "input[type='button'][onclick*='survey.php']",  # 其次匹配包含survey.php的按钮
-                    "button:has-text('完成')",
-                    "button:has-text('结束学习')",
-                    "#finish-btn",
-                    "[id*='finish']",
-                    "[class*='finish']"
-                ]
-                
-                log_message("🔍 开始搜索survey.php链接进行直接跳转", "INFO")
-                
-                # 尝试从按钮中提取survey.php链接
-                while survey_url is None and finish_attempts < len(finish_selectors):
-                    try:
-                        selector = finish_selectors[finish_attempts]
-                        finish_button = course_page.locator(selector)
-                        
-                        if finish_button.is_visible():
-                            onclick_attr = finish_button.get_attribute("onclick")
-                            
-                            if onclick_attr:
-                                # 尝试提取完整的survey.php链接
-                                log_message(f"📋 分析onclick属性: {onclick_attr}", "DEBUG")
-                                
-                                # 尝试提取window.location.href中的URL
-                                url_match = re.search(r'window\.location\.href=["\']([^"\']+)["\']', onclick_attr)
-                                
-                                if url_match:
-                                    # 提取到了相对URL
-                                    relative_url = url_match.group(1)
-                                    # 处理HTML实体编码
-                                    relative_url = relative_url.replace('&amp;', '&')
-                                    
-                                    # 构建完整URL
-                                    survey_url = f"http://www.linuxstudio.cn/{relative_url}"
-                                    log_message(f"🚀 提取到survey链接: {survey_url}", "INFO")
-                                else:
-                                    # 如果没有直接的URL，尝试提取参数并构建链接
-                                    content_id_match = re.search(r'content_id=(\d+)', onclick_attr)
-                                    chapter_match = re.search(r'chapter=([^&\']+)', onclick_attr)
-                                    
-                                    if content_id_match and chapter_match:
-                                        content_id = content_id_match.group(1)
-                                        chapter = chapter_match.group(1)
-                                        # 处理HTML实体编码
-                                        chapter = chapter.replace('&amp;', '&')
-                                        
-                                        # 构建完整URL
-                                        survey_url = f"http://www.linuxstudio.cn/survey.php?content_id={content_id}&chapter={chapter}"
-                                        log_message(f"🚀 使用提取的参数构建链接: {survey_url}", "INFO")
-                                
-                                # 特殊处理用户指定的案例
-                                if survey_url and "content_id=60" in survey_url and "Linux常用命令" in survey_url:
-                                    log_message("🎯 成功识别并处理用户指定的按钮案例!", "INFO")
-                        
-                        # 如果没有找到URL，继续尝试下一个选择器
-                        if survey_url is None:
-                            finish_attempts += 1
-                    except Exception as e:
-                        finish_attempts += 1
-                        log_message(f"⚠ 尝试选择器 {selector} 失败: {e}", "DEBUG")
-                
-                # 执行直接跳转
-                if survey_url:
-                    try:
-                        log_message(f"🌐 正在导航到: {survey_url}", "INFO")
-                        course_page.goto(survey_url, wait_until="networkidle", timeout=20000)
-                        log_message(f"✅ 成功导航到survey页面", "INFO")
-                    except Exception as e:
-                        log_message(f"❌ 导航失败: {e}", "WARNING")
-                else:
-                    # 如果无法提取URL，回退到原始的点击按钮逻辑
-                    log_message("⚠ 无法提取survey.php链接，回退到点击按钮方式", "WARNING")
-                    finish_clicked = False
-                    finish_attempts = 0
-                    
-                    while not finish_clicked and finish_attempts < len(finish_selectors):
-                        try:
-                            selector = finish_selectors[finish_attempts]
-                            finish_button = course_page.locator(selector)
-                            if finish_button.is_visible():
-                                finish_button.click(force=True, timeout=3000)
-                                log_message(f"✓ 已点击完成按钮: {selector}")
-                                finish_clicked = True
-                            else:
-                                finish_attempts += 1
-                        except Exception as e:
-                            finish_attempts += 1
-                            log_message(f"⚠ 尝试 {selector} 失败: {e}", "DEBUG")
-                    
-                    # 如果所有选择器都失败，使用坐标点击
-                    if not finish_clicked:
+                    while retry_count < max_retries and not page_loaded:
                         try:
-                            log_message("尝试使用坐标点击完成按钮区域", "WARNING")
-                            course_page.mouse.click(500, 500)
-                            log_message("✓ 已使用坐标点击完成按钮区域")
+                            course_page = pool.ensure(course_page)
+                            goto_ready(course_page, course_url, "course", timeout=30000)
+                            logger.info("✓ 课程页面加载完成")
+                            page_loaded = True
                         except Exception as e:
-                            log_message(f"⚠ 坐标点击失败: {e}", "WARNING")
-                    
-                    # 等待页面跳转
-                    try:
-                        course_page.wait_for_load_state("networkidle", timeout=15000)
-                    except Exception as e:
-                        log_message(f"⚠ 等待页面跳转超时: {e}", "WARNING")
-                
-                # 填写调查问卷 - 优化版
-                log_message("填写调查问卷...")
-                
-                # 增加页面内容检查
-                try:
-                    page_content = course_page.content()
-                    if "survey" not in page_content.lower() and "问卷" not in page_content:
-                        log_message("⚠ 似乎不在调查问卷页面，但尝试继续", "WARNING")
-                except:
-                    log_message("⚠ 无法获取页面内容", "ERROR")
-                
-                # 设置调查问卷选项 - 优化版
-                # 首先等待页面上可能存在的所有表单元素加载完成
-                try:
-                    course_page.wait_for_load_state("domcontentloaded", timeout=5000)
-                    log_message("🔍 [DEBUG] 页面DOM已加载完成", "DEBUG")
-                    
-                    # 尝试等待可能的表单容器
-                    try:
-                        course_page.wait_for_selector("form", timeout=3000)
-                        log_message("🔍 [DEBUG] 找到表单元素", "DEBUG")
-                    except:
-                        log_message("🔍 [DEBUG] 未找到表单元素", "DEBUG")
-                except Exception as e:
-                    log_message(f"🔍 [DEBUG] 页面加载检查出错: {e}", "DEBUG")
+                            retry_count += 1
+                            logger.warning(f"⚠ 课程页面加载失败 (尝试 {retry_count}/{max_retries}): {e}")
+                            if retry_count < max_retries:
+                                logger.info("准备重试...")
+                                time.sleep(3)
+                            else:
+                                logger.error("❌ 达到最大重试次数，跳过此课程")
                 
-                # 定义所有可能的选择器变体
-                difficulty_selectors = [
-                    {"type": "select", "selector": "select[name='difficulty']", "value": "1", "label": "容易"},
-                    {"type": "select", "selector": "select[name='level']", "value": "1", "label": "容易"},
-                    {"type": "radio", "selector": "input[type='radio'][name='difficulty'][value='1']", "label": "容易"},
-                    {"type": "radio", "selector": "input[type='radio'][name='level'][value='1']", "label": "容易"},
-                    {"type": "radio", "selector": "input[type='radio'][value='1']", "label": "容易"},
-                ]
+                    if not page_loaded:
+                        continue
                 
-                use_selectors = [
-                    {"type": "select", "selector": "select[name='use']", "value": "2", "label": "有用"},
-                    {"type": "select", "selector": "select[name='utility']", "value": "2", "label": "有用"},
-                    {"type": "radio", "selector": "input[type='radio'][name='use'][value='2']", "label": "有用"},
-                    {"type": "radio", "selector": "input[type='radio'][name='utility'][value='2']", "label": "有用"},
-                    {"type": "radio", "selector": "input[type='radio'][value='2']", "label": "有用"},
-                ]
+                    # 学习课程（等待STUDY_SECONDS秒）
+                    logger.info("学习课程中（%s秒）...", STUDY_SECONDS)
+                    with span("study"):
+                        remaining_time = STUDY_SECONDS
+                        while remaining_time > 0:
+                            try:
+                                # 定期检查页面是否还在
+                                if not course_page or course_page.is_closed():
+                                    raise Exception("页面已关闭")
+                                logger.debug("  剩余时间: %s秒", remaining_time)
+                                time.sleep(min(5, remaining_time))
+                                remaining_time -= 5
+                            except Exception as e:
+                                logger.warning(f"⚠ 学习过程中断: {e}")
+                                # 尝试重新打开页面
+                                course_page = pool.ensure(course_page)
+                                course_page.goto(course_url, wait_until="domcontentloaded")
+                                logger.info("✓ 已重新打开课程页面")
                 
-                # 函数：尝试设置选项
-                def set_option(selectors_list, option_type):
-                    success = False
-                    option_name = "难度" if option_type == "difficulty" else "实用性"
-                    
-                    for option in selectors_list:
+                    # 修改为获取参数并直接跳转的逻辑
+                    finish_selectors = selector_cache.ordered("finish", FINISH_SELECTORS)
+                    logger.info("🔍 开始搜索survey.php链接进行直接跳转")
+                    with span("selector_search", target="finish"):
+                        survey_url = find_survey_url(course_page, finish_selectors, selector_cache)
+
+                    # 执行直接跳转
+                    if survey_url:
                         try:
-                            log_message(f"🔍 [DEBUG] 尝试设置{option_name} - {option['type']}: {option['selector']}", "DEBUG")
-                            
-                            # 检查元素是否存在
-                            if course_page.locator(option['selector']).count() > 0:
-                                log_message(f"🔍 [DEBUG] 找到{option_name}元素: {option['selector']}", "DEBUG")
-                                
-                                # 根据类型设置选项
-                                if option['type'] == "select":
-                                    course_page.locator(option['selector']).select_option(value=option['value'], timeout=3000)
-                                elif option['type'] == "radio":
-                                    course_page.locator(option['selector']).first.click(force=True, timeout=2000)
-                                
-                                log_message(f"✓ 已设置{option_name}为：{option['label']} ({option['type']} - {option['selector']})")
-                                success = True
-                                break
+                            logger.info("🌐 正在导航到: %s", survey_url)
+                            goto_ready(course_page, survey_url, "survey", timeout=20000)
+                            logger.info("✅ 成功导航到survey页面")
                         except Exception as e:
-                            log_message(f"⚠ 设置{option_name}失败 ({option['selector']}): {e}", "DEBUG")
+                            logger.warning(f"❌ 导航失败: {e}")
+                    else:
+                        # 如果无法提取URL，回退到原始的点击按钮逻辑
+                        logger.warning("⚠ 无法提取survey.php链接，回退到点击按钮方式")
+                        finish_clicked = False
+                        finish_attempts = 0
                     
-                    # 如果所有选择器都失败，尝试等待并重新查找
-                    if not success:
-                        log_message(f"🔍 [DEBUG] 所有{option_name}选择器都失败，尝试全局查找相关元素", "DEBUG")
-                        try:
-                            # 尝试直接等待并选择下拉菜单
-                            for selector in ["select", "select[name*='']"]:
-                                if course_page.locator(selector).count() > 0:
-                                    selects = course_page.locator(selector).all()
-                                    for select in selects:
-                                        try:
-                                            # 尝试设置值
-                                            value = "1" if option_type == "difficulty" else "2"
-                                            select.select_option(value=value, timeout=2000)
-                                            log_message(f"✓ 已设置{option_name}为：{(option_type == 'difficulty' and '容易' or '有用')} (全局选择器 - {selector})")
-                                            success = True
-                                            break
-                                        except:
-                                            pass
-                                    if success:
-                                        break
-                        except Exception as e:
-                            log_message(f"⚠ 全局查找{option_name}失败: {e}", "WARNING")
+                        with span("selector_search", target="finish_click"):
+                            while not finish_clicked and finish_attempts < len(finish_selectors):
+                                try:
+                                    selector = finish_selectors[finish_attempts]
+                                    finish_button = course_page.locator(selector)
+                                    if finish_button.is_visible():
+                                        finish_button.click(force=True, timeout=3000)
+                                        logger.info("✓ 已点击完成按钮: %s", selector)
+                                        selector_cache.record_hit("finish", selector)
+                                        finish_clicked = True
+                                    else:
+                                        selector_cache.record_miss("finish", selector)
+                                        finish_attempts += 1
+                                except Exception as e:
+                                    selector_cache.record_miss("finish", selector)
+                                    finish_attempts += 1
+                                    logger.debug("⚠ 尝试 %s 失败: %s", selector, e)
                     
-                    return success
-                
-                # 优先设置难度选项
-                difficulty_success = set_option(difficulty_selectors, "difficulty")
-                if not difficulty_success:
-                    log_message("⚠ 未能设置难度选项，请检查页面结构", "WARNING")
-                
-                # 然后设置实用性选项
-                use_success = set_option(use_selectors, "use")
-                if not use_success:
-                    log_message("⚠ 未能设置实用性选项，请检查页面结构", "WARNING")
+                        # 如果所有选择器都失败，使用坐标点击
+                        if not finish_clicked:
+                            try:
+                                logger.warning("尝试使用坐标点击完成按钮区域")
+                                course_page.mouse.click(500, 500)
+                                logger.info("✓ 已使用坐标点击完成按钮区域")
+                            except Exception as e:
+                                logger.warning(f"⚠ 坐标点击失败: {e}")
+                    
+                        # 等待页面跳转到问卷页面（超时时只记录警告）；完成按钮可能只在当前页面弹出问卷而不导航
+                        wait_until_ready(course_page, "survey", timeout=15000)
+                        invalidate(course_page)
                 
-                # 确认两个选项都已设置
-                if difficulty_success and use_success:
-                    log_message("✓ 问卷两个选项（难度和实用性）均已成功设置", "DEBUG")
-                else:
-                    log_message("⚠ 问卷选项设置不完整，可能会影响提交结果", "WARNING")
-
-                # 提交问卷 - 增强版
-                submit_success = False
-                submit_selectors = [
-                    "input[type='submit']",
-                    "button[type='submit']",
-                    "button:has-text('提交')",
-                    "input[value*='提交']",
-                    "//button[contains(text(), '提交')]",  # XPath
-                    "//input[contains(@value, '提交')]"   # XPath
-                ]
+                    # 填写并提交调查问卷
+                    logger.info("填写调查问卷...")
+                    with span("survey_fill"):
+                        submit_success = fill_survey(course_page, selector_cache)
+
+                    # 标记课程完成
+                    current_status = "completed" if submit_success else "submission_failed"
+                    self.collect_course_info(course_page, course['课程名称'], STUDY_SECONDS, current_status, sink=record_sink, store=store)
+                    logger.info("✓ 已提交问卷")
                 
-                for selector in submit_selectors:
+                    # 等待网络空闲
                     try:
-                        log_message(f"尝试提交按钮: {selector}", "DEBUG")
-                        if "//" in selector:  # XPath选择器
-                            btn = course_page.locator(f"xpath={selector}")
-                        else:  # CSS选择器
-                            btn = course_page.locator(selector)
-                        
-                        if btn.count() > 0:
-                            btn.first.click(force=True, timeout=3000)
-                            log_message(f"✓ 已点击提交按钮: {selector}")
-                            submit_success = True
-                            break
-                    except Exception as e:
-                        log_message(f"点击提交按钮 {selector} 失败: {e}", "DEBUG")
+                        course_page.wait_for_load_state("networkidle")
+                    except:
+                        pass
                 
-                # 如果所有选择器都失败，尝试坐标点击
-                if not submit_success:
+                    completed_courses += 1  # 增加完成课程计数
+                    logger.info("✅ 课程完成: %s", course['课程名称'])
+
+                except Exception as e:
+                    logger.error(f"❌ 学习课程时出错: {str(e)[:200]}")
+                    # 保存调试信息（后台压缩写入调试快照存储）
                     try:
-                        log_message("尝试使用坐标点击提交区域", "WARNING")
-                        course_page.mouse.click(course_page.viewport_size["width"] // 2, course_page.viewport_size["height"] * 0.8)
-                        log_message("✓ 已使用坐标点击提交区域")
-                        submit_success = True
-                    except Exception as e:
-                        log_message(f"⚠ 所有提交方式均失败: {e}", "ERROR")
-                
-                # 标记课程完成
-                current_status = "completed" if submit_success else "submission_failed"
-                collect_course_info(course_page, course['课程名称'], 65, current_status)
-                log_message("✓ 已提交问卷")
-                
-                # 等待网络空闲
-                try:
-                    course_page.wait_for_load_state("networkidle")
-                except:
-                    pass
+                        if course_page:
+                            # 出错前页面可能已被点击或选项修改，转储当前的DOM
+                            invalidate(course_page)
+                            save_artifact(page_html(course_page), "course_error", run=store.run_id,
+                                          course=course['课程名称'], course_index=idx)
+                            logger.debug("✓ 调试快照已提交: 课程%s", idx)
+                    except Exception as debug_error:
+                        logger.error(f"❌ 保存调试信息失败: {debug_error}")
+                finally:
+                    # 每门课程结束都写入检查点，中断后从这里继续
+                    with span("persistence", target="checkpoint"):
+                        journal.record(idx, course['跳转网址'], course['课程名称'], current_status)
+                    # 保存选择器命中缓存，供后续课程和下次运行使用
+                    with span("persistence", target="selector_cache"):
+                        selector_cache.save()
+                    clear_tags()
                 
-                completed_courses += 1  # 增加完成课程计数
-                log_message(f"✅ 课程完成: {course['课程名称']}")
+                    # 归还课程页面（重置为空白页后留给下一门课程）
+                    pool.release(course_page)
                 
-                # 每完成5个课程保存一次数据
-                if completed_courses % 5 == 0:
-                    try:
-                        save_course_data_to_csv()
-                        save_course_data_to_json()
-                    except Exception as e:
-                        log_message(f"⚠ 保存数据时出错: {e}", "ERROR")
+                    # 随机间隔1-3秒，避免被识别为机器人
+                    sleep_time = random.uniform(*COURSE_INTERVAL_SECONDS)
+                    logger.debug("等待 %.1f 秒后继续", sleep_time)
+                    time.sleep(sleep_time)
 
-            except Exception as e:
-                log_message(f"❌ 学习课程时出错: {str(e)[:200]}", "ERROR")
-                # 保存调试信息
-                try:
-                    if course_page:
-                        debug_filename = f"output/debug_course_{idx}_{int(time.time())}.html"
-                        with open(debug_filename, "w", encoding="utf-8") as f:
-                            f.write(course_page.content())
-                        log_message(f"✓ 调试信息已保存到: {debug_filename}", "DEBUG")
-                except Exception as debug_error:
-                    log_message(f"❌ 保存调试信息失败: {debug_error}", "ERROR")
-            finally:
-                # 安全关闭课程页面
-                try:
-                    if course_page and not course_page.is_closed():
-                        course_page.close()
-                except:
-                    pass
-                
-                # 随机间隔1-3秒，避免被识别为机器人
-                sleep_time = random.uniform(1, 3)
-                log_message(f"等待 {sleep_time:.1f} 秒后继续", "DEBUG")
-                time.sleep(sleep_time)
-
-        # 7. 统计信息
-        total_courses = len(courses_data)
-        success_rate = (completed_courses / total_courses * 100) if total_courses > 0 else 0
-        
-        # 保存最终数据
-        save_course_data_to_csv()
-        save_course_data_to_json()
+            journal.finish()
+
+            # 7. 统计信息
+            total_courses = len(courses_data)
+            success_rate = (completed_courses / total_courses * 100) if total_courses > 0 else 0
         
-        log_message("\n===== 学习统计 =====")
-        log_message(f"总课程数: {total_courses}")
-        log_message(f"成功完成: {completed_courses}")
-        log_message(f"成功率: {success_rate:.2f}%")
-        log_message(f"💾 已保存课程数据到 completed_courses.csv 和 completed_courses.json")
-
-    except KeyboardInterrupt:
-        log_message("⚠ 用户中断程序", "WARNING")
-    except Exception as e:
-        log_message(f"❌ 程序运行出错: {e}", "CRITICAL")
-        import traceback
-        traceback.print_exc()
-    finally:
-        # 8. 清理资源
-        log_message("\n[清理] 释放资源...")
+            # 保存最终数据
+            with span("persistence", target="export"):
+                save_course_data_to_csv(record_sink)
+                save_course_data_to_json()
         
-        # 关闭所有页面
-        try:
-            if context:
-                for p in context.pages:
-                    if not p.is_closed():
-                        p.close()
-        except:
-            pass
+            logger.info("\n===== 学习统计 =====")
+            logger.info(f"总课程数: {total_courses}")
+            logger.info(f"成功完成: {completed_courses}")
+            logger.info(f"成功率: {success_rate:.2f}%")
+            logger.info(f"💾 已保存课程数据到 completed_courses.csv 和 completed_courses.json")
+            pool_stats = pool.stats()
+            logger.info(f"📄 页面: 租用{pool_stats['leases']}次，创建{pool_stats['pages_created']}个"
+                        f"（替换{pool_stats['replacements']}个），"
+                        f"平均每次租用开销{pool_stats['overhead_per_lease'] * 1000:.1f}ms")
         
-        # 关闭浏览器和Playwright
-        try:
-            if context:
-                context.close()
-            if browser:
-                browser.close()
-            if playwright_instance:
-                playwright_instance.stop()
+            # 直接通过索引查询仍未完成的课程
+            pending_courses = store.incomplete_courses()
+            if pending_courses:
+                logger.warning(f"⚠ 仍有 {len(pending_courses)} 门课程未完成")
+                for pending in pending_courses:
+                    logger.warning(f"  - {pending['course_name']} ({pending['status']})")
+            store.finish_run()
+
+        except KeyboardInterrupt:
+            logger.warning("⚠ 用户中断程序")
+            store.finish_run("interrupted")
         except Exception as e:
-            log_message(f"清理资源时出错: {e}", "WARNING")
+            logger.critical(f"❌ 程序运行出错: {e}", exc_info=True)
+            store.finish_run("failed")
+        finally:
+            # 8. 清理资源
+            logger.info("\n[清理] 释放资源...")
+        
+            # 确保已收集的课程记录落盘
+            try:
+                if record_sink:
+                    record_sink.close()
+            except Exception as e:
+                logger.error(f"⚠ 关闭课程记录文件时出错: {e}")
+            store.close()
+            journal.close()
+        
+            # 关闭本阶段打开的页面
+            try:
+                if pool:
+                    pool.release(page)
+                    pool.close()
+            except:
+                pass
         
-        # 输出最终报告
-        end_time = datetime.now()
-        elapsed = (end_time - start_time).total_seconds()
-        log_message("\n===== 自动化学习流程结束 =====")
-        log_message(f"总耗时: {elapsed:.2f}秒")
-        log_message(f"已完成: {completed_courses}/{total_courses if 'total_courses' in locals() else 0}")
+            # 关闭浏览器和Playwright（共享的上下文由调用方关闭）
+            if session:
+                session.close()
+        
+            # 输出最终报告
+            end_time = datetime.now()
+            elapsed = (end_time - start_time).total_seconds()
+            logger.info("\n===== 自动化学习流程结束 =====")
+            logger.info(f"总耗时: {elapsed:.2f}秒")
+            logger.info(f"已完成: {completed_courses}/{total_courses if 'total_courses' in locals() else 0}")
+
+
+def main(user_name, password, incremental=False, context=None):
+    """
+    主函数：用给定的用户名、密码创建Scraper并运行
+    
+    传入已登录的BrowserContext时直接复用，不再启动浏览器和登录，
+    该上下文由调用方负责关闭
+    
+    Returns:
+        Scraper: 已运行的爬取阶段实例
+    """
+    scraper = Scraper(Config(USER_NAME=user_name, PASSWORD=password, INCREMENTAL=incremental), context=context)
+    scraper.run()
+    return scraper
 
 if __name__ == "__main__":
-    USER_NAME = "your_username"
-    PASSWORD = "your_password"
-    main(user_name=USER_NAME, password=PASSWORD)
\ No newline at end of file
+    setup_logging()
+    parser = argparse.ArgumentParser(description="自动学习my_plan.php中的未学习课程")
+    parser.add_argument("--resume", action="store_true", help="从上次中断时的检查点继续")
+    args = parser.parse_args()
+    Scraper(Config("config.txt", RESUME=args.resume or None)).run()
\ No newline at end of file
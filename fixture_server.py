@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Linux Studio本地模拟站点
+基于标准库http.server，模拟登录页、my_plan.php、practice.php、课程内容页和survey.php，
+列表规模和响应延迟均可配置，用于在不访问真实站点的情况下测量整个流程的性能
+"""
+
+import time
+import random
+import hashlib
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote, quote
+from log_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# 登录后下发的会话Cookie
+SESSION_COOKIE = "PHPSESSID=fixture-session"
+
+# 1x1透明PNG，用作content1.png
+PNG_PIXEL = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000001e221bc330000000049454e44ae426082"
+)
+
+
+class FixtureSite:
+    """模拟站点的页面生成规则"""
+
+    def __init__(self, courses=20, chapters=("Linux常用命令", "Shell脚本编程基础", "VI编辑器"),
+                 items_per_chapter=30, completed_ratio=0.5, latency=0.0, jitter=0.0, omit_end_tags=False):
+        self.courses = courses
+        self.chapters = list(chapters)
+        self.items_per_chapter = items_per_chapter
+        self.completed_ratio = completed_ratio
+        # 每个请求的注入延迟（秒）及随机抖动
+        self.latency = latency
+        self.jitter = jitter
+        # 像真实站点的PHP页面一样省略列表项的</li>结束标签（浏览器会自动补上，离线解析也要能处理）
+        self.omit_end_tags = omit_end_tags
+        # 页面（非静态资源）请求计数
+        self.page_requests = 0
+        self._lock = threading.Lock()
+
+    def count_page_request(self):
+        with self._lock:
+            self.page_requests += 1
+
+    def delay(self):
+        """模拟网络和服务器处理延迟"""
+        seconds = self.latency + random.uniform(0, self.jitter)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def item_end(self):
+        """列表项的结束标签，omit_end_tags时省略"""
+        return "" if self.omit_end_tags else "</li>"
+
+    @staticmethod
+    def document(title, body):
+        return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{title}</title>'
+                f'<link rel="stylesheet" href="/css/style.css"></head><body>{body}</body></html>')
+
+    def login_page(self):
+        return self.document("用户登录", (
+            '<form method="post" action="/user/index.php">'
+            '<input type="text" id="username" name="username">'
+            '<input type="password" id="password" name="password">'
+            '<input type="submit" name="submit" value="登录">'
+            '</form>'
+        ))
+
+    def user_center(self):
+        return self.document("用户中心", (
+            '<h1>用户中心</h1><a href="/user/my_info.php">个人信息</a> '
+            '<a href="/user/my_plan.php">学习计划</a>'
+        ))
+
+    def my_plan(self):
+        links = "".join(
+            f'<li><a href="../user/study/content/{course_id}_1_课程{course_id}.php">'
+            f'<img src="../images/content1.png">课程{course_id}</a>{self.item_end()}'
+            for course_id in range(1, self.courses + 1)
+        )
+        return self.document("学习计划", f'<a href="/user/my_info.php">个人信息</a><ul>{links}</ul>')
+
+    def course_page(self, course_id, chapter):
+        survey = f"survey.php?content_id={course_id}&amp;chapter={quote(chapter)}"
+        return self.document(f"课程{course_id}", (
+            f'<div class="content"><p>课程{course_id}的学习内容</p></div>'
+            f'<input type="button" value="完成本节学习" onclick="window.location.href=\'{survey}\'">'
+        ))
+
+    def survey_page(self):
+        return self.document("调查问卷", (
+            '<form method="post" action="/survey.php">'
+            '<select name="difficulty"><option value="1">容易</option><option value="3">困难</option></select>'
+            '<select name="use"><option value="2">有用</option><option value="0">无用</option></select>'
+            '<input type="submit" value="提交">'
+            '</form>'
+        ))
+
+    def practice_page(self, chapter):
+        completed_items = int(self.items_per_chapter * self.completed_ratio)
+        items = []
+        for i in range(1, self.items_per_chapter + 1):
+            mark = '<font color="blue">✓</font>' if i <= completed_items else ''
+            items.append(f'<li>{mark} <a href="practice_process.php?chapter={quote(chapter)}&amp;id={i}">'
+                         f'{chapter} 第{i}关</a>{self.item_end()}')
+        return self.document(chapter, f'<div id="study_content"><ul>{"".join(items)}</ul></div>')
+
+    def practice_process_page(self):
+        return self.document("练习", (
+            '<font color="#FF5809">练习（共 5 关）</font>'
+            '<form method="post" action="/practice_process.php">'
+            '<input type="hidden" name="step" value="1">'
+            '<input type="submit" name="button_prac_process" value="提交">'
+            '</form>'
+        ))
+
+
+class FixtureRequestHandler(BaseHTTPRequestHandler):
+    """按路径分发到FixtureSite的页面"""
+    site = None
+    # 与真实站点一样支持keep-alive（每个响应都带Content-Length）
+    protocol_version = "HTTP/1.1"
+    # 响应头和响应体分两次写出，关闭Nagle算法避免keep-alive连接上每个请求多等一次延迟ACK（约40ms）
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+    def _send(self, body, content_type="text/html; charset=utf-8", headers=None, status=200):
+        data = body if isinstance(body, bytes) else body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def _logged_in(self):
+        return SESSION_COOKIE in (self.headers.get("Cookie") or "")
+
+    def _route(self):
+        url = urlparse(self.path)
+        path = unquote(url.path)
+        query = parse_qs(url.query)
+        site = self.site
+
+        # 静态资源
+        if path.endswith(".png"):
+            return self._send(PNG_PIXEL, "image/png")
+        if path.endswith(".css"):
+            return self._send("body { font-family: sans-serif; }", "text/css")
+
+        site.count_page_request()
+        site.delay()
+
+        if path == "/user/index.php":
+            if self.command == "POST":
+                length = int(self.headers.get("Content-Length") or 0)
+                self.rfile.read(length)
+                return self._send(site.user_center(), headers={"Set-Cookie": f"{SESSION_COOKIE}; Path=/"})
+            return self._send(site.user_center() if self._logged_in() else site.login_page())
+
+        if not self._logged_in():
+            return self._send(site.login_page())
+
+        if path == "/user/my_info.php":
+            return self._send(site.user_center())
+        if path == "/user/my_plan.php":
+            return self._send(site.my_plan())
+        if path.startswith("/study/content/"):
+            course_id = path.rsplit("/", 1)[-1].split("_", 1)[0]
+            return self._send(site.course_page(course_id, site.chapters[0]))
+        if path == "/survey.php":
+            self._drain_body()
+            return self._send(site.survey_page() if self.command != "POST" else site.user_center())
+        if path == "/practice.php":
+            chapter = query.get("chapter", [site.chapters[0]])[0]
+            html = site.practice_page(chapter)
+            etag = '"' + hashlib.md5(html.encode("utf-8")).hexdigest() + '"'
+            return self._send(html, headers={"ETag": etag})
+        if path == "/practice_process.php":
+            self._drain_body()
+            return self._send(site.practice_process_page())
+        return self._send(site.document("404", "Not Found"), status=404)
+
+    def _drain_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+    def do_GET(self):
+        self._route()
+
+    def do_HEAD(self):
+        self._route()
+
+    def do_POST(self):
+        self._route()
+
+
+class FixtureServer:
+    """在后台线程中运行的本地模拟站点"""
+
+    def __init__(self, host="127.0.0.1", port=0, **site_options):
+        self.site = FixtureSite(**site_options)
+        handler = type("BoundFixtureRequestHandler", (FixtureRequestHandler,), {"site": self.site})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """启动服务器线程"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"本地模拟站点已启动: {self.base_url}")
+        return self
+
+    def stop(self):
+        """停止服务器"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+if __name__ == "__main__":
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Linux Studio本地模拟站点")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--courses", type=int, default=20, help="my_plan.php中的未学习课程数")
+    parser.add_argument("--items", type=int, default=30, help="每个练习章节的列表项数")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个页面请求的注入延迟（秒）")
+    parser.add_argument("--omit-end-tags", action="store_true", help="列表项省略</li>结束标签")
+    args = parser.parse_args()
+    server = FixtureServer(port=args.port, courses=args.courses, items_per_chapter=args.items,
+                           latency=args.latency, omit_end_tags=args.omit_end_tags)
+    logger.info(f"本地模拟站点已启动: {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+热点路径计时模块
+用上下文管理器span记录登录、导航、提取、选择器搜索、问卷填写和持久化等阶段的耗时，
+每个span带课程和章节标签写入JSON Lines文件，运行结束时汇总为各阶段耗时表
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# span记录文件（JSON Lines，每行一个span）
+SPANS_JSONL_FILE = "output/spans.jsonl"
+
+# 汇总表中各阶段的显示顺序，未列出的阶段排在后面
+PHASES = ("login", "navigation", "extraction", "selector_search", "survey_fill",
+          "practice_submit", "study", "persistence")
+
+_lock = threading.Lock()
+_spans_file = None
+_spans_file_path = SPANS_JSONL_FILE
+# 各阶段汇总 {阶段: [次数, 总秒数, 最长秒数, 失败次数]}
+_totals = defaultdict(lambda: [0, 0.0, 0.0, 0])
+# 当前标签和span栈（用于记录父阶段）；使用contextvars，
+# 每个线程和每个asyncio任务各自独立，并发的章节任务不会互相串标签
+_tags = contextvars.ContextVar("span_tags", default={})
+_stack = contextvars.ContextVar("span_stack", default=())
+
+
+def set_output(jsonl_file):
+    """
+    设置span记录文件，为None时只在内存中汇总不写文件
+
+    Args:
+        jsonl_file: JSON Lines文件路径
+    """
+    global _spans_file_path
+    close()
+    _spans_file_path = jsonl_file
+
+
+def set_tags(**tags):
+    """设置当前线程（或asyncio任务）后续span的默认标签（如course、chapter），值为None的标签会被移除"""
+    current = dict(_tags.get())
+    current.update(tags)
+    _tags.set({key: value for key, value in current.items() if value is not None})
+
+
+def clear_tags():
+    """清除当前线程（或asyncio任务）的默认标签"""
+    _tags.set({})
+
+
+def _write(record):
+    """追加写入一条span记录（调用方持有锁）"""
+    global _spans_file
+    if not _spans_file_path:
+        return
+    if _spans_file is None:
+        directory = os.path.dirname(_spans_file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _spans_file = open(_spans_file_path, "a", encoding="utf-8")
+    _spans_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+@contextmanager
+def span(phase, **tags):
+    """
+    记录一个阶段的耗时
+
+    Args:
+        phase: 阶段名称，见PHASES
+        **tags: 附加标签，与set_tags设置的默认标签合并
+
+    Yields:
+        dict: 本span的标签，可在块内补充（如记录选中的选择器）
+    """
+    stack = _stack.get()
+    record_tags = dict(_tags.get())
+    record_tags.update(tags)
+    parent = stack[-1] if stack else None
+    token = _stack.set(stack + (phase,))
+    started_at = time.time()
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield record_tags
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        _stack.reset(token)
+        record = {"phase": phase, "start": round(started_at, 3), "seconds": round(seconds, 6),
+                  "status": status, "thread": threading.current_thread().name}
+        if parent:
+            record["parent"] = parent
+        record.update(record_tags)
+        with _lock:
+            totals = _totals[phase]
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] = max(totals[2], seconds)
+            if status != "ok":
+                totals[3] += 1
+            try:
+                _write(record)
+            except Exception as e:
+                logger.warning(f"写入span记录失败: {e}")
+
+
+def phase_totals():
+    """
+    返回各阶段的耗时汇总
+
+    Returns:
+        dict: {阶段: {"count", "seconds", "mean", "max", "errors"}}，按PHASES顺序排列
+    """
+    with _lock:
+        snapshot = {phase: list(values) for phase, values in _totals.items()}
+    order = {phase: index for index, phase in enumerate(PHASES)}
+    return {
+        phase: {"count": count, "seconds": seconds, "mean": seconds / count if count else 0.0,
+                "max": longest, "errors": errors}
+        for phase, (count, seconds, longest, errors)
+        in sorted(snapshot.items(), key=lambda item: (order.get(item[0], len(PHASES)), item[0]))
+    }
+
+
+def format_phase_table(totals=None, wall_seconds=None):
+    """
+    把各阶段耗时汇总格式化为文本表格
+
+    Args:
+        totals: phase_totals()的结果，为None时取当前汇总
+        wall_seconds: 整个运行的墙钟时间，提供时计算各阶段占比
+
+    Returns:
+        str: 多行表格文本
+    """
+    totals = phase_totals() if totals is None else totals
+    lines = [f"  {'阶段':<16}{'次数':>6}{'总耗时(s)':>12}{'平均(s)':>10}{'最长(s)':>10}{'占比':>8}{'失败':>6}"]
+    for phase, stats in totals.items():
+        share = f"{stats['seconds'] / wall_seconds * 100:.1f}%" if wall_seconds else "-"
+        lines.append(f"  {phase:<18}{stats['count']:>6}{stats['seconds']:>12.2f}{stats['mean']:>10.3f}"
+                     f"{stats['max']:>10.2f}{share:>8}{stats['errors']:>6}")
+    if wall_seconds:
+        lines.append(f"  墙钟时间 {wall_seconds:.2f}秒（嵌套的span会同时计入父阶段和子阶段）")
+    return "\n".join(lines)
+
+
+def log_phase_table(wall_seconds=None):
+    """输出各阶段耗时汇总表，并把已记录的span落盘"""
+    flush()
+    if not phase_totals():
+        return
+    logger.info(f"各阶段耗时（详细记录见 {_spans_file_path}）:\n{format_phase_table(wall_seconds=wall_seconds)}")
+
+
+def flush():
+    """把缓冲的span记录写入磁盘"""
+    with _lock:
+        if _spans_file:
+            _spans_file.flush()
+
+
+def close():
+    """关闭span记录文件"""
+    global _spans_file
+    with _lock:
+        if _spans_file:
+            _spans_file.close()
+            _spans_file = None
+
+
+def reset():
+    """清空内存中的汇总（用于基准测试的多轮运行）"""
+    with _lock:
+        _totals.clear()
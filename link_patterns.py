@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+课程链接和onclick属性的解析模块
+所有正则表达式在导入时预编译，解析结果以CourseRef等类型化对象返回；
+相对链接统一通过urllib.parse按页面地址解析，不再用字符串替换拼接
+"""
+
+import re
+import time
+import html
+import logging
+from typing import NamedTuple, Optional
+from urllib.parse import urljoin, urlsplit, urlunsplit, urlencode, parse_qs, unquote
+
+from course_page_parser import site_url
+from log_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# my_plan.php中的课程文件名：{课程ID}_{章节序号}_{课程名称}.php
+COURSE_FILE_PATTERN = re.compile(r"(\d+)_(\d+)_(.*?)\.php")
+
+# 完成按钮onclick中的跳转地址
+LOCATION_HREF_PATTERN = re.compile(r"""window\.location\.href=["']([^"']+)["']""")
+
+# onclick中的问卷参数
+CONTENT_ID_PATTERN = re.compile(r"content_id=(\d+)")
+CHAPTER_PATTERN = re.compile(r"chapter=([^&']+)")
+
+# 任意连续数字
+DIGITS_PATTERN = re.compile(r"\d+")
+
+# 练习页面红色提示文字中的总关卡数
+TOTAL_STEPS_PATTERN = re.compile(r"（共 (\d+) 关）")
+
+# 学习计划页面的路径，课程链接的相对路径以它为基准
+MY_PLAN_PATH = "user/my_plan.php"
+
+# 课程链接中多出的user路径段：../user/study/content/...实际页面位于/study/content/...
+USER_CONTENT_PREFIX = "/user/study/content/"
+CONTENT_PREFIX = "/study/content/"
+
+
+class CourseRef(NamedTuple):
+    """课程引用：课程ID、章节（课程链接中为章节序号，问卷参数中为章节名称）和课程名称"""
+    id: str
+    chapter: str
+    name: Optional[str] = None
+
+
+def resolve_url(href, base=None):
+    """
+    按页面地址解析相对链接（处理HTML实体、../和/开头的路径）
+
+    Args:
+        href: 链接（相对或绝对）
+        base: 链接所在页面的地址，默认站点根目录
+
+    Returns:
+        str: 绝对URL
+    """
+    return urljoin(base or site_url(), html.unescape(href))
+
+
+def parse_course_href(href):
+    """
+    解析my_plan.php中的课程链接
+
+    Args:
+        href: 课程链接，例如"../user/study/content/60_1_Linux常用命令.php"
+
+    Returns:
+        CourseRef: 课程引用，不是课程链接时为None
+    """
+    match = COURSE_FILE_PATTERN.search(unquote(href))
+    if not match:
+        return None
+    course_id, chapter, name = match.groups()
+    return CourseRef(course_id, chapter, name)
+
+
+def normalize_course_href(href):
+    """
+    把my_plan.php中的课程链接转换为课程页面的绝对地址（去掉多余的user路径段）
+
+    Args:
+        href: 课程链接
+
+    Returns:
+        str: 课程页面的绝对URL
+    """
+    parts = urlsplit(resolve_url(href, site_url(MY_PLAN_PATH)))
+    if parts.path.startswith(USER_CONTENT_PREFIX):
+        parts = parts._replace(path=CONTENT_PREFIX + parts.path[len(USER_CONTENT_PREFIX):])
+    return urlunsplit(parts)
+
+
+def course_id_from_url(url):
+    """
+    从课程页面URL中取出课程ID
+
+    依次尝试课程文件名、content_id参数和路径中的第一段数字（不会匹配到主机名或端口）
+
+    Returns:
+        str: 课程ID，无法识别时为空字符串
+    """
+    parts = urlsplit(url)
+    ref = parse_course_href(parts.path)
+    if ref:
+        return ref.id
+    content_id = parse_qs(parts.query).get("content_id")
+    if content_id:
+        return content_id[0]
+    match = DIGITS_PATTERN.search(parts.path)
+    return match.group(0) if match else ""
+
+
+def location_href(onclick):
+    """
+    提取onclick中window.location.href的跳转地址（已处理HTML实体）
+
+    Returns:
+        str: 相对或绝对地址，没有跳转时为None
+    """
+    match = LOCATION_HREF_PATTERN.search(onclick)
+    return html.unescape(match.group(1)) if match else None
+
+
+def survey_ref_from_onclick(onclick):
+    """
+    从onclick中的content_id和chapter参数构建课程引用
+
+    Returns:
+        CourseRef: name为None的课程引用，缺少参数时为None
+    """
+    content_id = CONTENT_ID_PATTERN.search(onclick)
+    chapter = CHAPTER_PATTERN.search(onclick)
+    if not (content_id and chapter):
+        return None
+    return CourseRef(content_id.group(1), unquote(html.unescape(chapter.group(1))))
+
+
+def survey_url(ref):
+    """根据课程引用生成问卷页面的绝对地址"""
+    return site_url("survey.php?" + urlencode({"content_id": ref.id, "chapter": ref.chapter}))
+
+
+def total_steps(text):
+    """
+    从练习页面的红色提示文字中读取总关卡数
+
+    Returns:
+        int: 总关卡数，未找到时为None
+    """
+    match = TOTAL_STEPS_PATTERN.search(text)
+    return int(match.group(1)) if match else None
+
+
+def benchmark_link_patterns(n_items=100000, rounds=3):
+    """
+    在合成的课程链接和onclick属性上比较原先循环内的re.search写法与预编译模式的耗时
+
+    Args:
+        n_items: 合成的链接数和onclick数
+        rounds: 重复次数，取最快的一次
+
+    Returns:
+        dict: 两种写法每项的耗时（微秒）和加速比
+    """
+    base = site_url()
+    hrefs = [f"../user/study/content/{i}_{i % 9 + 1}_课程{i}.php" for i in range(n_items)]
+    onclicks = [
+        f"window.location.href='survey.php?content_id={i}&amp;chapter=Linux常用命令'" if i % 2 else
+        f"submitSurvey('content_id={i}&chapter=Shell脚本编程基础')"
+        for i in range(n_items)
+    ]
+
+    def adhoc():
+        results = []
+        for href in hrefs:
+            text = re.search(r"\d+_\d+_(.*?).php", href).group(1)
+            if "../" in href:
+                href = href.replace("../", base)
+                href = href.replace("user/study/content", "study/content")
+            results.append((text, href, re.findall(r'\d+', href)[0]))
+        for onclick in onclicks:
+            url_match = re.search(r'window\.location\.href=["\']([^"\']+)["\']', onclick)
+            if url_match:
+                results.append(url_match.group(1).replace('&amp;', '&'))
+            else:
+                content_id_match = re.search(r'content_id=(\d+)', onclick)
+                chapter_match = re.search(r'chapter=([^&\']+)', onclick)
+                if content_id_match and chapter_match:
+                    results.append((content_id_match.group(1), chapter_match.group(1)))
+        return results
+
+    def compiled():
+        results = []
+        for href in hrefs:
+            ref = parse_course_href(href)
+            results.append((ref.name, normalize_course_href(href), ref.id))
+        for onclick in onclicks:
+            relative_url = location_href(onclick)
+            results.append(relative_url if relative_url else survey_ref_from_onclick(onclick))
+        return results
+
+    def best_of(func):
+        best = float("inf")
+        for _ in range(rounds):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    # 两种写法对同一批课程链接得到相同的课程名称、地址和ID
+    for old, new in zip(adhoc()[:n_items], compiled()[:n_items]):
+        assert old == new, (old, new)
+
+    # 只比较正则匹配本身：预编译模式与循环内re.search（依赖re模块内部缓存）
+    def adhoc_patterns():
+        for href in hrefs:
+            re.search(r"\d+_\d+_(.*?).php", href)
+            re.findall(r'\d+', href)
+        for onclick in onclicks:
+            if not re.search(r'window\.location\.href=["\']([^"\']+)["\']', onclick):
+                re.search(r'content_id=(\d+)', onclick)
+                re.search(r'chapter=([^&\']+)', onclick)
+
+    def compiled_patterns():
+        for href in hrefs:
+            COURSE_FILE_PATTERN.search(href)
+            DIGITS_PATTERN.findall(href)
+        for onclick in onclicks:
+            if not LOCATION_HREF_PATTERN.search(onclick):
+                CONTENT_ID_PATTERN.search(onclick)
+                CHAPTER_PATTERN.search(onclick)
+
+    total = n_items * 2
+    results = {
+        "adhoc_us": best_of(adhoc) / total * 1e6,
+        "compiled_us": best_of(compiled) / total * 1e6,
+        "adhoc_patterns_us": best_of(adhoc_patterns) / total * 1e6,
+        "compiled_patterns_us": best_of(compiled_patterns) / total * 1e6,
+    }
+    results["patterns_speedup"] = results["adhoc_patterns_us"] / results["compiled_patterns_us"]
+
+    logger.info(f"=== 链接解析基准测试（{n_items}个链接 + {n_items}个onclick） ===")
+    logger.info(f"正则匹配: re.search {results['adhoc_patterns_us']:.2f}μs/项，"
+                f"预编译 {results['compiled_patterns_us']:.2f}μs/项，加速比 {results['patterns_speedup']:.2f}x")
+    logger.info(f"完整解析: 字符串替换 {results['adhoc_us']:.2f}μs/项，"
+                f"urllib.parse + CourseRef {results['compiled_us']:.2f}μs/项")
+    return results
+
+
+if __name__ == "__main__":
+    setup_logging()
+    benchmark_link_patterns()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+只读列表页面的HTTP获取模块
+学习计划（my_plan.php）和练习章节列表（practice.php）不需要执行JavaScript，
+用复用浏览器登录Cookie的httpx.Client（连接池、keep-alive）直接获取HTML再离线解析，
+Chromium只用于需要交互的页面
+"""
+
+import time
+import logging
+import tracemalloc
+import httpx
+from page_readiness import record_latency, percentile
+from browser_session import LOGIN_PATH
+from log_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# httpx每个请求都输出一条INFO日志，只保留警告
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# 列表页面获取方式：browser（Chromium导航）或 http（httpx直接请求）
+LISTING_BACKENDS = ("browser", "http")
+
+# 连接池大小：列表页面按顺序获取，一个阶段通常只用到一两个连接
+MAX_CONNECTIONS = 4
+
+# 请求超时（秒）
+REQUEST_TIMEOUT = 20.0
+
+# 各类列表页面登录后才有的标志（原始HTML中的子串，不依赖属性的引号写法）；
+# Cookie失效时站点直接返回或重定向到登录页面，其中没有这些标志
+PAGE_MARKERS = {
+    "practice_list": "study_content",
+    "my_plan": "my_info.php",
+}
+
+
+class SessionExpiredError(Exception):
+    """请求被重定向到登录页面，浏览器的登录Cookie已失效"""
+
+
+def cookies_from_browser(cookies):
+    """
+    把Playwright的Cookie列表转换为httpx.Cookies
+
+    Args:
+        cookies: context.cookies()或storage_state["cookies"]返回的字典列表
+
+    Returns:
+        httpx.Cookies: 按域名和路径设置好的Cookie
+    """
+    jar = httpx.Cookies()
+    for cookie in cookies:
+        jar.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""), path=cookie.get("path", "/"))
+    return jar
+
+
+def is_login_redirect(response):
+    """请求是否被重定向到了登录页面"""
+    return bool(response.history) and response.url.path.rstrip("/").endswith("/" + LOGIN_PATH)
+
+
+def has_page_marker(html, page_type):
+    """页面中是否有该页面类型登录后才有的标志，没有声明标志的页面类型视为有"""
+    marker = PAGE_MARKERS.get(page_type)
+    return marker is None or marker in html
+
+
+class ListingFetcher:
+    """
+    用带连接池的httpx.Client获取只读列表页面
+
+    同一个实例的请求复用TCP连接（keep-alive），httpx.Client可以在多个线程中共用
+    """
+
+    def __init__(self, cookies=None, user_agent=None, max_connections=MAX_CONNECTIONS, timeout=REQUEST_TIMEOUT):
+        """
+        Args:
+            cookies: httpx.Cookies或Playwright的Cookie列表
+            user_agent: 请求使用的User-Agent，通常与浏览器一致
+            max_connections: 连接池大小
+            timeout: 请求超时（秒）
+        """
+        if isinstance(cookies, list):
+            cookies = cookies_from_browser(cookies)
+        headers = {"User-Agent": user_agent} if user_agent else None
+        self.client = httpx.Client(
+            cookies=cookies,
+            headers=headers,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self.requests = 0
+        self.bytes_received = 0
+
+    @classmethod
+    def from_context(cls, context, user_agent=None, **kwargs):
+        """
+        用已登录的BrowserContext中的Cookie创建实例
+
+        Args:
+            context: 已登录的Playwright BrowserContext
+            user_agent: 请求使用的User-Agent，为None时使用httpx默认值
+            **kwargs: 传给构造函数的其他参数
+
+        Returns:
+            ListingFetcher: 新实例
+        """
+        return cls(context.cookies(), user_agent=user_agent, **kwargs)
+
+    def fetch(self, url, page_type=None):
+        """
+        获取列表页面的HTML，并按页面类型记录耗时（与浏览器导航耗时分开统计）
+
+        Args:
+            url: 页面URL
+            page_type: page_readiness中的页面类型，用于耗时统计
+
+        Returns:
+            str: 页面HTML
+
+        Raises:
+            SessionExpiredError: 请求被重定向到登录页面，或页面中没有该页面类型登录后才有的标志
+            httpx.HTTPError: 请求失败或状态码不是2xx
+        """
+        start = time.perf_counter()
+        response = self.client.get(url)
+        response.raise_for_status()
+        html = response.text
+        elapsed = time.perf_counter() - start
+        self.requests += 1
+        self.bytes_received += len(response.content)
+        if page_type:
+            record_latency(page_type, elapsed, mode="http")
+        if is_login_redirect(response) or not has_page_marker(html, page_type):
+            raise SessionExpiredError(f"请求 {url} 时返回了登录页面")
+        logger.debug("HTTP获取 %s 耗时 %.0fms，%s字节", url, elapsed * 1000, len(response.content))
+        return html
+
+    def close(self):
+        self.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def parse_listing(html, page_type):
+    """
+    离线解析列表页面
+
+    Args:
+        html: 页面HTML
+        page_type: "my_plan"或"practice_list"
+
+    Returns:
+        list|tuple: 学习计划页面为未学习课程的href列表，练习章节列表为(已完成, 未完成)的LinkInfo列表
+    """
+    from course_page_parser import parse_course_links, parse_unstudied_course_hrefs
+    if page_type == "my_plan":
+        return parse_unstudied_course_hrefs(html)
+    return parse_course_links(html)
+
+
+def benchmark_listing_fetch(rounds=20, items_per_chapter=200, latency=0.02):
+    """
+    在本地模拟站点上比较“每个请求新建连接”和连接池keep-alive获取列表页面的耗时和内存
+
+    Args:
+        rounds: 每种方式获取全部列表页面的轮数
+        items_per_chapter: 每个练习章节的列表项数
+        latency: 每个页面请求的注入延迟（秒）
+
+    Returns:
+        dict: 每种方式的请求数、耗时p50/p95（毫秒）、总耗时和tracemalloc峰值内存
+    """
+    from fixture_server import FixtureServer, SESSION_COOKIE
+
+    name, value = SESSION_COOKIE.split("=", 1)
+    results = {}
+    with FixtureServer(items_per_chapter=items_per_chapter, latency=latency) as server:
+        urls = [(f"{server.base_url}/user/my_plan.php", "my_plan")]
+        urls += [(f"{server.base_url}/practice.php?chapter={chapter}", "practice_list")
+                 for chapter in server.site.chapters]
+        cookies = [{"name": name, "value": value, "domain": "127.0.0.1", "path": "/"}]
+
+        def fetch_unpooled(url, page_type):
+            with ListingFetcher(cookies) as fetcher:
+                return fetcher.fetch(url)
+
+        def run_rounds(fetch, count):
+            timings = []
+            for _ in range(count):
+                for url, page_type in urls:
+                    request_start = time.perf_counter()
+                    parse_listing(fetch(url, page_type), page_type)
+                    timings.append(time.perf_counter() - request_start)
+            return timings
+
+        with ListingFetcher(cookies) as pooled:
+            for mode, fetch in (("unpooled", fetch_unpooled), ("pooled", lambda url, _: pooled.fetch(url))):
+                start = time.perf_counter()
+                timings = sorted(run_rounds(fetch, rounds))
+                total = time.perf_counter() - start
+                # 内存单独测一轮，tracemalloc会明显拖慢解析
+                tracemalloc.start()
+                try:
+                    run_rounds(fetch, 1)
+                    _, peak = tracemalloc.get_traced_memory()
+                finally:
+                    tracemalloc.stop()
+                results[mode] = {
+                    "requests": len(timings),
+                    "p50_ms": percentile(timings, 0.5) * 1000,
+                    "p95_ms": percentile(timings, 0.95) * 1000,
+                    "seconds": total,
+                    "peak_bytes": peak,
+                }
+
+    logger.info(f"=== 列表页面HTTP获取基准测试（{rounds}轮×{len(urls)}个页面，注入延迟{latency * 1000:.0f}ms） ===")
+    for mode, result in results.items():
+        logger.info(f"{mode}: p50={result['p50_ms']:.1f}ms，p95={result['p95_ms']:.1f}ms，"
+                    f"总计{result['seconds']:.2f}秒，峰值内存{result['peak_bytes'] / 1024 / 1024:.1f}MB")
+    return results
+
+
+if __name__ == "__main__":
+    setup_logging()
+    benchmark_listing_fetch()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日志配置模块
+各模块通过logging.getLogger(__name__)记录日志，本模块把根日志器接到DeferredQueueHandler上，
+记录日志的线程只把参数合并进消息，时间、级别标记和异常堆栈由QueueListener在后台线程中格式化并输出，
+调用方不再同步等待格式化和终端写入；
+日志级别由config.txt中的LOG_LEVEL控制，被过滤掉的DEBUG日志不会格式化消息
+"""
+
+import sys
+import copy
+import queue
+import atexit
+import logging
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+
+# 各日志级别在输出中的标记，与原先log_message的样式保持一致
+LEVEL_ICONS = {
+    "DEBUG": "🔍",
+    "INFO": "ℹ️ ",
+    "WARNING": "⚠️ ",
+    "ERROR": "❌",
+    "CRITICAL": "❌",
+}
+
+LOG_FORMAT = "[%(asctime)s.%(msecs)03d] %(icon)s [%(levelname)s] %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_listener = None
+
+
+class IconFormatter(logging.Formatter):
+    """在日志记录中补充级别标记后再格式化"""
+
+    def format(self, record):
+        record.icon = LEVEL_ICONS.get(record.levelname, "ℹ️ ")
+        return super().format(record)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    把格式化推迟到监听线程的QueueHandler
+
+    标准库的QueueHandler.prepare()在记录日志的线程中调用self.format()，完整格式化消息和异常堆栈；
+    这里只合并消息参数（参数可能是之后会被修改的对象），保留exc_info和stack_info交给监听线程的格式化器
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def parse_level(level):
+    """
+    把级别名称或数值转换为logging级别，无法识别时返回INFO
+
+    Args:
+        level: "DEBUG"/"INFO"/...或logging级别数值
+
+    Returns:
+        int: logging级别
+    """
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).strip().upper())
+    return value if isinstance(value, int) else logging.INFO
+
+
+def setup_logging(level="INFO", stream=None, log_file=None):
+    """
+    把根日志器接到队列上，由后台监听线程输出到终端（和可选的日志文件）
+
+    重复调用时会先停止之前的监听线程再重新配置
+
+    Args:
+        level: 日志级别
+        stream: 输出流，默认sys.stdout
+        log_file: 日志文件路径，为None时只输出到终端
+
+    Returns:
+        QueueListener: 已启动的监听器
+    """
+    global _listener
+    shutdown_logging()
+
+    formatter = IconFormatter(LOG_FORMAT, DATE_FORMAT)
+    handlers = [logging.StreamHandler(stream or sys.stdout)]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    set_log_level(level)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def set_log_level(level):
+    """设置根日志器的级别"""
+    logging.getLogger().setLevel(parse_level(level))
+
+
+def shutdown_logging():
+    """停止监听线程，输出队列中剩余的日志"""
+    global _listener
+    if _listener:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+@contextmanager
+def capture_logging(level, stream):
+    """
+    临时把根日志器换成输出到指定流的队列管道（用于基准测试），退出时恢复原有配置
+
+    Args:
+        level: 日志级别
+        stream: 输出流（如io.StringIO）
+
+    Yields:
+        QueueListener: 临时监听器，退出时会先输出完队列中的日志
+    """
+    root = logging.getLogger()
+    previous_handlers, previous_level = list(root.handlers), root.level
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(IconFormatter(LOG_FORMAT, DATE_FORMAT))
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler)
+    root.handlers = [DeferredQueueHandler(log_queue)]
+    root.setLevel(parse_level(level))
+    listener.start()
+    try:
+        yield listener
+    finally:
+        listener.stop()
+        root.handlers = previous_handlers
+        root.setLevel(previous_level)
+
+
+@contextmanager
+def log_level(level):
+    """临时调整根日志器级别（如基准测试期间屏蔽逐条日志）"""
+    root = logging.getLogger()
+    previous = root.level
+    root.setLevel(parse_level(level))
+    try:
+        yield
+    finally:
+        root.setLevel(previous)
+
+
+atexit.register(shutdown_logging)
@@ -8,22 +8,23 @@ Linux Studio自动化学习主程序
 import os
 import sys
 import logging
+import argparse
+import concurrent.futures
 from datetime import datetime
+from typing import Callable, NamedTuple, Tuple
+from log_setup import setup_logging, set_log_level
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
 logger = logging.getLogger(__name__)
 
 class Config:
-    """配置类，用于从配置文件读取参数"""
-    def __init__(self, config_file):
+    """配置类，用于从配置文件读取参数，也可以直接传入配置项（单独运行某个阶段或测试时使用）"""
+    def __init__(self, config_file=None, **values):
         self.config_file = config_file
         self.config_data = {}
-        self.load_config()
+        if config_file:
+            self.load_config()
+        # 直接传入的配置项覆盖配置文件中的同名项，值为None的项忽略
+        self.config_data.update((key, value) for key, value in values.items() if value is not None)
     
     def load_config(self):
         """从配置文件读取配置"""
@@ -66,8 +67,225 @@ class Config:
             return self.config_data[name]
         raise AttributeError(f"配置项 {name} 不存在")
 
-def main():
-    """主函数"""
+def extract_stage(config, context):
+    """
+    课程内容提取阶段
+
+    Returns:
+        Extractor: 同步引擎的阶段实例，使用异步引擎时为汇总结果字典
+    """
+    if config.get('EXTRACT_ENGINE', 'sync') == 'async':
+        # 异步引擎在独立线程中按同样的性能配置启动浏览器，通过storage_state复用当前会话的登录状态
+        import async_extractor
+        return async_extractor.run_config(config, storage_state=context.storage_state())
+    from course_content_extractor import Extractor
+    extractor = Extractor(config, context=context)
+    extractor.run()
+    return extractor
+
+
+def scrape_stage(config, context):
+    """
+    课程信息爬取阶段
+
+    Returns:
+        Scraper: 阶段实例
+    """
+    from course_scraper import Scraper
+    scraper = Scraper(config, context=context)
+    scraper.run()
+    return scraper
+
+
+class Stage(NamedTuple):
+    """
+    流程阶段：声明自己读取的输入和产生的输出，调度器据此决定哪些阶段可以同时运行
+
+    一个阶段依赖产生其输入的阶段；不由任何被选中阶段产生的输入（如已登录的会话、
+    上次运行留下的文件）视为外部输入，在开始时就已满足
+    """
+    key: str
+    name: str
+    # 阶段函数func(config, context)，context为已登录的BrowserContext；无界面与否由会话的性能配置决定
+    func: Callable
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+
+
+# 流程阶段：提取只访问practice.php，爬取只访问my_plan.php，两者只共用已登录的会话
+STAGES = (
+    Stage("extract", "课程内容提取", extract_stage,
+          inputs=("session",), outputs=("chapter_links",)),
+    Stage("scrape", "课程信息爬取", scrape_stage,
+          inputs=("session",), outputs=("course_records",)),
+)
+
+
+def select_stages(keys, stages=STAGES):
+    """
+    按--stages参数选出要运行的阶段
+
+    Args:
+        keys: 阶段key列表或逗号分隔的字符串，为空时选中全部阶段
+        stages: 可选的阶段
+
+    Returns:
+        tuple: 选中的阶段（保持STAGES中的顺序）
+
+    Raises:
+        ValueError: 有未知的阶段key
+    """
+    if not keys:
+        return tuple(stages)
+    if isinstance(keys, str):
+        keys = keys.split(',')
+    keys = {key.strip() for key in keys if key.strip()}
+    unknown = keys - {stage.key for stage in stages}
+    if unknown:
+        raise ValueError(f"未知的阶段: {', '.join(sorted(unknown))}，可选: {', '.join(stage.key for stage in stages)}")
+    return tuple(stage for stage in stages if stage.key in keys)
+
+
+def stage_dependencies(stages):
+    """
+    根据各阶段声明的输入和输出计算依赖关系
+
+    Args:
+        stages: 要运行的阶段
+
+    Returns:
+        dict: {阶段key: 它依赖的阶段key集合}
+
+    Raises:
+        ValueError: 同一个输出由多个阶段产生，或者阶段之间存在循环依赖
+    """
+    producers = {}
+    for stage in stages:
+        for output in stage.outputs:
+            if output in producers:
+                raise ValueError(f"输出 {output} 同时由阶段 {producers[output]} 和 {stage.key} 产生")
+            producers[output] = stage.key
+    dependencies = {
+        stage.key: {producers[item] for item in stage.inputs if item in producers and producers[item] != stage.key}
+        for stage in stages
+    }
+    # 检查循环依赖：反复移除依赖都已满足的阶段，最后剩下的就在环上
+    remaining = dict(dependencies)
+    while remaining:
+        ready = [key for key, deps in remaining.items() if not deps & remaining.keys()]
+        if not ready:
+            raise ValueError(f"阶段之间存在循环依赖: {', '.join(sorted(remaining))}")
+        for key in ready:
+            del remaining[key]
+    return dependencies
+
+
+def stage_order(stages):
+    """按依赖关系排序的阶段列表（同一层内保持声明顺序），用于在单个线程中依次运行"""
+    dependencies = stage_dependencies(stages)
+    ordered = []
+    done = set()
+    while len(ordered) < len(stages):
+        for stage in stages:
+            if stage.key not in done and dependencies[stage.key] <= done:
+                ordered.append(stage)
+        done.update(stage.key for stage in ordered)
+    return ordered
+
+
+def run_stages(config, storage_state, profile="debug", parallel=True, stages=STAGES):
+    """
+    按依赖关系调度运行流程阶段，依赖都已完成的阶段在线程池中同时运行
+
+    Playwright同步API的对象不能跨线程使用，每个阶段线程用storage_state启动自己的浏览器会话，
+    复用主会话的登录状态而不再登录；各阶段的状态都在自己的实例中，互不影响。
+    某个阶段出错时，依赖它的阶段不再运行，其余阶段照常完成
+
+    Args:
+        config: Config配置
+        storage_state: 已登录上下文的storage_state（字典）
+        profile: 浏览器性能配置
+        parallel: 为False时在同一个线程中按依赖顺序依次运行（用于对比）
+        stages: 要运行的阶段
+
+    Returns:
+        dict: {阶段key: 阶段函数的返回值}
+
+    Raises:
+        Exception: 任一阶段出错时在所有阶段结束后重新抛出第一个错误
+    """
+    from browser_session import BrowserSession
+
+    dependencies = stage_dependencies(stages)
+    by_key = {stage.key: stage for stage in stages}
+
+    def run_stage(stage):
+        logger.info(f"▶ 阶段开始: {stage.name}")
+        with BrowserSession.from_profile(config.USER_NAME, config.PASSWORD, profile=profile,
+                                         storage_state=storage_state) as session:
+            result = stage.func(config, session.context)
+        logger.info(f"✓ 阶段完成: {stage.name}")
+        return result
+
+    results = {}
+    errors = []
+    finished = set()
+    failed = set()
+    waiting = [stage.key for stage in stage_order(stages)]
+    pending = {}
+    workers = max(1, len(stages)) if parallel else 1
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stage") as executor:
+        while waiting or pending:
+            # 提交依赖都已完成的阶段，依赖出错的阶段直接跳过
+            for key in list(waiting):
+                if dependencies[key] & failed:
+                    logger.warning(f"⏭ 跳过阶段 {by_key[key].name}：依赖的阶段出错")
+                    waiting.remove(key)
+                    failed.add(key)
+                elif dependencies[key] <= finished:
+                    waiting.remove(key)
+                    pending[executor.submit(run_stage, by_key[key])] = key
+            if not pending:
+                continue
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                key = pending.pop(future)
+                try:
+                    results[key] = future.result()
+                    finished.add(key)
+                except Exception as e:
+                    logger.error(f"执行{by_key[key].name}时出错: {str(e)}")
+                    failed.add(key)
+                    errors.append(e)
+    if errors:
+        raise errors[0]
+    return results
+
+
+def run_stages_sequentially(config, session, stages=STAGES):
+    """在主线程中按依赖顺序依次运行各阶段，共享同一个已登录的浏览器上下文"""
+    for step, stage in enumerate(stage_order(stages), 2):
+        logger.info(f"\n[步骤{step}] 执行{stage.name}...")
+        try:
+            stage.func(config, session.context)
+            logger.info(f"{stage.name}完成")
+        except ImportError as e:
+            logger.error(f"导入{stage.name}模块失败: {str(e)}")
+            raise
+        except Exception as e:
+            logger.error(f"执行{stage.name}时出错: {str(e)}")
+            raise
+
+
+def main(stage_keys=None, parallel=None, resume=False):
+    """
+    主函数
+
+    Args:
+        stage_keys: 只运行这些阶段（--stages参数），为空时运行全部阶段
+        parallel: 是否并行运行互不依赖的阶段，为None时使用配置项PARALLEL_STAGES
+        resume: 爬取阶段从上次中断时的检查点继续（--resume参数）
+    """
     start_time = datetime.now()
     logger.info("===== 开始执行Linux Studio自动化学习流程 =====")
     logger.info(f"开始时间: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
@@ -79,7 +297,10 @@ def main():
     try:
         # 1. 加载配置文件
         logger.info("\n[步骤1] 加载配置文件...")
-        config = Config(config_path)
+        config = Config(config_path, RESUME=resume or None)
+        
+        # 日志级别：DEBUG时输出逐条链接、逐个选择器的调试信息
+        set_log_level(config.get('LOG_LEVEL', 'INFO'))
         
         # 验证必要的配置项
         required_configs = ['USER_NAME', 'PASSWORD']
@@ -88,35 +309,60 @@ def main():
                 logger.error(f"配置文件缺少必要项: {config_item}")
                 sys.exit(1)
         
-        # 2. 调用course_content_extractor.py的核心功能
-        logger.info("\n[步骤2] 执行课程内容提取...")
-        try:
-            # 动态导入模块
-            sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-            from course_content_extractor import main as extract_main
-            extract_main(config.USER_NAME, config.PASSWORD)
-            logger.info("课程内容提取完成")
-        except ImportError as e:
-            logger.error(f"导入course_content_extractor模块失败: {str(e)}")
-            raise
-        except Exception as e:
-            logger.error(f"执行课程内容提取时出错: {str(e)}")
-            raise
+        # 要运行的阶段
+        stages = select_stages(stage_keys)
+        if parallel is None:
+            parallel = config.get('PARALLEL_STAGES', False)
+        logger.info(f"运行阶段: {', '.join(stage.name for stage in stages)}")
         
-        # 3. 调用course_scraper.py的核心功能
-        logger.info("\n[步骤3] 执行课程信息爬取...")
-        try:
-            from course_scraper import main as scraper_main
-            scraper_main(config.USER_NAME, config.PASSWORD)
-            logger.info("课程信息爬取完成")
-        except ImportError as e:
-            logger.error(f"导入course_scraper模块失败: {str(e)}")
-            raise
-        except Exception as e:
-            logger.error(f"执行课程信息爬取时出错: {str(e)}")
-            raise
+        # 动态导入模块
+        sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+        from browser_session import BrowserSession, STORAGE_STATE_FILE
+        from course_page_parser import set_site_base_url
+        import page_readiness
+        import page_snapshot
+        import instrumentation
+        import artifact_store
         
+        # 站点根地址（可指向本地测试服务器）
+        if config.get('SITE_BASE_URL'):
+            set_site_base_url(config.SITE_BASE_URL)
+        
+        # 导航等待方式：targeted只等待页面就绪条件，networkidle为原有方式
+        page_readiness.set_wait_mode(config.get('READINESS_MODE', 'targeted'))
+        
+        # 启动一次浏览器并登录一次
+        logger.info("\n[启动] 启动浏览器并登录...")
+        storage_state_file = STORAGE_STATE_FILE if config.get('CACHE_SESSION', False) else None
+        profile = config.get('PERFORMANCE_PROFILE', 'debug')
+        logger.info(f"性能配置: {profile}")
+        with BrowserSession.from_profile(config.USER_NAME, config.PASSWORD, profile=profile,
+                                         storage_state_file=storage_state_file) as session:
+            logger.info(f"浏览器启动耗时 {session.startup_seconds:.2f}秒，登录耗时 {session.login_seconds:.2f}秒")
+            
+            if parallel and len(stages) > 1:
+                # Playwright同步API的对象不能跨线程使用，各阶段线程要用storage_state启动自己的浏览器；
+                # 主会话只用于登录，取得登录状态后立即关闭，不在阶段运行期间闲置
+                storage_state = session.context.storage_state()
+                session.close()
+                logger.info(f"\n[步骤2] 按依赖关系并行执行{len(stages)}个阶段...")
+                run_stages(config, storage_state, profile=profile, stages=stages)
+            else:
+                # 已登录的上下文由各阶段依次共享
+                run_stages_sequentially(config, session, stages)
+                
+                # 每个阶段单独运行时都要启动浏览器并登录一次，提取阶段结束时还会等待5秒
+                saved_seconds = session.setup_seconds + 5
+                logger.info(f"共享浏览器会话节省约 {saved_seconds:.2f}秒（少一次启动和登录，省去5秒关闭等待）")
+        
+        # 输出各类页面的导航耗时分布和各阶段耗时汇总
+        page_readiness.log_latency_report()
+        page_snapshot.log_snapshot_report()
         end_time = datetime.now()
+        instrumentation.log_phase_table((end_time - start_time).total_seconds())
+        instrumentation.close()
+        artifact_store.close()
+        
         logger.info(f"\n===== 自动化学习流程执行完成 =====")
         logger.info(f"结束时间: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
         logger.info(f"总执行时间: {end_time - start_time}")
@@ -128,5 +374,27 @@ def main():
         logger.error(f"\n程序执行出错: {str(e)}")
         sys.exit(1)
 
+def build_arg_parser():
+    """
+    命令行参数：--parallel/--no-parallel都不指定时（parallel为None）使用配置项PARALLEL_STAGES
+
+    Returns:
+        argparse.ArgumentParser: 参数解析器
+    """
+    parser = argparse.ArgumentParser(description="Linux Studio自动化学习")
+    parser.add_argument("--stages", help=f"只运行指定的阶段，逗号分隔（可选: {','.join(stage.key for stage in STAGES)}）")
+    # Python 3.8没有argparse.BooleanOptionalAction，用两个写入同一dest的开关
+    parser.add_argument("--parallel", dest="parallel", action="store_true", default=None,
+                        help="并行运行互不依赖的阶段（覆盖配置项PARALLEL_STAGES）")
+    parser.add_argument("--no-parallel", dest="parallel", action="store_false",
+                        help="依次运行各阶段（覆盖配置项PARALLEL_STAGES）")
+    parser.add_argument("--resume", action="store_true",
+                        help="从上次中断时的检查点继续学习课程，跳过已完成的课程和学习计划页面")
+    return parser
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # 日志经队列由后台线程输出，级别在加载配置文件后按LOG_LEVEL调整
+    setup_logging()
+    args = build_arg_parser().parse_args()
+    main(stage_keys=args.stages, parallel=args.parallel, resume=args.resume)
\ No newline at end of file
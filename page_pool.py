@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+浏览器页面池模块
+按任务租用页面，归还时导航到about:blank重置后留给下一个任务使用，
+只有页面已关闭或渲染进程崩溃时才创建新页面，避免每门课程、每次重试都新建和关闭页面
+"""
+
+import time
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# 归还页面时用于重置的空白页
+BLANK_URL = "about:blank"
+
+
+class PagePool:
+    """
+    BrowserContext上的页面池（Playwright同步API，只在创建它的线程中使用）
+
+    统计创建、复用、替换页面的次数，以及租用和归还页面的耗时，便于与每次新建页面的方式对比
+    """
+
+    def __init__(self, context, size=1, setup=None):
+        """
+        Args:
+            context: 已登录的BrowserContext
+            size: 最多保留的空闲页面数，多出的页面归还时直接关闭
+            setup: 新页面创建后调用的函数，例如设置默认超时
+        """
+        self.context = context
+        self.size = max(1, size)
+        self.setup = setup
+        self._idle = []
+        self._crashed = set()
+        self.pages_created = 0
+        self.leases = 0
+        self.replacements = 0
+        self.reset_failures = 0
+        # 租用和归还页面花费的时间（秒），即每个任务在页面管理上的开销
+        self.overhead_seconds = 0.0
+
+    def _create(self):
+        page = self.context.new_page()
+        page.on("crash", self._crashed.add)
+        if self.setup:
+            self.setup(page)
+        self.pages_created += 1
+        return page
+
+    def is_usable(self, page):
+        """页面是否还可以继续使用（未关闭、渲染进程未崩溃）"""
+        try:
+            return page is not None and page not in self._crashed and not page.is_closed()
+        except Exception:
+            return False
+
+    def _discard(self, page):
+        self._crashed.discard(page)
+        try:
+            if not page.is_closed():
+                page.close()
+        except Exception as e:
+            logger.debug("关闭页面失败: %s", e)
+
+    def acquire(self):
+        """
+        租用一个页面：优先使用空闲页面，没有可用的空闲页面时创建新页面
+
+        Returns:
+            Page: 可以使用的页面
+        """
+        start = time.perf_counter()
+        page = None
+        while self._idle and page is None:
+            candidate = self._idle.pop()
+            if self.is_usable(candidate):
+                page = candidate
+            else:
+                self._discard(candidate)
+        if page is None:
+            page = self._create()
+        self.leases += 1
+        self.overhead_seconds += time.perf_counter() - start
+        return page
+
+    def ensure(self, page):
+        """
+        检查租用中的页面，已关闭或崩溃时换成新页面
+
+        Args:
+            page: 租用中的页面
+
+        Returns:
+            Page: 原页面或替换后的新页面
+        """
+        if self.is_usable(page):
+            return page
+        start = time.perf_counter()
+        if page is not None:
+            self._discard(page)
+        logger.info("♻ 页面已关闭或崩溃，创建新页面")
+        page = self._create()
+        self.replacements += 1
+        self.overhead_seconds += time.perf_counter() - start
+        return page
+
+    def release(self, page):
+        """
+        归还页面：导航到about:blank清掉上一个任务的页面状态，重置失败或页面不可用时关闭
+
+        Args:
+            page: 租用的页面，为None时忽略
+        """
+        if page is None:
+            return
+        start = time.perf_counter()
+        if self.is_usable(page) and len(self._idle) < self.size:
+            try:
+                page.goto(BLANK_URL)
+                self._idle.append(page)
+            except Exception as e:
+                self.reset_failures += 1
+                logger.debug("重置页面失败，关闭该页面: %s", e)
+                self._discard(page)
+        else:
+            self._discard(page)
+        self.overhead_seconds += time.perf_counter() - start
+
+    @contextmanager
+    def lease(self):
+        """租用一个页面，退出时自动归还"""
+        page = self.acquire()
+        try:
+            yield page
+        finally:
+            self.release(page)
+
+    def stats(self):
+        """
+        Returns:
+            dict: 创建页面数、租用次数、替换次数、重置失败次数和平均每次租用的开销（秒）
+        """
+        return {
+            "pages_created": self.pages_created,
+            "leases": self.leases,
+            "replacements": self.replacements,
+            "reset_failures": self.reset_failures,
+            "overhead_per_lease": self.overhead_seconds / self.leases if self.leases else 0.0,
+        }
+
+    def close(self):
+        """关闭所有空闲页面"""
+        while self._idle:
+            self._discard(self._idle.pop())
+
+
+def benchmark_page_pool(context, urls, rounds=3):
+    """
+    比较“每个任务新建并关闭页面”和页面池两种方式打开同一组页面时的页面创建次数和每个任务的页面管理开销
+
+    Args:
+        context: 已登录的BrowserContext
+        urls: 每个任务打开的页面URL（例如各课程页面）
+        rounds: 轮数
+
+    Returns:
+        dict: {"new_page": {...}, "pool": {...}}，每项包含创建页面数、任务数和平均每个任务的开销（毫秒）
+    """
+    tasks = [url for _ in range(rounds) for url in urls]
+    results = {}
+
+    created = 0
+    overhead = 0.0
+    for url in tasks:
+        start = time.perf_counter()
+        page = context.new_page()
+        created += 1
+        overhead += time.perf_counter() - start
+        page.goto(url, wait_until="domcontentloaded")
+        start = time.perf_counter()
+        page.close()
+        overhead += time.perf_counter() - start
+    results["new_page"] = {"pages_created": created, "tasks": len(tasks),
+                           "overhead_ms": overhead / len(tasks) * 1000}
+
+    pool = PagePool(context)
+    try:
+        for url in tasks:
+            with pool.lease() as page:
+                page.goto(url, wait_until="domcontentloaded")
+    finally:
+        pool.close()
+    stats = pool.stats()
+    results["pool"] = {"pages_created": stats["pages_created"], "tasks": len(tasks),
+                       "overhead_ms": stats["overhead_per_lease"] * 1000}
+
+    for name, result in results.items():
+        logger.info(f"页面管理 {name}: {result['tasks']}个任务创建{result['pages_created']}个页面，"
+                    f"平均每个任务开销{result['overhead_ms']:.1f}ms")
+    return results
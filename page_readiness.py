@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+页面就绪条件模块
+每种页面类型声明自己"就绪"的判断条件（关键元素已出现），
+导航时只等待该条件，而不是等待networkidle（长轮询请求会让networkidle一直等到超时）
+"""
+
+import time
+import bisect
+import logging
+import threading
+from collections import defaultdict
+from instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+# 每种页面类型的就绪条件：页面上出现（attached）该选择器即视为就绪
+READY_CONDITIONS = {
+    "practice_list": "#study_content ul",
+    "practice": "font[color='#FF5809']",
+    "my_plan": "img[src*='content1.png']",
+    "course": "input[type='button'][value='完成本节学习'], input[type='button'][onclick*='survey.php']",
+    "survey": "form",
+}
+
+# 等待方式："targeted"只等待就绪条件，"networkidle"为原有的等待网络空闲
+WAIT_MODES = ("targeted", "networkidle")
+wait_mode = "targeted"
+
+# 直方图的桶上界（秒）
+HISTOGRAM_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30)
+
+# 导航耗时记录 {(页面类型, 等待方式): [秒, ...]}
+_latencies = defaultdict(list)
+_latencies_lock = threading.Lock()
+
+
+def set_wait_mode(mode):
+    """设置等待方式，未知的方式按targeted处理"""
+    global wait_mode
+    if mode not in WAIT_MODES:
+        logger.warning(f"未知的等待方式 {mode}，使用targeted")
+        mode = "targeted"
+    wait_mode = mode
+
+
+def record_latency(page_type, seconds, mode=None):
+    """记录一次导航耗时"""
+    with _latencies_lock:
+        _latencies[(page_type or "other", mode or wait_mode)].append(seconds)
+
+
+def latencies():
+    """返回导航耗时记录的副本"""
+    with _latencies_lock:
+        return {key: list(values) for key, values in _latencies.items()}
+
+
+def wait_until_ready(page, page_type, timeout=20000):
+    """
+    等待页面满足其类型的就绪条件
+
+    Args:
+        page: Playwright页面对象
+        page_type: READY_CONDITIONS中的页面类型，为None时只等待DOM加载完成
+        timeout: 超时时间（毫秒）
+
+    Returns:
+        bool: 是否在超时前就绪
+    """
+    try:
+        if wait_mode == "networkidle":
+            page.wait_for_load_state("networkidle", timeout=timeout)
+        elif page_type in READY_CONDITIONS:
+            page.wait_for_selector(READY_CONDITIONS[page_type], state="attached", timeout=timeout)
+        else:
+            page.wait_for_load_state("domcontentloaded", timeout=timeout)
+        return True
+    except Exception as e:
+        logger.warning(f"等待页面就绪超时（{page_type or 'other'}，{wait_mode}）: {e}")
+        return False
+
+
+def goto_ready(page, url, page_type=None, timeout=20000):
+    """
+    导航到指定页面并等待其就绪，同时记录导航耗时
+
+    导航本身失败（网络错误、超时）时抛出异常，就绪条件未满足时只记录警告
+
+    Args:
+        page: Playwright页面对象
+        url: 目标URL
+        page_type: READY_CONDITIONS中的页面类型
+        timeout: 导航和等待就绪各自的超时时间（毫秒）
+
+    Returns:
+        bool: 页面是否就绪
+    """
+    start = time.perf_counter()
+    with span("navigation", page_type=page_type or "other") as tags:
+        if wait_mode == "networkidle":
+            page.goto(url, wait_until="networkidle", timeout=timeout)
+            ready = True
+        else:
+            page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+            ready = wait_until_ready(page, page_type, timeout)
+        tags["ready"] = ready
+    record_latency(page_type, time.perf_counter() - start)
+    return ready
+
+
+async def wait_until_ready_async(page, page_type, timeout=20000):
+    """wait_until_ready的异步版本，page为playwright.async_api的页面对象"""
+    try:
+        if wait_mode == "networkidle":
+            await page.wait_for_load_state("networkidle", timeout=timeout)
+        elif page_type in READY_CONDITIONS:
+            await page.wait_for_selector(READY_CONDITIONS[page_type], state="attached", timeout=timeout)
+        else:
+            await page.wait_for_load_state("domcontentloaded", timeout=timeout)
+        return True
+    except Exception as e:
+        logger.warning(f"等待页面就绪超时（{page_type or 'other'}，{wait_mode}）: {e}")
+        return False
+
+
+async def goto_ready_async(page, url, page_type=None, timeout=20000):
+    """goto_ready的异步版本，导航耗时记录在同一份统计中"""
+    start = time.perf_counter()
+    with span("navigation", page_type=page_type or "other") as tags:
+        if wait_mode == "networkidle":
+            await page.goto(url, wait_until="networkidle", timeout=timeout)
+            ready = True
+        else:
+            await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+            ready = await wait_until_ready_async(page, page_type, timeout)
+        tags["ready"] = ready
+    record_latency(page_type, time.perf_counter() - start)
+    return ready
+
+
+def percentile(values, fraction):
+    """计算已排序列表的分位数"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def format_histogram(values, buckets=HISTOGRAM_BUCKETS, width=30):
+    """
+    把耗时列表格式化为文本直方图
+
+    Args:
+        values: 耗时列表（秒）
+        buckets: 桶上界
+        width: 最长柱的字符数
+
+    Returns:
+        str: 多行直方图文本
+    """
+    counts = [0] * (len(buckets) + 1)
+    for value in values:
+        counts[bisect.bisect_left(buckets, value)] += 1
+    peak = max(counts) or 1
+    labels = [f"≤{bucket}s" for bucket in buckets] + [f">{buckets[-1]}s"]
+    return "\n".join(
+        f"  {label:>7} | {'█' * round(count / peak * width):<{width}} {count}"
+        for label, count in zip(labels, counts)
+    )
+
+
+def log_latency_report():
+    """按页面类型和等待方式输出导航耗时统计与直方图"""
+    for (page_type, mode), values in sorted(latencies().items()):
+        values = sorted(values)
+        logger.info(f"导航耗时 [{page_type} / {mode}]: {len(values)}次，"
+                    f"p50={percentile(values, 0.5):.2f}秒，p95={percentile(values, 0.95):.2f}秒，"
+                    f"最长={values[-1]:.2f}秒\n{format_histogram(values)}")
+
+
+def benchmark_readiness(page, targets, rounds=3):
+    """
+    在同一页面上分别用networkidle和就绪条件两种方式多次导航，比较耗时分布
+
+    Args:
+        page: 已登录上下文中的Playwright页面对象
+        targets: [(url, 页面类型), ...]
+        rounds: 每种方式的重复轮数
+
+    Returns:
+        dict: {(页面类型, 等待方式): [秒, ...]}
+    """
+    previous_mode = wait_mode
+    try:
+        for mode in ("networkidle", "targeted"):
+            set_wait_mode(mode)
+            for _ in range(rounds):
+                for url, page_type in targets:
+                    try:
+                        goto_ready(page, url, page_type, timeout=30000)
+                    except Exception as e:
+                        logger.warning(f"导航失败 {url}: {e}")
+    finally:
+        set_wait_mode(previous_mode)
+    log_latency_report()
+    return latencies()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+页面HTML快照模块
+page.content()每次都要把整个DOM序列化后经IPC传回，同一个文档被登录检查、问卷页面检查、
+章节HTML保存和出错时的调试转储多次读取；这里按页面缓存一份快照，
+主框架发生导航（framenavigated）时作废，每个文档在每次导航后最多序列化一次
+"""
+
+import logging
+import threading
+import weakref
+
+logger = logging.getLogger(__name__)
+
+# 每个页面当前导航的快照 {page: html或None}，页面被回收后自动移除
+_snapshots = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+# 序列化次数、序列化的字节数和直接使用快照的次数
+_stats = {"serializations": 0, "bytes": 0, "hits": 0}
+
+
+def _watch(page):
+    """第一次读取某个页面时注册导航监听，主框架导航后作废该页面的快照"""
+    def on_navigated(frame):
+        if frame.parent_frame is None:
+            invalidate(page)
+
+    page.on("framenavigated", on_navigated)
+    _snapshots[page] = None
+
+
+def _cached(page):
+    with _lock:
+        if page not in _snapshots:
+            _watch(page)
+            return None
+        html = _snapshots[page]
+        if html is not None:
+            _stats["hits"] += 1
+        return html
+
+
+def _store(page, html):
+    with _lock:
+        _snapshots[page] = html
+        _stats["serializations"] += 1
+        _stats["bytes"] += len(html.encode("utf-8"))
+
+
+def page_html(page):
+    """
+    返回页面当前文档的HTML，同一次导航内只调用一次page.content()
+
+    页面在没有导航的情况下被脚本修改后，需要先调用invalidate()才能读到新内容
+
+    Args:
+        page: Playwright同步API的页面对象
+
+    Returns:
+        str: 页面HTML
+    """
+    html = _cached(page)
+    if html is None:
+        html = page.content()
+        _store(page, html)
+    return html
+
+
+async def page_html_async(page):
+    """page_html的异步版本（Playwright异步API的页面对象）"""
+    html = _cached(page)
+    if html is None:
+        html = await page.content()
+        _store(page, html)
+    return html
+
+
+def invalidate(page):
+    """作废页面的快照，下次读取时重新序列化"""
+    with _lock:
+        if page in _snapshots:
+            _snapshots[page] = None
+
+
+def snapshot_stats():
+    """
+    Returns:
+        dict: serializations（page.content()调用次数）、bytes（序列化的UTF-8字节数）、
+              hits（直接使用快照、省去的序列化次数）
+    """
+    with _lock:
+        return dict(_stats)
+
+
+def reset_stats():
+    """清零统计（基准测试在每次运行前调用）"""
+    with _lock:
+        for key in _stats:
+            _stats[key] = 0
+
+
+def log_snapshot_report():
+    """输出页面快照的序列化次数和字节数"""
+    stats = snapshot_stats()
+    logger.info(f"📸 页面HTML快照: 序列化{stats['serializations']}次，共{stats['bytes'] / 1024:.0f}KB，"
+                f"复用快照{stats['hits']}次")
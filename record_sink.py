@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+课程记录追加写入模块
+每条课程记录只写入一次（JSON Lines + CSV行），按批次fsync，
+旧版格式化的JSON文件改为按需从JSON Lines导出
+"""
+
+import os
+import csv
+import json
+import time
+import logging
+import tempfile
+from log_setup import setup_logging
+from records import CourseRecord, COURSE_RECORD_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# 输出文件
+RECORDS_JSONL_FILE = "output/completed_courses.jsonl"
+RECORDS_CSV_FILE = "output/completed_courses.csv"
+RECORDS_JSON_FILE = "output/completed_courses.json"
+
+# CSV列名，与CourseRecord的字段一致
+FIELDNAMES = list(COURSE_RECORD_FIELDS)
+
+
+class CourseRecordSink:
+    """只追加的课程记录写入器，每写入fsync_every条记录执行一次fsync"""
+
+    def __init__(self, jsonl_file=RECORDS_JSONL_FILE, csv_file=RECORDS_CSV_FILE, fsync_every=5):
+        self.jsonl_file = jsonl_file
+        self.csv_file = csv_file
+        self.fsync_every = max(1, fsync_every)
+        self.records_written = 0
+        self.bytes_written = 0
+        self._pending = 0
+
+        for filename in (jsonl_file, csv_file):
+            directory = os.path.dirname(filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+        write_header = not os.path.exists(csv_file) or os.path.getsize(csv_file) == 0
+        self._jsonl = open(jsonl_file, 'a', encoding='utf-8')
+        self._csv = open(csv_file, 'a', newline='', encoding='utf-8')
+        self._csv_writer = csv.writer(self._csv)
+        if write_header:
+            self._csv_writer.writerow(FIELDNAMES)
+
+    def write(self, record):
+        """
+        追加写入一条课程记录
+
+        Args:
+            record: collect_course_info生成的CourseRecord
+        """
+        row = record.as_row()
+        line = json.dumps(dict(zip(FIELDNAMES, row)), ensure_ascii=False) + "\n"
+        self._jsonl.write(line)
+        csv_start = self._csv.tell()
+        self._csv_writer.writerow(row)
+        self.bytes_written += len(line.encode('utf-8')) + (self._csv.tell() - csv_start)
+
+        self.records_written += 1
+        self._pending += 1
+        if self._pending >= self.fsync_every:
+            self.flush()
+
+    def flush(self, fsync=True):
+        """把缓冲区写入磁盘，fsync为True时确保数据落盘"""
+        for f in (self._jsonl, self._csv):
+            if f.closed:
+                continue
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        self._pending = 0
+
+    def close(self):
+        """落盘并关闭文件"""
+        if self._jsonl.closed:
+            return
+        self.flush()
+        self._jsonl.close()
+        self._csv.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_records(jsonl_file=RECORDS_JSONL_FILE):
+    """逐条读取JSON Lines文件中的课程记录，跳过写到一半的末行"""
+    if not os.path.exists(jsonl_file):
+        return
+    with open(jsonl_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"跳过无法解析的记录行: {line[:80]}")
+
+
+def export_legacy_json(jsonl_file=RECORDS_JSONL_FILE, json_file=RECORDS_JSON_FILE):
+    """
+    从JSON Lines文件导出旧版格式化的JSON数组文件
+
+    Args:
+        jsonl_file: 追加写入的JSON Lines文件
+        json_file: 导出的JSON文件
+
+    Returns:
+        int: 导出的记录数
+    """
+    records = list(read_records(jsonl_file))
+    with open(json_file, 'w', encoding='utf-8') as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+    return len(records)
+
+
+def _make_record(i):
+    return CourseRecord(time.time(), f"基准课程{i}", str(i), 65, 'completed')
+
+
+def benchmark_record_sink(n_records=10000, save_every=5, legacy_records=300):
+    """
+    对比旧版"每5条重写JSON并追加整个列表到CSV"与追加写入方式的写放大和耗时
+
+    旧版方式写入量随记录数立方增长，10k条无法在合理时间内完成，
+    因此只用legacy_records条记录测量旧版方式
+
+    Args:
+        n_records: 追加写入方式的记录条数
+        save_every: 旧版方式的保存间隔（同时作为fsync批次大小）
+        legacy_records: 旧版方式的记录条数
+
+    Returns:
+        dict: 两种方式写入的字节数、写放大倍数和耗时
+    """
+    records = [_make_record(i) for i in range(max(n_records, legacy_records))]
+
+    def payload_bytes(count):
+        return sum(len(json.dumps(r.to_dict(), ensure_ascii=False).encode('utf-8')) + 1 for r in records[:count])
+
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # 旧版方式：course_data不断增长，每次保存都读取并重写整个JSON，并把整个列表追加到CSV
+        json_file = os.path.join(tmp_dir, "legacy.json")
+        csv_file = os.path.join(tmp_dir, "legacy.csv")
+        legacy_bytes = 0
+        course_data = []
+        start = time.perf_counter()
+        for i, record in enumerate(records[:legacy_records], 1):
+            course_data.append(record.to_dict())
+            if i % save_every == 0 or i == legacy_records:
+                existing = []
+                if os.path.exists(json_file):
+                    with open(json_file, 'r', encoding='utf-8') as f:
+                        existing = json.load(f)
+                existing.extend(course_data)
+                with open(json_file, 'w', encoding='utf-8') as f:
+                    json.dump(existing, f, ensure_ascii=False, indent=2)
+                legacy_bytes += os.path.getsize(json_file)
+                csv_size = os.path.getsize(csv_file) if os.path.exists(csv_file) else 0
+                with open(csv_file, 'a', newline='', encoding='utf-8') as f:
+                    writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+                    writer.writerows(course_data)
+                legacy_bytes += os.path.getsize(csv_file) - csv_size
+        results["legacy"] = {
+            "records": legacy_records,
+            "seconds": time.perf_counter() - start,
+            "bytes": legacy_bytes
+        }
+
+        # 追加写入方式：每条记录写入一次，最后按需导出JSON
+        jsonl_file = os.path.join(tmp_dir, "sink.jsonl")
+        start = time.perf_counter()
+        with CourseRecordSink(jsonl_file, os.path.join(tmp_dir, "sink.csv"), fsync_every=save_every) as sink:
+            for record in records[:n_records]:
+                sink.write(record)
+        sink_seconds = time.perf_counter() - start
+        export_start = time.perf_counter()
+        export_legacy_json(jsonl_file, os.path.join(tmp_dir, "sink.json"))
+        results["sink"] = {
+            "records": n_records,
+            "seconds": sink_seconds,
+            "export_seconds": time.perf_counter() - export_start,
+            "bytes": sink.bytes_written
+        }
+
+    for name, result in results.items():
+        result["write_amplification"] = result["bytes"] / payload_bytes(result["records"])
+        logger.info(f"{name}: {result['records']}条记录耗时{result['seconds']:.2f}秒, "
+                    f"写入{result['bytes'] / 1024 / 1024:.1f}MB, "
+                    f"写放大{result['write_amplification']:.1f}x")
+    logger.info(f"按需导出JSON耗时{results['sink']['export_seconds']:.3f}秒")
+    return results
+
+
+if __name__ == "__main__":
+    setup_logging()
+    benchmark_record_sink()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+链接和课程学习结果的记录类型
+使用带__slots__的dataclass代替逐条创建的字典，时间戳保存为epoch浮点数，
+只在写入文件或运行存储时才格式化为字符串
+"""
+
+import gc
+import time
+import logging
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from log_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# 输出文件和运行存储中使用的时间格式
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 课程记录的字段顺序（CSV列名）
+COURSE_RECORD_FIELDS = ('timestamp', 'course_name', 'course_id', 'duration', 'status')
+
+
+@lru_cache(maxsize=256)
+def _format_second(second):
+    return time.strftime(TIME_FORMAT, time.localtime(second))
+
+
+def format_timestamp(timestamp):
+    """
+    把epoch时间戳格式化为TIME_FORMAT字符串（按秒缓存，同一章节的链接只格式化一次）
+
+    Args:
+        timestamp: time.time()返回的时间戳，为None时返回None
+
+    Returns:
+        str: 格式化后的时间
+    """
+    if timestamp is None:
+        return None
+    return _format_second(int(timestamp))
+
+
+@dataclass
+class LinkInfo:
+    """练习章节中的一个链接"""
+    __slots__ = ('index', 'href', 'text', 'completed', 'extraction_time')
+    index: int
+    href: str
+    text: str
+    completed: bool
+    extraction_time: float
+
+    @property
+    def status(self):
+        return "completed" if self.completed else "incomplete"
+
+    def to_dict(self):
+        """转换为原有的链接字典格式（时间戳在这里格式化）"""
+        return {
+            "index": self.index,
+            "href": self.href,
+            "text": self.text,
+            "completed": self.completed,
+            "extraction_time": format_timestamp(self.extraction_time)
+        }
+
+
+@dataclass
+class CourseRecord:
+    """一次课程学习的结果"""
+    __slots__ = COURSE_RECORD_FIELDS
+    timestamp: float
+    course_name: str
+    course_id: str
+    duration: int
+    status: str
+
+    def as_row(self):
+        """按COURSE_RECORD_FIELDS顺序返回一行（时间戳在这里格式化）"""
+        return (format_timestamp(self.timestamp), self.course_name, self.course_id, self.duration, self.status)
+
+    def to_dict(self):
+        """转换为原有的课程记录字典格式"""
+        return dict(zip(COURSE_RECORD_FIELDS, self.as_row()))
+
+
+def benchmark_record_memory(n_records=100000):
+    """
+    用tracemalloc比较逐条字典（每条链接单独strftime）与__slots__记录在n_records条记录下的内存和分配次数
+
+    Args:
+        n_records: 链接记录和课程记录各生成的条数
+
+    Returns:
+        dict: 每种写法保留的内存（字节）、峰值内存和存活的分配块数
+    """
+    def dict_links():
+        return [
+            {
+                "index": i + 1,
+                "href": f"http://www.linuxstudio.cn/practice_process.php?chapter=Linux&id={i}",
+                "text": f"Linux 第{i}关",
+                "completed": i % 2 == 0,
+                "extraction_time": datetime.now().strftime(TIME_FORMAT)
+            }
+            for i in range(n_records)
+        ]
+
+    def slot_links():
+        extraction_time = time.time()
+        return [
+            LinkInfo(i + 1, f"http://www.linuxstudio.cn/practice_process.php?chapter=Linux&id={i}",
+                     f"Linux 第{i}关", i % 2 == 0, extraction_time)
+            for i in range(n_records)
+        ]
+
+    def dict_courses():
+        return [
+            {
+                'timestamp': datetime.now().strftime(TIME_FORMAT),
+                'course_name': f"课程{i}",
+                'course_id': str(i),
+                'duration': 65,
+                'status': 'completed'
+            }
+            for i in range(n_records)
+        ]
+
+    def slot_courses():
+        return [CourseRecord(time.time(), f"课程{i}", str(i), 65, 'completed') for i in range(n_records)]
+
+    def measure(build):
+        gc.collect()
+        tracemalloc.start()
+        try:
+            start = time.perf_counter()
+            records = build()
+            seconds = time.perf_counter() - start
+            current, peak = tracemalloc.get_traced_memory()
+            blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+        finally:
+            tracemalloc.stop()
+        # 同样的数据按相同格式序列化，确认两种写法的输出一致
+        first = records[0] if isinstance(records[0], dict) else records[0].to_dict()
+        del records
+        return {"bytes": current, "peak_bytes": peak, "blocks": blocks, "seconds": seconds, "first": first}
+
+    results = {}
+    for name, build in (("dict_links", dict_links), ("slot_links", slot_links),
+                        ("dict_courses", dict_courses), ("slot_courses", slot_courses)):
+        results[name] = measure(build)
+    assert results["dict_links"]["first"].keys() == results["slot_links"]["first"].keys()
+    assert results["dict_courses"]["first"].keys() == results["slot_courses"]["first"].keys()
+
+    logger.info(f"=== 记录类型内存基准测试（tracemalloc，各{n_records}条） ===")
+    for name, result in results.items():
+        logger.info(f"{name}: 保留{result['bytes'] / 1024 / 1024:.1f}MB，峰值{result['peak_bytes'] / 1024 / 1024:.1f}MB，"
+                    f"{result['blocks']}个分配块，耗时{result['seconds']:.2f}秒")
+    for kind in ("links", "courses"):
+        old, new = results[f"dict_{kind}"], results[f"slot_{kind}"]
+        logger.info(f"📉 {kind}: 内存减少{(1 - new['bytes'] / old['bytes']) * 100:.0f}%，"
+                    f"分配块减少{(1 - new['blocks'] / old['blocks']) * 100:.0f}%")
+    return results
+
+
+if __name__ == "__main__":
+    setup_logging()
+    benchmark_record_memory()
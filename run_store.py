@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行数据存储模块
+使用内嵌SQLite（WAL模式）统一保存每次运行、提取到的链接和课程学习结果，
+"哪些课程还未完成"等查询直接走索引，不再重新扫描JSON文件
+"""
+
+import os
+import csv
+import json
+import time
+import sqlite3
+import threading
+import itertools
+import logging
+from datetime import datetime
+from records import format_timestamp
+
+logger = logging.getLogger(__name__)
+
+# 数据库文件
+RUN_STORE_FILE = "output/run_store.db"
+
+# 导出链接时的字段顺序
+LINK_FIELDS = ["chapter", "index", "text", "href", "status", "completed", "extraction_time"]
+
+# 视为"未完成"的状态，查询时使用IN以便命中status索引
+INCOMPLETE_STATUSES = ("incomplete", "failed", "submission_failed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    stage TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    status TEXT NOT NULL DEFAULT 'running'
+);
+
+CREATE TABLE IF NOT EXISTS links (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER REFERENCES runs(id),
+    chapter TEXT NOT NULL,
+    item_index INTEGER NOT NULL,
+    href TEXT NOT NULL,
+    text TEXT,
+    status TEXT NOT NULL,
+    extraction_time TEXT,
+    UNIQUE (chapter, href)
+);
+CREATE INDEX IF NOT EXISTS idx_links_chapter ON links(chapter);
+CREATE INDEX IF NOT EXISTS idx_links_status ON links(status);
+
+CREATE TABLE IF NOT EXISTS course_outcomes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER REFERENCES runs(id),
+    course_id TEXT,
+    course_name TEXT NOT NULL,
+    chapter TEXT,
+    duration INTEGER,
+    status TEXT NOT NULL,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_outcomes_course_id ON course_outcomes(course_id);
+
+CREATE TABLE IF NOT EXISTS courses (
+    course_id TEXT NOT NULL,
+    course_name TEXT NOT NULL,
+    chapter TEXT,
+    status TEXT NOT NULL,
+    last_run_id INTEGER REFERENCES runs(id),
+    updated_at TEXT,
+    PRIMARY KEY (course_id, course_name)
+);
+CREATE INDEX IF NOT EXISTS idx_courses_course_id ON courses(course_id);
+CREATE INDEX IF NOT EXISTS idx_courses_chapter ON courses(chapter);
+CREATE INDEX IF NOT EXISTS idx_courses_status ON courses(status);
+
+CREATE TABLE IF NOT EXISTS page_fingerprints (
+    url TEXT PRIMARY KEY,
+    fingerprint TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    pending INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL
+);
+"""
+
+
+# 不带缩进的编码器走C实现，复用同一个实例编码链接字段
+_encode_json = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _write_json_array(f, items):
+    """
+    把只含标量字段的字典逐个写成顶层对象中的JSON数组（格式与json.dump(indent=2)一致）
+
+    Returns:
+        int: 写出的元素个数
+    """
+    count = 0
+    for item in items:
+        f.write("[\n    {\n      " if count == 0 else ",\n    {\n      ")
+        f.write(",\n      ".join(f"{_encode_json(key)}: {_encode_json(value)}" for key, value in item.items()))
+        f.write("\n    }")
+        count += 1
+    f.write("\n  ]" if count else "[]")
+    return count
+
+
+class RunStore:
+    """SQLite运行数据存储，每个实例持有一个连接"""
+
+    def __init__(self, db_file=RUN_STORE_FILE):
+        self.db_file = db_file
+        directory = os.path.dirname(db_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.run_id = None
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def start_run(self, stage):
+        """
+        开始一次运行记录
+
+        Args:
+            stage: 阶段名称（例如"extract"、"scrape"）
+
+        Returns:
+            int: 运行ID
+        """
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (stage, started_at) VALUES (?, ?)", (stage, time.time())
+            )
+        self.run_id = cursor.lastrowid
+        return self.run_id
+
+    def finish_run(self, status="finished"):
+        """结束当前运行记录"""
+        if self.run_id is None:
+            return
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE runs SET finished_at = ?, status = ? WHERE id = ?",
+                (time.time(), status, self.run_id)
+            )
+
+    def save_links(self, chapter, completed_links, incomplete_links):
+        """
+        写入（或更新）一个章节提取到的链接
+
+        Args:
+            chapter: 章节名称
+            completed_links: 已完成的LinkInfo列表
+            incomplete_links: 未完成的LinkInfo列表
+        """
+        # 逐条生成参数行，不复制链接列表
+        rows = (
+            (self.run_id, chapter, link.index, link.href, link.text, link.status,
+             format_timestamp(link.extraction_time))
+            for link in itertools.chain(completed_links, incomplete_links)
+        )
+        with self._lock, self.conn:
+            self.conn.executemany(
+                """INSERT INTO links (run_id, chapter, item_index, href, text, status, extraction_time)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (chapter, href) DO UPDATE SET
+                       run_id = excluded.run_id, item_index = excluded.item_index,
+                       text = excluded.text, status = excluded.status,
+                       extraction_time = excluded.extraction_time""",
+                rows
+            )
+
+    def record_course_outcome(self, record, chapter=None):
+        """
+        记录一次课程学习结果，同时更新该课程的最新状态
+
+        Args:
+            record: collect_course_info生成的CourseRecord
+            chapter: 课程所属章节（可选）
+        """
+        course_id = record.course_id or ""
+        timestamp = format_timestamp(record.timestamp)
+        with self._lock, self.conn:
+            self.conn.execute(
+                """INSERT INTO course_outcomes (run_id, course_id, course_name, chapter, duration, status, timestamp)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (self.run_id, course_id, record.course_name, chapter,
+                 record.duration, record.status, timestamp)
+            )
+            self.conn.execute(
+                """INSERT INTO courses (course_id, course_name, chapter, status, last_run_id, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (course_id, course_name) DO UPDATE SET
+                       chapter = COALESCE(excluded.chapter, courses.chapter),
+                       status = excluded.status, last_run_id = excluded.last_run_id,
+                       updated_at = excluded.updated_at""",
+                (course_id, record.course_name, chapter, record.status, self.run_id, timestamp)
+            )
+
+    def get_fingerprint(self, url):
+        """
+        查询页面上次记录的内容指纹
+
+        Returns:
+            dict: 包含fingerprint、etag、last_modified、pending的字典，没有记录时返回None
+        """
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM page_fingerprints WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+
+    def save_fingerprint(self, url, fingerprint, etag=None, last_modified=None, pending=0):
+        """
+        记录页面的内容指纹
+
+        Args:
+            url: 页面URL
+            fingerprint: 页面内容哈希
+            etag: 响应头中的ETag
+            last_modified: 响应头中的Last-Modified
+            pending: 记录时页面上仍待处理的项目数量
+        """
+        with self._lock, self.conn:
+            self.conn.execute(
+                """INSERT INTO page_fingerprints (url, fingerprint, etag, last_modified, pending, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (url) DO UPDATE SET
+                       fingerprint = excluded.fingerprint, etag = excluded.etag,
+                       last_modified = excluded.last_modified, pending = excluded.pending,
+                       updated_at = excluded.updated_at""",
+                (url, fingerprint, etag, last_modified, pending, time.time())
+            )
+
+    def completed_course_names(self):
+        """返回最新状态为已完成的课程名称集合（走status索引）"""
+        with self._lock:
+            rows = self.conn.execute("SELECT course_name FROM courses WHERE status = 'completed'").fetchall()
+        return {row["course_name"] for row in rows}
+
+    def incomplete_links(self, chapter=None):
+        """查询未完成的链接（走status/chapter索引）"""
+        with self._lock:
+            if chapter is None:
+                rows = self.conn.execute(
+                    "SELECT * FROM links WHERE status = 'incomplete' ORDER BY chapter, item_index"
+                ).fetchall()
+            else:
+                rows = self.conn.execute(
+                    "SELECT * FROM links WHERE chapter = ? AND status = 'incomplete' ORDER BY item_index",
+                    (chapter,)
+                ).fetchall()
+        return [dict(row) for row in rows]
+
+    def incomplete_courses(self, chapter=None):
+        """查询最新状态仍未完成的课程（走status/chapter索引）"""
+        placeholders = ", ".join("?" for _ in INCOMPLETE_STATUSES)
+        query = f"SELECT * FROM courses WHERE status IN ({placeholders})"
+        params = list(INCOMPLETE_STATUSES)
+        if chapter is not None:
+            query += " AND chapter = ?"
+            params.append(chapter)
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def course_status(self, course_id):
+        """查询课程的最新状态，没有记录时返回None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT status FROM courses WHERE course_id = ? ORDER BY updated_at DESC LIMIT 1",
+                (course_id,)
+            ).fetchone()
+        return row["status"] if row else None
+
+    def iter_links(self, status=None):
+        """
+        按章节和序号逐条返回链接（直接遍历游标，不一次性读入内存）
+
+        调用方需要在遍历结束前持有连接，导出期间其他线程的写入会等待
+
+        Args:
+            status: 只返回指定状态（"completed"/"incomplete"）的链接，为None时返回全部
+
+        Yields:
+            dict: 链接字典（字段与LINK_FIELDS相同）
+        """
+        if status is None:
+            cursor = self.conn.execute("SELECT * FROM links ORDER BY chapter, item_index")
+        else:
+            cursor = self.conn.execute(
+                "SELECT * FROM links WHERE status = ? ORDER BY chapter, item_index", (status,)
+            )
+        for row in cursor:
+            yield {
+                "chapter": row["chapter"],
+                "index": row["item_index"],
+                "href": row["href"],
+                "text": row["text"],
+                "status": row["status"],
+                "completed": row["status"] == "completed",
+                "extraction_time": row["extraction_time"]
+            }
+
+    def links(self):
+        """按章节和序号返回全部链接"""
+        with self._lock:
+            return list(self.iter_links())
+
+    def export_links_json(self, json_file):
+        """
+        把全部链接导出为JSON文件（保持原有的completed/incomplete/summary结构）
+
+        逐条写出链接，统计数在写出过程中累计，不在内存中构建完整的数据结构
+        """
+        with self._lock, open(json_file, "w", encoding="utf-8") as f:
+            f.write('{\n  "extraction_time": ')
+            f.write(json.dumps(datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+            f.write(',\n  "completed_links": ')
+            total_completed = _write_json_array(f, self.iter_links("completed"))
+            f.write(',\n  "incomplete_links": ')
+            total_incomplete = _write_json_array(f, self.iter_links("incomplete"))
+            summary = {
+                "total_completed": total_completed,
+                "total_incomplete": total_incomplete,
+                "total": total_completed + total_incomplete
+            }
+            f.write(',\n  "summary": ')
+            f.write(json.dumps(summary, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+            f.write("\n}")
+
+    def export_links_csv(self, csv_file):
+        """把全部链接逐条导出为CSV文件"""
+        with self._lock, open(csv_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=LINK_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.iter_links())
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+选择器命中缓存
+按页面类型记录每个候选选择器的命中/未命中次数和上一次命中的选择器，
+下次运行时优先尝试最可能命中的选择器，避免按固定顺序逐个等待超时
+"""
+
+import os
+import json
+import time
+import logging
+from log_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# 缓存文件路径
+SELECTOR_CACHE_FILE = "output/selector_cache.json"
+
+
+class SelectorCache:
+    """持久化的选择器命中缓存，按页面类型分组"""
+
+    def __init__(self, cache_file=SELECTOR_CACHE_FILE):
+        self.cache_file = cache_file
+        self.data = {}
+        self.load()
+
+    def load(self):
+        """从缓存文件读取命中记录，文件不存在或损坏时从空缓存开始"""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+        except Exception as e:
+            logger.warning(f"读取选择器缓存失败，将重新学习: {e}")
+            self.data = {}
+
+    def save(self):
+        """把命中记录写回缓存文件（先写临时文件再替换，避免写到一半中断）"""
+        if not self.cache_file:
+            return
+        try:
+            directory = os.path.dirname(self.cache_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_file = f"{self.cache_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            logger.warning(f"保存选择器缓存失败: {e}")
+
+    def _entry(self, page_type):
+        return self.data.setdefault(page_type, {"last_winner": None, "stats": {}})
+
+    def _stats(self, page_type, selector):
+        return self._entry(page_type)["stats"].setdefault(selector, {"hits": 0, "misses": 0})
+
+    def ordered(self, page_type, candidates, key=None):
+        """
+        按命中情况重新排序候选选择器
+
+        排序规则：上一次命中的选择器优先，其次按命中次数从多到少、
+        未命中次数从少到多，最后保持原有顺序
+
+        Args:
+            page_type: 页面类型（例如"finish"、"difficulty"）
+            candidates: 候选选择器列表，元素可以是字符串或字典
+            key: 从候选元素中取出选择器字符串的函数，默认为元素本身
+
+        Returns:
+            list: 重新排序后的候选列表
+        """
+        key = key or (lambda candidate: candidate)
+        entry = self.data.get(page_type)
+        if not entry:
+            return list(candidates)
+
+        last_winner = entry.get("last_winner")
+        stats = entry.get("stats", {})
+
+        def sort_key(item):
+            position, candidate = item
+            selector = key(candidate)
+            selector_stats = stats.get(selector, {})
+            return (
+                selector != last_winner,
+                -selector_stats.get("hits", 0),
+                selector_stats.get("misses", 0),
+                position
+            )
+
+        return [candidate for _, candidate in sorted(enumerate(candidates), key=sort_key)]
+
+    def record_hit(self, page_type, selector):
+        """记录选择器命中，并将其设为该页面类型的首选"""
+        self._stats(page_type, selector)["hits"] += 1
+        self._entry(page_type)["last_winner"] = selector
+
+    def record_miss(self, page_type, selector):
+        """记录选择器未命中"""
+        self._stats(page_type, selector)["misses"] += 1
+
+
+# 基准测试用的本地问卷页面：命中的都是各候选列表中最靠后的选择器
+SURVEY_FIXTURE_HTML = """<!DOCTYPE html><html><head><title>调查问卷</title></head><body>
+<form action="survey.php" method="post">
+  <p>难度：<input type="radio" name="q1" value="1">容易 <input type="radio" name="q1" value="3">困难</p>
+  <p>实用性：<input type="radio" name="q2" value="2">有用 <input type="radio" name="q2" value="0">无用</p>
+  <input type="button" value="提交问卷">
+</form>
+</body></html>"""
+
+
+def benchmark_selector_cache(rounds=10, miss_timeout=500):
+    """
+    在本地问卷页面上对比冷启动（空缓存）与热启动（已学习缓存）时的选择器查找耗时
+
+    每个选择器都使用wait_for_selector探测，未命中时需等待miss_timeout毫秒，
+    与真实页面上的固定顺序级联行为一致
+
+    Args:
+        rounds: 热启动重复次数
+        miss_timeout: 单个选择器未命中时的等待时间（毫秒）
+
+    Returns:
+        dict: 冷启动与热启动的耗时和探测次数
+    """
+    from playwright.sync_api import sync_playwright
+    from course_scraper import DIFFICULTY_SELECTORS, USE_SELECTORS, SUBMIT_SELECTORS
+
+    cascades = {
+        "difficulty": [option["selector"] for option in DIFFICULTY_SELECTORS],
+        "use": [option["selector"] for option in USE_SELECTORS],
+        "submit": SUBMIT_SELECTORS,
+    }
+    cache = SelectorCache(cache_file=None)
+
+    def run_cascades(page):
+        probes = 0
+        start = time.perf_counter()
+        for page_type, candidates in cascades.items():
+            for selector in cache.ordered(page_type, candidates):
+                probes += 1
+                locator_selector = f"xpath={selector}" if "//" in selector else selector
+                try:
+                    page.wait_for_selector(locator_selector, state="attached", timeout=miss_timeout)
+                    cache.record_hit(page_type, selector)
+                    break
+                except Exception:
+                    cache.record_miss(page_type, selector)
+        return time.perf_counter() - start, probes
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+        try:
+            page.set_content(SURVEY_FIXTURE_HTML)
+            cold_seconds, cold_probes = run_cascades(page)
+            warm_runs = [run_cascades(page) for _ in range(rounds)]
+        finally:
+            page.close()
+            browser.close()
+
+    warm_seconds = sum(seconds for seconds, _ in warm_runs) / len(warm_runs)
+    warm_probes = warm_runs[-1][1]
+    logger.info(f"冷启动: {cold_seconds:.2f}秒, 探测{cold_probes}次")
+    logger.info(f"热启动: {warm_seconds:.3f}秒, 探测{warm_probes}次（{rounds}次平均）")
+    return {
+        "cold": {"seconds": cold_seconds, "probes": cold_probes},
+        "warm": {"seconds": warm_seconds, "probes": warm_probes},
+    }
+
+
+if __name__ == "__main__":
+    setup_logging()
+    benchmark_selector_cache()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""调试快照存储：按sha256去重、条数和大小上限、索引恢复"""
+
+import os
+import hashlib
+
+import pytest
+
+from artifact_store import ArtifactStore, MAX_ARTIFACTS, MAX_ARTIFACT_MB
+
+
+def blob_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".html.gz"))
+
+
+@pytest.fixture
+def open_stores():
+    stores = []
+    yield stores
+    for store in stores:
+        store.close()
+
+
+def open_store(open_stores, directory, **kwargs):
+    store = ArtifactStore(str(directory), **kwargs)
+    open_stores.append(store)
+    return store
+
+
+def test_identical_content_is_stored_once(tmp_path, open_stores):
+    store = open_store(open_stores, tmp_path)
+    for chapter in ("章节1", "章节2", "章节3"):
+        store.save("<html>same</html>", "chapter_page", run=1, course=chapter)
+    store.save("<html>other</html>", "chapter_page", run=1, course="章节4")
+    store.flush()
+
+    digest = hashlib.sha256("<html>same</html>".encode("utf-8")).hexdigest()
+    assert store.stats["deduplicated"] == 2
+    assert blob_files(tmp_path) == sorted([f"{digest}.html.gz",
+                                           f"{hashlib.sha256(b'<html>other</html>').hexdigest()}.html.gz"])
+    # 每次保存都有自己的索引条目，指向同一个快照文件
+    assert [entry["hash"] for entry in store.entries[:3]] == [digest] * 3
+    assert store.read(store.find(course="章节2")[0]) == "<html>same</html>"
+
+
+def test_default_limits():
+    assert (MAX_ARTIFACTS, MAX_ARTIFACT_MB) == (200, 50)
+
+
+def test_ring_evicts_oldest_entries_beyond_item_limit(tmp_path, open_stores):
+    store = open_store(open_stores, tmp_path)
+    for i in range(MAX_ARTIFACTS + 5):
+        store.save(f"<html>page {i}</html>", "chapter_page", run=1, course=f"章节{i}")
+    store.flush()
+
+    assert len(store.entries) == MAX_ARTIFACTS
+    assert store.entries[0]["course"] == "章节5"
+    assert store.stats["evicted"] == 5
+    assert len(blob_files(tmp_path)) == MAX_ARTIFACTS
+
+
+def test_shared_blob_survives_until_last_reference_is_evicted(tmp_path, open_stores):
+    store = open_store(open_stores, tmp_path, max_items=2)
+    store.save("<html>same</html>", "chapter_page", course="章节1")
+    store.save("<html>same</html>", "chapter_page", course="章节2")
+    store.save("<html>new</html>", "chapter_page", course="章节3")
+    store.flush()
+    assert len(blob_files(tmp_path)) == 2
+
+    store.save("<html>newer</html>", "chapter_page", course="章节4")
+    store.flush()
+    assert [entry["course"] for entry in store.entries] == ["章节3", "章节4"]
+    assert len(blob_files(tmp_path)) == 2
+
+
+def test_ring_evicts_beyond_size_limit(tmp_path, open_stores):
+    # 随机内容几乎不可压缩，每个快照压缩后约20KB，上限约50KB时只能保留两个
+    store = open_store(open_stores, tmp_path, max_mb=0.05)
+    for i in range(5):
+        store.save(os.urandom(20 * 1024), "chapter_page", course=f"章节{i}")
+    store.flush()
+
+    assert [entry["course"] for entry in store.entries] == ["章节3", "章节4"]
+    assert store.total_bytes <= store.max_bytes
+    assert len(blob_files(tmp_path)) == 2
+
+
+def test_newest_entry_is_kept_even_if_over_size_limit(tmp_path, open_stores):
+    store = open_store(open_stores, tmp_path, max_mb=0.001)
+    store.save(os.urandom(8 * 1024), "course_error", course="课程A")
+    store.flush()
+
+    assert [entry["course"] for entry in store.entries] == ["课程A"]
+
+
+def test_reopened_store_restores_index(tmp_path, open_stores):
+    store = open_store(open_stores, tmp_path)
+    store.save("<html>chapter</html>", "chapter_page", run=1, course="章节1")
+    store.save("<html>error</html>", "course_error", run=2, course="课程A", course_index=3)
+    store.close()
+
+    reopened = open_store(open_stores, tmp_path)
+    assert reopened.entries == store.entries
+    [entry] = reopened.find(phase="course_error", run=2)
+    assert entry["course_index"] == 3
+    assert reopened.read(entry) == "<html>error</html>"
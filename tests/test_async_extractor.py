@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""异步提取引擎：不支持的配置在启动浏览器之前明确拒绝，HTTP获取不阻塞事件循环，未变化的章节不解析"""
+
+import asyncio
+import threading
+
+import pytest
+
+import async_extractor
+import course_content_extractor
+from main import Config
+from run_store import RunStore
+from course_page_parser import content_fingerprint
+
+
+def test_unknown_listing_backend_is_rejected():
+    with pytest.raises(ValueError, match="LISTING_BACKEND"):
+        async_extractor.run_config(Config(LISTING_BACKEND="ftp"))
+
+
+def test_locator_extract_backend_is_rejected(monkeypatch):
+    monkeypatch.setattr(course_content_extractor, "EXTRACT_BACKEND", "locator")
+
+    with pytest.raises(ValueError, match="html"):
+        async_extractor.run(listing_backend="http")
+
+
+@pytest.mark.parametrize("backend", async_extractor.LISTING_BACKENDS)
+def test_supported_listing_backends(backend):
+    async_extractor.check_supported(backend)
+
+
+class FakeFetcher:
+    def __init__(self):
+        self.threads = []
+
+    def fetch(self, url, page_type=None):
+        self.threads.append(threading.current_thread())
+        return f"<html>{url}</html>"
+
+
+def test_http_listing_fetch_runs_off_the_event_loop_thread():
+    fetcher = FakeFetcher()
+
+    html = asyncio.run(async_extractor.fetch_practice_html(fetcher, "http://127.0.0.1/practice.php"))
+
+    assert html == "<html>http://127.0.0.1/practice.php</html>"
+    assert fetcher.threads and fetcher.threads[0] is not threading.current_thread()
+
+
+class FakeAsyncPage:
+    """没有缓存校验头的页面：HEAD请求失败，只能按内容指纹判断章节是否变化"""
+
+    class request:
+        @staticmethod
+        async def head(url, timeout=None):
+            raise RuntimeError("HEAD not supported")
+
+    def __init__(self):
+        self.context = self
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeAsyncContext:
+    async def new_page(self):
+        return FakeAsyncPage()
+
+
+def test_unchanged_chapter_is_skipped_before_parsing(tmp_path, monkeypatch):
+    url = "http://127.0.0.1/practice.php?chapter=vi"
+    html = "<html><body><div id='study_content'><ul><li><a href='a'>a</a></li></ul></div></body></html>"
+    parsed = []
+    monkeypatch.setattr(async_extractor, "extract_course_links", lambda *args: parsed.append(args) or ([], []))
+    store = RunStore(str(tmp_path / "run_store.db"))
+    store.save_fingerprint(url, content_fingerprint(html), pending=0)
+
+    class Fetcher:
+        def fetch(self, url, page_type=None):
+            return html
+
+    async def process():
+        return await async_extractor.process_chapter(FakeAsyncContext(), url, store, asyncio.Semaphore(1),
+                                                     incremental=True, fetcher=Fetcher())
+
+    try:
+        result = asyncio.run(process())
+    finally:
+        store.close()
+
+    assert result["skipped"]
+    assert parsed == []
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""检查点日志：中断时写到一半的末行、从检查点继续学习"""
+
+import json
+
+import pytest
+
+from checkpoint_journal import CheckpointJournal, load_checkpoint
+
+PARTIAL_LINE = '{"event": "course", "index": 7, "ur'
+
+
+def make_courses(count):
+    return [{"课程名称": f"课程{i}", "跳转网址": f"http://127.0.0.1/study/content/{i}.html", "课程状态": "未看过"}
+            for i in range(1, count + 1)]
+
+
+@pytest.fixture
+def journal_file(tmp_path):
+    return str(tmp_path / "output" / "checkpoint.jsonl")
+
+
+def write_interrupted_run(journal_file, courses, crash_after, failed=()):
+    """写入课程列表和前crash_after门课程的检查点，末尾留下中断时写到一半的行"""
+    with CheckpointJournal(journal_file) as journal:
+        journal.start(courses)
+        for index, course in enumerate(courses[:crash_after], 1):
+            journal.record(index, course["跳转网址"], course["课程名称"],
+                           "failed" if index in failed else "completed")
+    with open(journal_file, 'a', encoding='utf-8') as f:
+        f.write(PARTIAL_LINE)
+
+
+def test_truncated_last_line_is_dropped(journal_file):
+    courses = make_courses(8)
+    write_interrupted_run(journal_file, courses, crash_after=6)
+
+    state = load_checkpoint(journal_file)
+    assert state.courses == courses
+    assert sorted(state.checkpoints) == [1, 2, 3, 4, 5, 6]
+    assert state.last_index == 6
+
+    # 恢复后追加的检查点单独成行，不与写到一半的行连在一起
+    with CheckpointJournal(journal_file) as journal:
+        journal.resume()
+        journal.record(7, courses[6]["跳转网址"], courses[6]["课程名称"], "completed")
+    with open(journal_file, encoding='utf-8') as f:
+        events = [json.loads(line) for line in f]
+    assert [event.get("index") for event in events] == [None, 1, 2, 3, 4, 5, 6, 7]
+    assert load_checkpoint(journal_file).last_index == 7
+
+
+def test_resume_skips_finished_courses(journal_file):
+    courses = make_courses(10)
+    write_interrupted_run(journal_file, courses, crash_after=6, failed={3})
+
+    with CheckpointJournal(journal_file) as journal:
+        state = journal.resume()
+        remaining = [index for index in range(1, len(state.courses) + 1) if index not in state.done_indexes()]
+        for index in remaining:
+            course = state.courses[index - 1]
+            journal.record(index, course["跳转网址"], course["课程名称"], "completed")
+        journal.finish()
+
+    # 失败的课程和中断后的课程重新学习，已完成的跳过
+    assert remaining == [3, 7, 8, 9, 10]
+    after = load_checkpoint(journal_file)
+    assert after.finished
+    assert after.done_indexes() == set(range(1, 11))
+
+
+def test_finished_or_missing_journal_does_not_resume(journal_file):
+    assert CheckpointJournal(journal_file).resume() is None
+
+    courses = make_courses(2)
+    with CheckpointJournal(journal_file) as journal:
+        journal.start(courses)
+        for index, course in enumerate(courses, 1):
+            journal.record(index, course["跳转网址"], course["课程名称"], "completed")
+        journal.finish()
+
+    assert CheckpointJournal(journal_file).resume() is None
+
+
+def test_new_plan_replaces_previous_checkpoints(journal_file):
+    write_interrupted_run(journal_file, make_courses(5), crash_after=3)
+    with CheckpointJournal(journal_file) as journal:
+        journal.start(make_courses(2))
+
+    state = load_checkpoint(journal_file)
+    assert len(state.courses) == 2
+    assert state.checkpoints == {}
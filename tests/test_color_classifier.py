@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""颜色解析与绿色判断：HSV调色板、命名颜色、原有关键字中的绿色写法、NumPy与纯Python一致性"""
+
+import colorsys
+
+import pytest
+
+import color_classifier
+from color_classifier import (classify_green, is_green_color, inline_style_colors, has_green_class,
+                              NAMED_COLORS, LEGACY_GREEN_KEYWORDS, GREEN_HUE_RANGE, MIN_SATURATION, MIN_VALUE)
+
+# 人工标注的命名颜色：视觉上是绿色的
+GREEN_NAMED_COLORS = {
+    "chartreuse", "darkgreen", "darkolivegreen", "darkseagreen", "forestgreen", "green", "greenyellow",
+    "lawngreen", "lightgreen", "lime", "limegreen", "mediumseagreen", "mediumspringgreen", "olivedrab",
+    "palegreen", "seagreen", "springgreen", "yellowgreen", "aquamarine", "mediumaquamarine",
+}
+
+
+def build_color_palette(hue_step=5, levels=(0.1, 0.25, 0.5, 0.75, 1.0), margin=3.0):
+    """
+    按HSV网格生成颜色，排除落在判断边界附近（色相±margin度、饱和度和明度的下限）的颜色，
+    并用多种CSS写法表示同一颜色
+
+    Returns:
+        list: (CSS颜色字符串, 期望是否为绿色)
+    """
+    palette = []
+    for hue in range(0, 360, hue_step):
+        if any(abs(hue - bound) < margin for bound in GREEN_HUE_RANGE):
+            continue
+        for saturation in levels:
+            for value in levels:
+                if saturation == MIN_SATURATION or value == MIN_VALUE:
+                    continue
+                red, green, blue = (round(channel * 255) for channel in colorsys.hsv_to_rgb(hue / 360, saturation, value))
+                expected = (GREEN_HUE_RANGE[0] < hue < GREEN_HUE_RANGE[1]
+                            and saturation > MIN_SATURATION and value > MIN_VALUE)
+                palette.append((f"#{red:02x}{green:02x}{blue:02x}", expected))
+                palette.append((f"#{red:02X}{green:02X}{blue:02X}ff", expected))
+                palette.append((f"rgb({red}, {green}, {blue})", expected))
+                palette.append((f"rgba({red},{green},{blue},0.8)", expected))
+                palette.append((f"rgb({red} {green} {blue} / 100%)", expected))
+                # 几乎透明的颜色看不出绿色
+                palette.append((f"rgba({red}, {green}, {blue}, 0)", False))
+    return palette
+
+
+PALETTE = build_color_palette()
+
+
+def test_palette_matches_hsv_expectation():
+    colors = [color for color, _ in PALETTE]
+    expected = [flag for _, flag in PALETTE]
+
+    results = classify_green(colors, use_numpy=False)
+
+    assert [color for color, got, want in zip(colors, results, expected) if got != want] == []
+
+
+def test_named_colors_match_manual_labels():
+    named = sorted(NAMED_COLORS)
+
+    greens = {name for name, flag in zip(named, classify_green(named)) if flag}
+
+    assert greens == GREEN_NAMED_COLORS
+
+
+def test_legacy_green_keywords_are_still_green():
+    # 原有关键字中的rgba(...,前缀补上不透明度后才是完整的颜色
+    colors = [keyword + " 0.5)" if keyword.endswith(",") else keyword for keyword in LEGACY_GREEN_KEYWORDS]
+
+    assert all(classify_green(colors))
+    assert all(is_green_color(color) for color in ("rgba(0,255,0,1)", "rgba(50,205,50,0.9)", "#0f0"))
+
+
+@pytest.mark.parametrize("color", ["blue", "rgb(0, 0, 255)", "white", "#fff", "black", "rgba(0, 0, 0, 0)",
+                                   "transparent", "rgb(128, 128, 0)", "teal", "red", "", "inherit",
+                                   "currentcolor", "rgb(1, 2)"])
+def test_other_and_unparseable_colors_are_not_green(color):
+    assert classify_green([color]) == [False]
+
+
+def test_numpy_and_python_results_agree():
+    pytest.importorskip("numpy")
+    colors = [color for color, _ in PALETTE] + sorted(NAMED_COLORS) + ["", "inherit", "rgb(1, 2)"]
+
+    assert classify_green(colors, use_numpy=True) == classify_green(colors, use_numpy=False)
+
+
+def test_pure_python_path_without_numpy(monkeypatch):
+    monkeypatch.setattr(color_classifier, "np", None)
+
+    assert classify_green(["rgb(0, 128, 0)", "rgb(0, 0, 255)"]) == [True, False]
+
+
+def test_inline_style_colors_and_green_class():
+    assert inline_style_colors("font-weight: bold; background: #32cd32 none; color:red") == ["#32cd32", "red"]
+    assert has_green_class("item text-success") and not has_green_class(None)
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""course_page_parser离线解析：省略结束标签的原始HTML与浏览器DOM的一致性、html与locator提取后端的一致性、章节内容指纹"""
+
+import pytest
+import httpx
+
+import artifact_store
+from course_page_parser import (parse_document, parse_course_links, parse_unstudied_course_hrefs,
+                                content_fingerprint, set_site_base_url, SITE_BASE_URL)
+from fixture_server import FixtureServer, FixtureSite, SESSION_COOKIE
+from course_content_extractor import build_course_page_fixture
+
+
+def link_tuples(links):
+    completed, incomplete = links
+    return ([(link.index, link.href, link.text, link.completed) for link in completed],
+            [(link.index, link.href, link.text, link.completed) for link in incomplete])
+
+
+def test_unclosed_li_does_not_nest_next_item():
+    html = ('<div id="study_content"><ul>'
+            '<li><font color="blue">✓</font><a href="a">a</a></li>'
+            '<li><font color="blue">✓</font><a href="b">b</a>'
+            '<li><a href="c">c</a>'
+            '</ul></div>')
+
+    completed, incomplete = link_tuples(parse_course_links(html))
+
+    assert [(index, text, done) for index, _, text, done in completed] == [(1, "a", True), (2, "b", True)]
+    assert [(index, text, done) for index, _, text, done in incomplete] == [(3, "c", False)]
+
+
+def test_implied_end_tags_build_sibling_elements():
+    root = parse_document('<ul><li><p>one<li>two<ul><li>inner</ul><li>three</ul>'
+                          '<select><option>x<option>y</select>'
+                          '<table><tr><td>1<td>2<tr><td>3</table>')
+
+    assert [li.parent.tag for li in root.iter("li")] == ["ul", "ul", "ul", "ul"]
+    assert [li.text_content() for li in root.iter("li")] == ["one", "twoinner", "inner", "three"]
+    assert [option.text_content() for option in root.iter("option")] == ["x", "y"]
+    assert [len(list(tr.iter("td"))) for tr in root.iter("tr")] == [2, 1]
+
+
+def test_stray_end_tag_does_not_close_outer_list_item():
+    root = parse_document('<ul><li>outer<ol></li><li>inner</li></ol>tail</li></ul>')
+
+    outer = next(root.iter("li"))
+    assert outer.text_content() == "outerinnertail"
+
+
+def test_practice_page_without_end_tags_parses_like_closed_markup():
+    closed = FixtureSite(items_per_chapter=12).practice_page("Linux常用命令")
+    raw = FixtureSite(items_per_chapter=12, omit_end_tags=True).practice_page("Linux常用命令")
+    assert "</li>" not in raw
+
+    assert link_tuples(parse_course_links(raw)) == link_tuples(parse_course_links(closed))
+
+
+@pytest.fixture
+def chromium():
+    sync_api = pytest.importorskip("playwright.sync_api")
+    with sync_api.sync_playwright() as playwright:
+        try:
+            browser = playwright.chromium.launch(headless=True)
+        except Exception as e:
+            pytest.skip(f"无法启动Chromium: {str(e).splitlines()[0]}")
+        try:
+            yield browser
+        finally:
+            browser.close()
+
+
+@pytest.fixture
+def raw_fixture_site(monkeypatch, tmp_path):
+    """省略</li>的模拟站点；站点根地址指向它，调试快照写到临时目录"""
+    monkeypatch.chdir(tmp_path)
+    with FixtureServer(items_per_chapter=20, completed_ratio=0.4, omit_end_tags=True) as server:
+        set_site_base_url(server.base_url)
+        try:
+            yield server
+        finally:
+            set_site_base_url(SITE_BASE_URL)
+            artifact_store.close()
+
+
+def test_raw_server_bytes_match_chromium_dom(chromium, raw_fixture_site):
+    from course_content_extractor import extract_course_links
+
+    base_url = raw_fixture_site.base_url
+    name, value = SESSION_COOKIE.split("=", 1)
+    context = chromium.new_context()
+    context.add_cookies([{"name": name, "value": value, "url": base_url}])
+    page = context.new_page()
+    try:
+        with httpx.Client(cookies={name: value}) as client:
+            for chapter in raw_fixture_site.site.chapters:
+                url = f"{base_url}/practice.php?chapter={chapter}"
+                raw = client.get(url).content.decode("utf-8")
+                page.goto(url)
+                # locator后端逐个元素读取Chromium解析后的DOM
+                dom_links = extract_course_links(page, backend="locator")
+                assert link_tuples(parse_course_links(raw)) == link_tuples(dom_links)
+
+            plan_url = f"{base_url}/user/my_plan.php"
+            raw_plan = client.get(plan_url).content.decode("utf-8")
+            page.goto(plan_url)
+            dom_hrefs = [link.get_attribute("href")
+                         for link in page.locator("a:has(img[src*='content1.png'])").all()]
+            assert parse_unstudied_course_hrefs(raw_plan) == dom_hrefs
+    finally:
+        context.close()
+
+
+@pytest.fixture
+def snapshot_dir(monkeypatch, tmp_path):
+    """html后端会保存章节页面快照，写到临时目录"""
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    artifact_store.close()
+
+
+def backend_tuples(links):
+    completed, incomplete = links
+    return ([(link.index, link.href, link.completed) for link in completed],
+            [(link.index, link.href, link.completed) for link in incomplete])
+
+
+@pytest.mark.parametrize("html", [
+    build_course_page_fixture(200),
+    FixtureSite(items_per_chapter=30, completed_ratio=0.4).practice_page("VI编辑器"),
+], ids=["generated", "fixture_site"])
+def test_html_and_locator_backends_agree(chromium, snapshot_dir, html):
+    from course_content_extractor import extract_course_links
+
+    page = chromium.new_page()
+    try:
+        page.set_content(html)
+        locator_links = extract_course_links(page, backend="locator")
+        html_links = extract_course_links(page, backend="html")
+    finally:
+        page.close()
+
+    assert backend_tuples(html_links) == backend_tuples(locator_links)
+    assert html_links[0] and html_links[1]
+
+
+CHAPTER_LIST = ('<div id="study_content"><ul>'
+                '<li><font color="blue">✓</font> <a href="practice_process.php?chapter=vi&amp;id=1">第1关</a></li>'
+                '<li> <a href="practice_process.php?chapter=vi&amp;id=2">第2关</a></li>'
+                '</ul></div>')
+
+
+def chapter_page(study_content, header=""):
+    return f'<!DOCTYPE html><html><head><title>vi</title></head><body>{header}{study_content}</body></html>'
+
+
+def test_fingerprint_ignores_content_outside_study_content():
+    first = chapter_page(CHAPTER_LIST, header='<nav>2025-11-24 10:00 token=abc</nav>')
+    second = chapter_page(CHAPTER_LIST, header='<nav>2025-11-25 09:30 token=xyz</nav>')
+
+    assert content_fingerprint(first) == content_fingerprint(second)
+
+
+def test_fingerprint_is_backend_independent():
+    # 服务器原始写法：省略</li>、单引号、未转义的&、多余空白
+    raw = chapter_page('<div id=study_content>\n<ul>\n'
+                       "  <li><font color='blue'>✓</font> <a href='practice_process.php?chapter=vi&id=1'>第1关</a>\n"
+                       "  <li> <a href='practice_process.php?chapter=vi&id=2'>第2关</a>\n"
+                       '</ul>\n</div>')
+    # Chromium page.content()的写法
+    serialized = chapter_page(CHAPTER_LIST)
+
+    assert content_fingerprint(raw) == content_fingerprint(serialized)
+
+
+def test_fingerprint_changes_with_list_content():
+    finished = CHAPTER_LIST.replace('<li> <a', '<li><font color="blue">✓</font> <a')
+
+    assert content_fingerprint(chapter_page(CHAPTER_LIST)) != content_fingerprint(chapter_page(finished))
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""列表页面HTTP获取：按登录页面重定向或缺少页面标志判断登录失效，不按页面内容中的密码输入框"""
+
+import httpx
+import pytest
+
+from fixture_server import FixtureServer, SESSION_COOKIE
+from listing_fetcher import ListingFetcher, SessionExpiredError
+
+PRACTICE_WITH_PASSWORD = ('<html><body><div id="study_content"><ul><li><a href="a">a</a></li></ul></div>'
+                          '<form><input type="password" name="practice_answer"></form></body></html>')
+LOGIN_PAGE = '<html><body><form><input type="password" id="password"></form></body></html>'
+
+
+def mock_fetcher(handler):
+    fetcher = ListingFetcher()
+    fetcher.client.close()
+    fetcher.client = httpx.Client(transport=httpx.MockTransport(handler), follow_redirects=True)
+    return fetcher
+
+
+def test_listing_with_password_input_is_not_treated_as_login_page():
+    fetcher = mock_fetcher(lambda request: httpx.Response(200, text=PRACTICE_WITH_PASSWORD))
+
+    assert fetcher.fetch("http://site/practice.php?chapter=vi", "practice_list") == PRACTICE_WITH_PASSWORD
+
+
+def test_redirect_to_login_page_means_session_expired():
+    def handler(request):
+        if request.url.path == "/user/index.php":
+            return httpx.Response(200, text=LOGIN_PAGE)
+        return httpx.Response(302, headers={"Location": "/user/index.php"})
+
+    fetcher = mock_fetcher(handler)
+
+    with pytest.raises(SessionExpiredError):
+        fetcher.fetch("http://site/user/my_plan.php", "my_plan")
+
+
+@pytest.mark.parametrize("path, page_type", [("/practice.php?chapter=vi", "practice_list"),
+                                             ("/user/my_plan.php", "my_plan")])
+def test_login_form_served_in_place_means_session_expired(path, page_type):
+    with FixtureServer(courses=2, items_per_chapter=3) as server:
+        name, value = SESSION_COOKIE.split("=", 1)
+        with ListingFetcher(httpx.Cookies({name: value})) as logged_in:
+            assert logged_in.fetch(server.base_url + path, page_type)
+        with ListingFetcher() as logged_out:
+            with pytest.raises(SessionExpiredError):
+                logged_out.fetch(server.base_url + path, page_type)
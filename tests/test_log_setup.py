@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""队列日志：记录日志的线程只合并消息参数，格式化在监听线程中完成"""
+
+import io
+import sys
+import logging
+import queue
+import threading
+
+import log_setup
+from log_setup import DeferredQueueHandler, capture_logging
+
+
+def make_record(msg, args=(), exc_info=None):
+    return logging.LogRecord("test", logging.ERROR, __file__, 1, msg, args, exc_info)
+
+
+def test_prepare_merges_args_and_keeps_exc_info():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = make_record("课程 %s 出错", ("A",), exc_info=sys.exc_info())
+
+    prepared = DeferredQueueHandler(queue.SimpleQueue()).prepare(record)
+
+    assert prepared is not record
+    assert (prepared.msg, prepared.args) == ("课程 A 出错", None)
+    assert prepared.exc_info is record.exc_info
+    assert prepared.exc_text is None
+    # 原记录不被修改，其他处理器仍能看到参数
+    assert record.args == ("A",)
+
+
+def test_prepare_does_not_call_formatter(monkeypatch):
+    handler = DeferredQueueHandler(queue.SimpleQueue())
+    calls = []
+    monkeypatch.setattr(handler, "format", lambda record: calls.append(record) or "")
+
+    handler.prepare(make_record("x %s", (1,)))
+
+    assert calls == []
+
+
+def test_listener_formats_message_and_traceback_in_its_own_thread(monkeypatch):
+    format_threads = []
+    original_format = log_setup.IconFormatter.format
+
+    def recording_format(self, record):
+        format_threads.append(threading.current_thread())
+        return original_format(self, record)
+
+    monkeypatch.setattr(log_setup.IconFormatter, "format", recording_format)
+    stream = io.StringIO()
+    with capture_logging("INFO", stream):
+        try:
+            raise RuntimeError("submit failed")
+        except RuntimeError:
+            logging.getLogger("test").exception("提交第%s门课程失败", 3)
+
+    output = stream.getvalue()
+    assert "提交第3门课程失败" in output
+    assert "Traceback" in output and "RuntimeError: submit failed" in output
+    assert format_threads and threading.current_thread() not in format_threads
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""页面HTML快照：导航和不导航的页面修改之后都能读到当前的DOM"""
+
+from page_snapshot import page_html, invalidate
+from selector_cache import SelectorCache
+from course_scraper import fill_survey
+
+SURVEY_HTML = "<html><form>问卷 <select name='difficulty'></select><select name='use'></select></form></html>"
+SUBMITTED_HTML = "<html><p>问卷已提交</p></html>"
+
+
+class FakeFrame:
+    def __init__(self, parent_frame=None):
+        self.parent_frame = parent_frame
+
+
+class FakePage:
+    """content()返回当前的DOM；navigate()模拟主框架或子框架导航，set_dom()模拟脚本修改页面"""
+
+    def __init__(self, html):
+        self.html = html
+        self.handlers = {}
+        self.serializations = 0
+        self.main_frame = FakeFrame()
+
+    def on(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+
+    def content(self):
+        self.serializations += 1
+        return self.html
+
+    def navigate(self, html, frame=None):
+        self.html = html
+        for handler in self.handlers.get("framenavigated", []):
+            handler(frame or self.main_frame)
+
+
+def test_page_is_serialized_once_per_navigation():
+    page = FakePage("<html>first</html>")
+
+    assert page_html(page) == page_html(page) == "<html>first</html>"
+    assert page.serializations == 1
+
+    page.navigate("<html>second</html>")
+    assert page_html(page) == "<html>second</html>"
+    assert page.serializations == 2
+
+
+def test_subframe_navigation_keeps_snapshot():
+    page = FakePage("<html>first</html>")
+    page_html(page)
+
+    page.navigate("<html>changed</html>", frame=FakeFrame(parent_frame=page.main_frame))
+
+    assert page_html(page) == "<html>first</html>"
+    invalidate(page)
+    assert page_html(page) == "<html>changed</html>"
+
+
+class FakeLocator:
+    def __init__(self, page, selector):
+        self.page = page
+        self.selector = selector
+
+    def count(self):
+        return int(self.selector in self.page.present)
+
+    @property
+    def first(self):
+        return self
+
+    def select_option(self, value=None, timeout=None):
+        self.page.selected[self.selector] = value
+
+    def click(self, force=False, timeout=None):
+        # 问卷通过AJAX提交：页面内容改变，但没有发生导航
+        self.page.html = SUBMITTED_HTML
+
+
+class FakeSurveyPage(FakePage):
+    present = {"select[name='difficulty']", "select[name='use']", "input[type='submit']"}
+
+    def __init__(self, html):
+        super().__init__(html)
+        self.selected = {}
+
+    def locator(self, selector):
+        return FakeLocator(self, selector)
+
+    def wait_for_load_state(self, state=None, timeout=None):
+        pass
+
+    def wait_for_selector(self, selector, timeout=None):
+        pass
+
+
+def test_survey_submitted_without_navigation_is_not_read_from_stale_snapshot(tmp_path):
+    page = FakeSurveyPage(SURVEY_HTML)
+
+    assert fill_survey(page, SelectorCache(str(tmp_path / "selector_cache.json")))
+
+    assert page.selected == {"select[name='difficulty']": "1", "select[name='use']": "2"}
+    # fill_survey开始时读取过问卷页面，提交后读到的是提交后的DOM而不是快照
+    assert page_html(page) == SUBMITTED_HTML
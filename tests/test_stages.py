@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""流程阶段调度与Extractor实例隔离：用假的浏览器会话和上下文运行，不需要Chromium"""
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import browser_session
+from benchmark import fixture_environment
+from course_content_extractor import Extractor
+from course_page_parser import site_url
+from fixture_server import SESSION_COOKIE
+from main import (Config, Stage, STAGES, select_stages, stage_dependencies, stage_order, run_stages,
+                  build_arg_parser)
+from run_store import RUN_STORE_FILE
+
+BARRIER_TIMEOUT = 5
+
+
+class FakeSession:
+    """代替BrowserSession：记录每个会话由哪个线程创建，上下文只是一个标记对象"""
+
+    created = []
+
+    def __init__(self, storage_state):
+        self.storage_state = storage_state
+        self.context = object()
+        self.thread = threading.current_thread().name
+
+    @classmethod
+    def from_profile(cls, user_name, password, profile="fast", storage_state=None, **kwargs):
+        session = cls(storage_state)
+        cls.created.append(session)
+        return session
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+@pytest.fixture
+def fake_sessions(monkeypatch):
+    FakeSession.created = []
+    monkeypatch.setattr(browser_session, "BrowserSession", FakeSession)
+    return FakeSession.created
+
+
+def config():
+    return Config(USER_NAME="user", PASSWORD="secret")
+
+
+class Recorder:
+    """记录各阶段开始和结束的先后顺序，以及阶段收到的上下文"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = []
+        self.contexts = {}
+
+    def stage(self, key, body=None):
+        def func(config, context):
+            with self.lock:
+                self.events.append(("start", key))
+                self.contexts[key] = context
+            result = body() if body else key
+            with self.lock:
+                self.events.append(("end", key))
+            return result
+        return func
+
+    def position(self, event, key):
+        return self.events.index((event, key))
+
+
+def test_builtin_stages_are_independent():
+    assert stage_dependencies(STAGES) == {"extract": set(), "scrape": set()}
+    assert select_stages("scrape") == (STAGES[1],)
+    with pytest.raises(ValueError):
+        select_stages("extract,unknown")
+
+
+def test_stage_order_puts_producers_first():
+    noop = Recorder().stage("noop")
+    stages = (Stage("report", "报告", noop, inputs=("links", "records")),
+              Stage("extract", "提取", noop, outputs=("links",)),
+              Stage("scrape", "爬取", noop, outputs=("records",)))
+
+    assert [stage.key for stage in stage_order(stages)] == ["extract", "scrape", "report"]
+
+
+def test_stage_dependencies_reject_cycles_and_duplicate_producers():
+    noop = Recorder().stage("noop")
+    cycle = (Stage("a", "A", noop, inputs=("y",), outputs=("x",)),
+             Stage("b", "B", noop, inputs=("x",), outputs=("y",)))
+    duplicate = (Stage("a", "A", noop, outputs=("x",)),
+                 Stage("b", "B", noop, outputs=("x",)))
+
+    with pytest.raises(ValueError):
+        stage_dependencies(cycle)
+    with pytest.raises(ValueError):
+        stage_dependencies(duplicate)
+
+
+def test_independent_stages_overlap_and_dependents_wait(fake_sessions):
+    recorder = Recorder()
+    # 两个独立阶段都要等到对方也到达才能继续，串行运行时会超时失败
+    barrier = threading.Barrier(2, timeout=BARRIER_TIMEOUT)
+    stages = (Stage("extract", "提取", recorder.stage("extract", barrier.wait), outputs=("links",)),
+              Stage("scrape", "爬取", recorder.stage("scrape", barrier.wait), outputs=("records",)),
+              Stage("report", "报告", recorder.stage("report"), inputs=("links", "records")))
+
+    results = run_stages(config(), {"cookies": []}, stages=stages)
+
+    assert set(results) == {"extract", "scrape", "report"}
+    assert recorder.position("start", "report") > recorder.position("end", "extract")
+    assert recorder.position("start", "report") > recorder.position("end", "scrape")
+    # 每个阶段在自己的线程中用同一份登录状态创建自己的会话，上下文不共用
+    assert len(fake_sessions) == 3
+    assert all(session.storage_state == {"cookies": []} for session in fake_sessions)
+    assert all(session.thread.startswith("stage") for session in fake_sessions)
+    assert len({id(context) for context in recorder.contexts.values()}) == 3
+    assert fake_sessions[0].thread != fake_sessions[1].thread
+
+
+def test_sequential_mode_runs_in_dependency_order(fake_sessions):
+    recorder = Recorder()
+    stages = (Stage("report", "报告", recorder.stage("report"), inputs=("links",)),
+              Stage("extract", "提取", recorder.stage("extract"), outputs=("links",)))
+
+    run_stages(config(), {}, parallel=False, stages=stages)
+
+    assert recorder.events == [("start", "extract"), ("end", "extract"),
+                               ("start", "report"), ("end", "report")]
+
+
+def test_failed_stage_skips_dependents_and_reraises(fake_sessions):
+    recorder = Recorder()
+
+    def fail():
+        raise RuntimeError("extract failed")
+
+    def slow():
+        time.sleep(0.05)
+        return "records"
+
+    stages = (Stage("extract", "提取", recorder.stage("extract", fail), outputs=("links",)),
+              Stage("scrape", "爬取", recorder.stage("scrape", slow), outputs=("records",)),
+              Stage("report", "报告", recorder.stage("report"), inputs=("links",)))
+
+    with pytest.raises(RuntimeError, match="extract failed"):
+        run_stages(config(), {}, stages=stages)
+
+    # 出错阶段不影响独立阶段完成，依赖它的阶段不运行
+    assert ("end", "scrape") in recorder.events
+    assert ("start", "report") not in recorder.events
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    """只提供HTTP列表后端需要的接口：登录Cookie和新建页面"""
+
+    def __init__(self, host, barrier):
+        self.host = host
+        self.barrier = barrier
+        self.pages = []
+
+    def cookies(self):
+        name, value = SESSION_COOKIE.split("=", 1)
+        return [{"name": name, "value": value, "domain": self.host, "path": "/"}]
+
+    def new_page(self):
+        # 两个Extractor都创建了页面后才继续，保证它们的提取过程确实重叠
+        self.barrier.wait()
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+
+def test_concurrent_extractors_keep_their_own_results(tmp_path):
+    chapters = ("Linux常用命令", "Shell脚本编程基础", "VI编辑器")
+    barrier = threading.Barrier(2, timeout=BARRIER_TIMEOUT)
+    with fixture_environment(str(tmp_path), chapters=chapters, items_per_chapter=12,
+                             completed_ratio=1.0) as server:
+        host = server.base_url.split("//", 1)[1].split(":", 1)[0]
+        extractors = []
+        for own_chapters in (chapters[:1], chapters[1:]):
+            extractor = Extractor(Config(LISTING_BACKEND="http"), FakeContext(host, barrier))
+            extractor.chapters = list(own_chapters)
+            extractors.append(extractor)
+
+        threads = [threading.Thread(target=extractor.run) for extractor in extractors]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=30)
+        assert not any(thread.is_alive() for thread in threads)
+
+        for extractor in extractors:
+            expected_urls = [site_url(f"practice.php?chapter={chapter}") for chapter in extractor.chapters]
+            assert list(extractor.chapter_links) == expected_urls
+            for completed, incomplete in extractor.chapter_links.values():
+                assert len(completed) == 12 and incomplete == []
+            assert [page.closed for page in extractor.context.pages] == [True]
+
+        with sqlite3.connect(RUN_STORE_FILE) as conn:
+            statuses = [row[0] for row in conn.execute("SELECT status FROM runs WHERE stage = 'extract'")]
+    assert statuses == ["finished", "finished"]
+
+
+@pytest.mark.parametrize("argv, parallel", [([], None), (["--parallel"], True), (["--no-parallel"], False)])
+def test_parallel_flag_overrides_config_both_ways(argv, parallel):
+    assert build_arg_parser().parse_args(argv).parallel is parallel